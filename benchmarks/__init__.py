@@ -0,0 +1 @@
+"""Benchmarks for justice_python_common_log."""
@@ -0,0 +1,121 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Throughput benchmark of the FastAPI access log middleware.
+
+Compares no middleware, the previous ``BaseHTTPMiddleware`` implementation
+and the pure ASGI ``LogMiddleware`` by driving the app in-process::
+
+    python -m benchmarks.bench_fastapi_middleware --requests 20000
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from fastapi import FastAPI
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from justice_python_common_log.constant import DEFAULT_LOG_FORMAT
+from justice_python_common_log.fastapi import LogMiddleware
+
+logger = logging.getLogger('justice-common-log')
+
+
+class BaseHTTPLogMiddleware(BaseHTTPMiddleware):
+    """The previous ``BaseHTTPMiddleware`` based implementation."""
+
+    async def dispatch(self, request, call_next):
+        start_time = datetime.now()
+        response = await call_next(request)
+        process_time = (datetime.now() - start_time).total_seconds() * 1000
+
+        logger.info(DEFAULT_LOG_FORMAT.format(
+            datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            request.method,
+            request.url.path,
+            response.status_code,
+            int(process_time)
+        ))
+
+        return response
+
+
+def create_app(middleware=None):
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ping": "pong"}
+
+    if middleware is not None:
+        app.add_middleware(middleware)
+    return app
+
+
+SCOPE = {
+    "type": "http",
+    "asgi": {"version": "3.0"},
+    "http_version": "1.1",
+    "method": "GET",
+    "scheme": "http",
+    "path": "/ping",
+    "raw_path": b"/ping",
+    "root_path": "",
+    "query_string": b"",
+    "headers": [(b"host", b"testserver"), (b"user-agent", b"bench")],
+    "client": ("127.0.0.1", 12345),
+    "server": ("testserver", 80),
+}
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, requests):
+    await app(dict(SCOPE), receive, send)  # warm up the middleware stack
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(dict(SCOPE), receive, send)
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    # measure the middleware, not the stderr handler
+    logger.propagate = False
+    logger.addHandler(logging.NullHandler())
+
+    variants = [
+        ("no middleware", None),
+        ("BaseHTTPMiddleware", BaseHTTPLogMiddleware),
+        ("pure ASGI LogMiddleware", LogMiddleware),
+    ]
+    for name, middleware in variants:
+        rate = asyncio.run(drive(create_app(middleware), args.requests))
+        print("{:<26s} {:>10.0f} req/s".format(name, rate))
+
+
+if __name__ == "__main__":
+    main()
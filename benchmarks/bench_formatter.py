@@ -0,0 +1,129 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-record formatting cost, before and after the compiled formatter, and
+of JSON lines compared to ``key=value`` lines::
+
+    python -m benchmarks.bench_formatter
+"""
+
+import timeit
+from datetime import datetime, timezone
+
+from justice_python_common_log.constant import DEFAULT_LOG_FORMAT, FULL_LOG_FORMAT
+from justice_python_common_log.encoders import JsonText
+from justice_python_common_log.formatter import DEFAULT_FORMATTER, FULL_FORMATTER, JSON_FULL_FORMATTER, format_time
+
+BODY = JsonText('{"id":"0123456789","items":[1,2,3],"name":"item"}')
+
+
+def default_before():
+    data = {
+        "time": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "method": "GET",
+        "path": "/ping",
+        "status": 200,
+        "duration": 3
+    }
+    return DEFAULT_LOG_FORMAT.format(
+        data.get("time"), data.get("method"), data.get("path"), data.get("status"), data.get("duration")
+    )
+
+
+def default_after():
+    return DEFAULT_FORMATTER.format(format_time(), "GET", "/ping", 200, 3)
+
+
+def full_before():
+    data = {
+        "time": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "method": "GET",
+        "path": "/ping",
+        "status": 200,
+        "duration": 3,
+        "user_agent": "agent",
+        "referer": "",
+        "user_ip": "127.0.0.1",
+        "trace_id": "trace",
+        "flight_id": "",
+        "game_version": "",
+        "sdk_version": "",
+        "oss_version": "",
+    }
+    return FULL_LOG_FORMAT.format(
+        data.get("time"),
+        data.get("method"),
+        data.get("path"),
+        data.get("status"),
+        data.get("duration"),
+        data.get("length", 0),
+        data.get("user_ip"),
+        data.get("user_agent"),
+        data.get("referer"),
+        data.get("trace_id"),
+        data.get("namespace", ""),
+        data.get("user_id", ""),
+        data.get("client_id", ""),
+        data.get("request_content_type", ""),
+        data.get("request_body", ""),
+        data.get("response_content_type", ""),
+        data.get("response_body", ""),
+        data.get("flight_id", ""),
+        data.get("game_version", ""),
+        data.get("sdk_version", ""),
+        data.get("oss_version", "")
+    )
+
+
+def full_after():
+    return FULL_FORMATTER.format(
+        time=format_time(),
+        method="GET",
+        path="/ping",
+        status=200,
+        duration=3,
+        source_ip="127.0.0.1",
+        user_agent="agent",
+        trace_id="trace"
+    )
+
+
+def full_text_body():
+    return FULL_FORMATTER.format(
+        time=format_time(), method="POST", path="/items", status=200, duration=3, trace_id="trace",
+        request_content_type="application/json", request_body=BODY
+    )
+
+
+def full_json_body():
+    return JSON_FULL_FORMATTER.format(
+        time=format_time(), method="POST", path="/items", status=200, duration=3, trace_id="trace",
+        request_content_type="application/json", request_body=BODY
+    )
+
+
+def main():
+    for name, before, after in (
+        ("default", default_before, default_after),
+        ("full", full_before, full_after),
+        ("json", full_text_body, full_json_body),
+    ):
+        number = 200000
+        before_ns = min(timeit.repeat(before, number=number, repeat=5)) / number * 1e9
+        after_ns = min(timeit.repeat(after, number=number, repeat=5)) / number * 1e9
+        print("{:<8s} before {:>7.0f} ns/record  after {:>7.0f} ns/record".format(name, before_ns, after_ns))
+
+
+if __name__ == "__main__":
+    main()
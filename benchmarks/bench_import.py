@@ -0,0 +1,142 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Import time of the integration modules, measured with ``python -X importtime``.
+
+Each integration is imported in a fresh interpreter after its framework, so
+only the time added by this library is counted, including the third party
+modules it pulls in. The median of ``--number`` runs is reported; the exit
+status is 1 when it exceeds ``--budget`` ms or, with ``--baseline``, got
+slower than ``--threshold``::
+
+    python -m benchmarks.bench_import --output import-baseline.json
+    python -m benchmarks.bench_import --baseline import-baseline.json --budget 15
+"""
+
+import argparse
+import platform
+import statistics
+import subprocess
+import sys
+
+import orjson
+
+# integration module and the framework imported before it
+INTEGRATIONS = (
+    ("justice_python_common_log.flask", "flask"),
+    ("justice_python_common_log.fastapi", "fastapi"),
+)
+
+# modules the integrations must not import until a feature needs them
+LAZY_MODULES = (
+    "orjson",
+    "jwt",
+    "distutils",
+    "justice_python_common_log.aggregate",
+    "justice_python_common_log.capture",
+    "justice_python_common_log.claims",
+    "justice_python_common_log.routes",
+    "justice_python_common_log.shedding",
+)
+
+
+def parse_importtime(output):
+    """Return ``[(module, self_us, cumulative_us, depth), ...]`` from ``-X importtime`` output."""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # header line
+        module = name.strip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((module, int(self_us), int(cumulative_us), depth))
+    return entries
+
+
+def measure_import(module, framework):
+    """Return ``(ms added by importing module, modules it imported)`` in a fresh interpreter."""
+    code = "import {:s}; import {:s}".format(framework, module)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, check=True
+    )
+    entries = parse_importtime(result.stderr)
+    start = next(index for index, entry in enumerate(entries) if entry[0] == framework and entry[3] == 0)
+    added = entries[start + 1:]
+    total = sum(cumulative for _, _, cumulative, depth in added if depth == 0)
+    return total / 1000, [name for name, _, _, _ in added]
+
+
+def run(number):
+    results = {}
+    imported = {}
+    for module, framework in INTEGRATIONS:
+        timings = []
+        for _ in range(number):
+            elapsed, modules = measure_import(module, framework)
+            timings.append(elapsed)
+        results[module] = statistics.median(timings)
+        imported[module] = modules
+        print("{:<40s} {:>8.2f} ms".format(module, results[module]), flush=True)
+    return results, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=11, help="interpreters started per module")
+    parser.add_argument("--budget", type=float, help="maximum import time in ms")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown, 0.25 for 25%%")
+    args = parser.parse_args(argv)
+
+    results, imported = run(args.number)
+    failures = []
+    for module, modules in imported.items():
+        for name in LAZY_MODULES:
+            if name in modules:
+                failures.append("{:s} imports {:s}".format(module, name))
+    if args.budget is not None:
+        for module, elapsed in results.items():
+            if elapsed > args.budget:
+                failures.append("{:s} takes {:.2f} ms, over the {:.2f} ms budget".format(module, elapsed, args.budget))
+
+    if args.output:
+        report = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "number": args.number,
+            "results": results,
+            "imported": imported,
+        }
+        with open(args.output, "wb") as output:
+            output.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+
+    if args.baseline:
+        with open(args.baseline, "rb") as baseline:
+            previous = orjson.loads(baseline.read())["results"]
+        for module, elapsed in results.items():
+            if module in previous and elapsed > previous[module] * (1 + args.threshold):
+                failures.append("{:s} takes {:.2f} ms, {:.2f} ms in the baseline".format(
+                    module, elapsed, previous[module]
+                ))
+
+    for failure in failures:
+        print(failure)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
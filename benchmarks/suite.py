@@ -0,0 +1,372 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark suite of what the library costs per request.
+
+Drives in-process Flask and FastAPI apps with and without ``Log``, and bare
+WSGI and ASGI apps with and without the generic ``LogMiddleware`` adapters,
+in default and full mode, across body sizes and for an excluded path, and
+micro-benchmarks the hot paths of ``utils`` and the formatters. Lines go to
+a no-op sink so the results measure the library, not the log output.
+
+Results are written as JSON and can be compared with a previous run; the
+exit status is 1 when a benchmark got slower than ``--threshold``::
+
+    python -m benchmarks.suite --output baseline.json
+    python -m benchmarks.suite --baseline baseline.json --threshold 0.15
+"""
+
+import argparse
+import asyncio
+import base64
+import io
+import platform
+import sys
+import time
+import timeit
+
+import flask
+import orjson
+from fastapi import FastAPI, Request, Response
+
+from justice_python_common_log import asgi as asgi_log
+from justice_python_common_log import fastapi as fastapi_log
+from justice_python_common_log import flask as flask_log
+from justice_python_common_log import wsgi as wsgi_log
+from justice_python_common_log.claims import extract_claims
+from justice_python_common_log.config import LogConfig
+from justice_python_common_log.encoders import JsonText
+from justice_python_common_log.formatter import (
+    DEFAULT_FORMATTER, FULL_FORMATTER, JSON_FULL_FORMATTER, format_time
+)
+from justice_python_common_log.utils import BodyCapture, decode_token, get_captured_body, minify_json_string
+
+BODY_SIZES = (("0", 0), ("1k", 1024), ("64k", 65536))
+
+EXCLUDED_PATH = "/health"
+
+
+class NullSink:
+    """Sink discarding every line."""
+
+    def write(self, line):
+        pass
+
+
+def make_body(size):
+    if size == 0:
+        return b""
+    return b'{"data":"' + b"x" * (size - 11) + b'"}'
+
+
+def make_token():
+    def encode(value):
+        return base64.urlsafe_b64encode(orjson.dumps(value)).rstrip(b"=").decode()
+
+    claims = {"namespace": "bench", "user_id": "0123456789", "client_id": "abcdef", "exp": int(time.time()) + 3600}
+    return "Bearer " + ".".join((encode({"alg": "HS256", "typ": "JWT"}), encode(claims), "signature"))
+
+
+TOKEN = make_token()
+
+
+def make_config(variant):
+    return LogConfig(full_access_log_enabled=variant == "full", excluded_paths=[EXCLUDED_PATH])
+
+
+def measure(func, number, repeat=5):
+    """Return the best time of ``func`` over ``repeat`` rounds, in ns per call."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e9
+
+
+def create_flask_app(variant):
+    app = flask.Flask(__name__)
+
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        return flask.Response(flask.request.get_data(), content_type="application/json")
+
+    @app.route(EXCLUDED_PATH)
+    def health():
+        return {"status": "ok"}
+
+    if variant != "none":
+        flask_log.Log(app, sink=NullSink(), config=make_config(variant))
+    return app
+
+
+def create_wsgi_app(variant):
+    def app(environ, start_response):
+        if environ["PATH_INFO"] == EXCLUDED_PATH:
+            start_response("200 OK", [("Content-Type", "application/json")])
+            return [b'{"status":"ok"}']
+        body = environ["wsgi.input"].read(int(environ.get("CONTENT_LENGTH") or 0))
+        start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    if variant != "none":
+        return wsgi_log.LogMiddleware(app, sink=NullSink(), config=make_config(variant))
+    return app
+
+
+def flask_request(app, method, path, body):
+    environ = {
+        "REQUEST_METHOD": method,
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "bench",
+        "SERVER_PORT": "80",
+        "SERVER_PROTOCOL": "HTTP/1.1",
+        "REMOTE_ADDR": "127.0.0.1",
+        "CONTENT_TYPE": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "HTTP_AUTHORIZATION": TOKEN,
+        "HTTP_USER_AGENT": "bench",
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    response = app(environ, start_response)
+    try:
+        for _ in response:
+            pass
+    finally:
+        if hasattr(response, "close"):
+            response.close()
+
+
+def create_fastapi_app(variant):
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return Response(await request.body(), media_type="application/json")
+
+    @app.get(EXCLUDED_PATH)
+    async def health():
+        return {"status": "ok"}
+
+    if variant != "none":
+        fastapi_log.Log(app, sink=NullSink(), config=make_config(variant))
+    return app
+
+
+def create_asgi_app(variant):
+    async def app(scope, receive, send):
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        if scope["path"] == EXCLUDED_PATH:
+            body = b'{"status":"ok"}'
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    if variant != "none":
+        return asgi_log.LogMiddleware(app, sink=NullSink(), config=make_config(variant))
+    return app
+
+
+async def fastapi_request(app, method, path, body):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"authorization", TOKEN.encode()),
+            (b"user-agent", b"bench"),
+        ],
+        "client": ("127.0.0.1", 12345),
+        "server": ("bench", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+def measure_asgi(app, method, path, body, number, repeat=5):
+    async def run():
+        await fastapi_request(app, method, path, body)  # warm up the middleware stack
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                await fastapi_request(app, method, path, body)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best / number * 1e9
+
+    return asyncio.run(run())
+
+
+def framework_benchmarks(number):
+    """Yield ``(name, func)``, ``func()`` returning ns per request."""
+    frameworks = (
+        ("flask", create_flask_app, False),
+        ("fastapi", create_fastapi_app, True),
+        ("wsgi", create_wsgi_app, False),
+        ("asgi", create_asgi_app, True),
+    )
+    for variant in ("none", "default", "full"):
+        for framework, create_app, is_asgi in frameworks:
+            app = create_app(variant)
+            cases = [(size_name, "POST", "/echo", make_body(size)) for size_name, size in BODY_SIZES]
+            if variant != "none":
+                cases.append(("excluded", "GET", EXCLUDED_PATH, b""))
+            for case, method, path, body in cases:
+                name = "{:s}/{:s}/{:s}".format(framework, variant, case)
+                if is_asgi:
+                    func = lambda app=app, method=method, path=path, body=body: measure_asgi(  # noqa: E731
+                        app, method, path, body, number
+                    )
+                else:
+                    func = lambda app=app, method=method, path=path, body=body: measure(  # noqa: E731
+                        lambda: flask_request(app, method, path, body), number
+                    )
+                yield name, func
+
+
+def micro_benchmarks(number):
+    body = make_body(1024)
+    body_text = JsonText(minify_json_string(body))
+    capture = BodyCapture(10240)
+    capture.write(body)
+    raw_token = TOKEN[len("Bearer "):]
+
+    yield "utils/minify_json_string/1k", lambda: measure(lambda: minify_json_string(body), number * 10)
+    yield "utils/decode_token/cached", lambda: measure(lambda: decode_token(TOKEN), number * 10)
+    yield "utils/decode_token/uncached", lambda: measure(lambda: extract_claims(raw_token), number * 10)
+    yield "utils/get_captured_body/1k", lambda: measure(
+        lambda: get_captured_body(capture, "application/json", LogConfig()), number * 10
+    )
+    yield "formatter/default", lambda: measure(
+        lambda: DEFAULT_FORMATTER.format(format_time(), "GET", "/ping", 200, 3), number * 10
+    )
+    yield "formatter/full", lambda: measure(
+        lambda: FULL_FORMATTER.format(
+            time=format_time(), method="POST", path="/echo", status=200, request_body=body_text
+        ), number * 10
+    )
+    yield "formatter/full_json", lambda: measure(
+        lambda: JSON_FULL_FORMATTER.format(
+            time=format_time(), method="POST", path="/echo", status=200, request_body=body_text
+        ), number * 10
+    )
+
+
+def run(number, only=None):
+    results = {}
+    for benchmarks in (micro_benchmarks(number), framework_benchmarks(number)):
+        for name, func in benchmarks:
+            if only and only not in name:
+                continue
+            results[name] = func()
+            print("{:<32s} {:>12.0f} ns".format(name, results[name]), flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Print the change against ``baseline`` and return the names of the regressions."""
+    regressions = []
+    print()
+    print("{:<32s} {:>12s} {:>12s} {:>8s}".format("benchmark", "baseline", "current", "change"))
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        change = current / previous - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print("{:<32s} {:>12.0f} {:>12.0f} {:>+7.1%}{:s}".format(name, previous, current, change, flag))
+    return regressions
+
+
+def overhead(results):
+    """Return the ns per request added by ``Log`` over the bare app."""
+    added = {}
+    for name, value in results.items():
+        framework, _, rest = name.partition("/")
+        variant, _, case = rest.partition("/")
+        if framework in ("flask", "fastapi", "wsgi", "asgi") and variant != "none":
+            bare = results.get("{:s}/none/{:s}".format(framework, case))
+            if bare is not None:
+                added[name] = value - bare
+    return added
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="requests per round")
+    parser.add_argument("--only", help="run the benchmarks whose name contains this")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare with the results of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.15, help="allowed slowdown, 0.15 for 15%%")
+    args = parser.parse_args(argv)
+
+    results = run(args.number, args.only)
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "number": args.number,
+        "results": results,
+        "overhead": overhead(results),
+    }
+
+    if args.output:
+        with open(args.output, "wb") as output:
+            output.write(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
+
+    if args.baseline:
+        with open(args.baseline, "rb") as baseline:
+            regressions = compare(results, orjson.loads(baseline.read())["results"], args.threshold)
+        if regressions:
+            print("\n{:d} benchmark(s) slower than the baseline by more than {:.0%}".format(
+                len(regressions), args.threshold
+            ))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
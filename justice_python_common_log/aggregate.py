@@ -0,0 +1,195 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Latency aggregation module."""
+
+import atexit
+import os
+import threading
+
+from .config import compile_patterns
+from .constant import SUMMARY_LOG_FORMAT
+from .formatter import JsonRecordFormatter, RecordFormatter, format_time
+
+# values below 2 * SUB_BUCKETS are counted exactly, larger ones with a
+# relative error of at most 1 / SUB_BUCKETS
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+
+OVERFLOW_ROUTE = "__other__"
+
+SUMMARY_FORMATTERS = {
+    "text": RecordFormatter(SUMMARY_LOG_FORMAT),
+    "json": JsonRecordFormatter(SUMMARY_LOG_FORMAT),
+}
+
+
+def bucket_index(value):
+    if value < 2 * SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS - 1
+    return shift * SUB_BUCKETS + (value >> shift)
+
+
+def bucket_upper_bound(index):
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    return ((index - shift * SUB_BUCKETS + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """HDR-style histogram of non-negative integer durations in ms.
+
+    Buckets are allocated sparsely, so memory grows with the spread of the
+    values, not with the number of requests.
+    """
+
+    __slots__ = ("counts", "count", "max")
+
+    def __init__(self) -> None:
+        self.counts = {}
+        self.count = 0
+        self.max = 0
+
+    def record(self, value):
+        value = max(int(value), 0)
+        index = bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        """Return the upper bound of the bucket holding the ``percent`` percentile."""
+        if not self.count:
+            return 0
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(bucket_upper_bound(index), self.max)
+        return self.max
+
+
+class LatencyAggregator:
+    """Aggregate requests per ``(method, route, status)`` instead of logging each one.
+
+    Every ``interval`` seconds one summary line per key is written with the
+    request count and the p50, p90, p99 and max duration in ms. At most
+    ``max_keys`` keys are tracked per interval; requests of further routes
+    are aggregated under the ``__other__`` route and counted in
+    ``overflowed``. Requests whose route (the route template with a
+    ``normalizer``) or raw path matches ``individual_paths`` are aggregated
+    and also logged individually as usual.
+
+    Pass it as ``aggregator`` to ``Log``; the summary lines go to the same
+    sink, in the configured output format.
+    """
+
+    def __init__(self, interval=60.0, max_keys=1000, individual_paths=None) -> None:
+        self.interval = interval
+        self.max_keys = max_keys
+        self.individual_paths = compile_patterns(individual_paths)
+        self.overflowed = 0
+
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._write = None
+        self._holder = None
+        self._stopped = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def bind(self, write, holder):
+        """Write summary lines with ``write`` in the output format of ``holder.config``."""
+        self._write = write
+        self._holder = holder
+        if self._thread is None:
+            self._start()
+            atexit.register(self.close)
+
+    def _start(self):
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="justice-common-log-aggregator", daemon=True)
+        self._thread.start()
+
+    def logs_individually(self, route, path=None) -> bool:
+        """Return whether a request to ``route``, or to the raw ``path``, is also logged on its own."""
+        matcher = self.individual_paths
+        if matcher is None:
+            return False
+        return matcher(route) or (path is not None and path != route and matcher(path))
+
+    def record(self, method, route, status, duration_ms):
+        if self._pid != os.getpid() and self._thread is not None:
+            # the flush thread does not survive a fork, e.g. gunicorn --preload
+            self._restart()
+
+        key = (method, route, status)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                if len(self._histograms) >= self.max_keys:
+                    self.overflowed += 1
+                    key = (method, OVERFLOW_ROUTE, status)
+                    histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = LatencyHistogram()
+            histogram.record(duration_ms)
+
+    def flush(self):
+        """Write the summary lines of the current interval and start a new one."""
+        with self._lock:
+            histograms, self._histograms = self._histograms, {}
+        if not histograms or self._write is None:
+            return 0
+
+        output_format = self._holder.config.output_format if self._holder is not None else "text"
+        formatter = SUMMARY_FORMATTERS[output_format]
+        now = format_time()
+        interval = int(round(self.interval))
+        for (method, route, status), histogram in histograms.items():
+            self._write(formatter.format(
+                now,
+                method,
+                route,
+                status,
+                histogram.count,
+                histogram.percentile(50),
+                histogram.percentile(90),
+                histogram.percentile(99),
+                histogram.max,
+                interval
+            ))
+        return len(histograms)
+
+    def close(self):
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread() and self._pid == os.getpid():
+            self._thread.join()
+        self.flush()
+        atexit.unregister(self.close)
+
+    def _restart(self):
+        # the requests of the parent are summarized by the parent
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._start()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
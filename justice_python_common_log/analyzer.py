@@ -0,0 +1,376 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Access log analyzer module.
+
+Summarizes access log files per route, e.g. the routes that got slow in the
+last hour::
+
+    justice-log-analyzer --last 1h --sort p99 --top 20 /var/log/app/access.log*
+
+Requires NumPy, installed with the ``analyzer`` extra.
+"""
+
+import argparse
+import gzip
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import orjson
+
+from .aggregate import OVERFLOW_ROUTE, bucket_index, bucket_upper_bound
+from .formatter import TIME_FORMAT
+from .routes import RouteNormalizer
+
+try:
+    import numpy as np
+except ImportError:  # the analyzer is an optional feature
+    np = None
+
+ANALYZER_CHUNK_SIZE = 1 << 22
+
+# durations are bucketed in us with the scheme of `LatencyHistogram`, up to ~19h
+MAX_DURATION_US = (1 << 36) - 1
+BUCKET_UPPER_BOUNDS = tuple(bucket_upper_bound(index) for index in range(bucket_index(MAX_DURATION_US) + 1))
+
+PERCENTILES = (50, 90, 99)
+
+COLUMNS = ("count", "errors", "client_errors", "p50", "p90", "p99", "max", "mean", "length")
+
+# the leading fields of `DEFAULT_LOG_FORMAT` and `FULL_LOG_FORMAT`, which come
+# before any free-form field such as the user agent or the bodies
+RECORD_PATTERN = re.compile(
+    rb'time=(\S*) log_type=access method=(\S*) path=(?:"([^"]*)"|(\S*)) status=(\d+) duration=([\d.]+)'
+    rb'(?: length=(\d+))?'
+)
+
+# any `key=value` field, for lines with a custom set of fields
+FIELD_PATTERN = re.compile(rb'(?:^|\s)(\w+)=(?:"([^"]*)"|(\S*))')
+
+RELATIVE_TIME_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)([smhd])$')
+RELATIVE_TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_line(line):
+    """Return ``(time, method, path, status, duration_ms, length)`` of an access log line, or None.
+
+    Lines are ``key=value`` text lines or JSON objects. ``AB[...]AB`` bodies
+    and quoted fields are never scanned for fields.
+    """
+    match = RECORD_PATTERN.search(line)
+    if match is not None:
+        path = match.group(3) if match.group(3) is not None else match.group(4)
+        return (
+            match.group(1),
+            match.group(2),
+            path,
+            int(match.group(5)),
+            float(match.group(6)),
+            int(match.group(7) or 0),
+        )
+
+    if line.lstrip().startswith(b"{"):
+        try:
+            record = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            return None
+        if not isinstance(record, dict) or record.get("log_type") != "access":
+            return None
+        return (
+            str(record.get("time", "")).encode(),
+            str(record.get("method", "")).encode(),
+            str(record.get("path", "")).encode(),
+            int(record.get("status") or 0),
+            float(record.get("duration") or 0),
+            int(record.get("length") or 0),
+        )
+
+    if b"log_type=access " not in line:
+        return None
+    fields = {}
+    for field in FIELD_PATTERN.finditer(line.split(b"AB[", 1)[0]):
+        fields[field.group(1)] = field.group(2) if field.group(2) is not None else field.group(3)
+    try:
+        return (
+            fields.get(b"time", b""),
+            fields.get(b"method", b""),
+            fields.get(b"path", b""),
+            int(fields.get(b"status") or 0),
+            float(fields.get(b"duration") or 0),
+            int(fields.get(b"length") or 0),
+        )
+    except ValueError:
+        return None
+
+
+def parse_since(value, now=None):
+    """Return the ``time`` field value of the oldest line to analyze.
+
+    ``value`` is a time in the log format, e.g. ``2024-01-01T00:00:00Z``, or a
+    duration before ``now`` such as ``90s``, ``30m``, ``1h`` or ``2d``.
+    """
+    match = RELATIVE_TIME_PATTERN.match(value)
+    if match is None:
+        time.strptime(value, TIME_FORMAT)  # raises ValueError
+        return value.encode()
+    seconds = float(match.group(1)) * RELATIVE_TIME_UNITS[match.group(2)]
+    now = time.time() if now is None else now
+    return time.strftime(TIME_FORMAT, time.gmtime(now - seconds)).encode()
+
+
+class RouteStats:
+    """Per ``(method, route)`` columnar accumulators of access log records.
+
+    Records are added in chunks of columns, aggregated with NumPy, so memory
+    depends on the number of routes, not on the number of records. Durations
+    are kept in histograms with the bucket scheme of ``LatencyHistogram``.
+    At most ``max_routes`` keys are tracked, further routes are counted
+    under the ``__other__`` route.
+    """
+
+    def __init__(self, max_routes=10000) -> None:
+        self.max_routes = max_routes
+        self.keys = {}
+        self.capacity = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.errors = np.zeros(0, dtype=np.int64)
+        self.client_errors = np.zeros(0, dtype=np.int64)
+        self.duration_sum = np.zeros(0, dtype=np.float64)
+        self.duration_max = np.zeros(0, dtype=np.int64)
+        self.length_sum = np.zeros(0, dtype=np.float64)
+        self.histograms = np.zeros((0, len(BUCKET_UPPER_BOUNDS)), dtype=np.int64)
+
+    def key_id(self, method, route):
+        key = (method, route)
+        key_id = self.keys.get(key)
+        if key_id is None:
+            if len(self.keys) >= self.max_routes:
+                key = (method, OVERFLOW_ROUTE)
+                key_id = self.keys.get(key)
+            if key_id is None:
+                key_id = self.keys[key] = len(self.keys)
+        return key_id
+
+    def add(self, key_ids, statuses, durations_ms, lengths):
+        """Add a chunk of records given as parallel sequences."""
+        if not len(key_ids):
+            return
+        self._reserve(len(self.keys))
+        capacity = self.capacity
+
+        key_ids = np.asarray(key_ids, dtype=np.intp)
+        statuses = np.asarray(statuses, dtype=np.int64)
+        durations = np.minimum(
+            np.rint(np.asarray(durations_ms, dtype=np.float64) * 1000).astype(np.int64), MAX_DURATION_US
+        )
+        durations = np.maximum(durations, 0)
+
+        self.counts += np.bincount(key_ids, minlength=capacity)
+        self.errors += np.bincount(key_ids[statuses >= 500], minlength=capacity)
+        self.client_errors += np.bincount(key_ids[(statuses >= 400) & (statuses < 500)], minlength=capacity)
+        self.duration_sum += np.bincount(key_ids, weights=durations, minlength=capacity)
+        self.length_sum += np.bincount(key_ids, weights=np.asarray(lengths, dtype=np.float64), minlength=capacity)
+        np.maximum.at(self.duration_max, key_ids, durations)
+
+        buckets = np.searchsorted(np.asarray(BUCKET_UPPER_BOUNDS), durations, side="left")
+        cells = key_ids * len(BUCKET_UPPER_BOUNDS) + buckets
+        self.histograms += np.bincount(cells, minlength=self.histograms.size).reshape(self.histograms.shape)
+
+    def merge(self, other):
+        """Add the records of another ``RouteStats``, e.g. of another file."""
+        if not other.keys:
+            return self
+        mapping = np.empty(len(other.keys), dtype=np.intp)
+        for (method, route), key_id in other.keys.items():
+            mapping[key_id] = self.key_id(method, route)
+        self._reserve(len(self.keys))
+
+        size = len(other.keys)
+        np.add.at(self.counts, mapping, other.counts[:size])
+        np.add.at(self.errors, mapping, other.errors[:size])
+        np.add.at(self.client_errors, mapping, other.client_errors[:size])
+        np.add.at(self.duration_sum, mapping, other.duration_sum[:size])
+        np.add.at(self.length_sum, mapping, other.length_sum[:size])
+        np.maximum.at(self.duration_max, mapping, other.duration_max[:size])
+        np.add.at(self.histograms, mapping, other.histograms[:size])
+        return self
+
+    def summary(self):
+        """Return one dict per route with its counts, error rates and durations in ms."""
+        size = len(self.keys)
+        if not size:
+            return []
+        counts = self.counts[:size]
+        cumulative = np.cumsum(self.histograms[:size], axis=1)
+        bounds = np.asarray(BUCKET_UPPER_BOUNDS)
+        percentiles = {}
+        for percent in PERCENTILES:
+            index = np.argmax(cumulative >= (counts * percent / 100.0)[:, None], axis=1)
+            percentiles[percent] = np.minimum(bounds[index], self.duration_max[:size]) / 1000
+
+        rows = []
+        for (method, route), key_id in self.keys.items():
+            count = int(counts[key_id])
+            rows.append({
+                "method": method,
+                "route": route,
+                "count": count,
+                "errors": float(self.errors[key_id] / count),
+                "client_errors": float(self.client_errors[key_id] / count),
+                "p50": float(percentiles[50][key_id]),
+                "p90": float(percentiles[90][key_id]),
+                "p99": float(percentiles[99][key_id]),
+                "max": float(self.duration_max[key_id] / 1000),
+                "mean": float(self.duration_sum[key_id] / count / 1000),
+                "length": float(self.length_sum[key_id] / count),
+            })
+        return rows
+
+    def _reserve(self, size):
+        if size <= self.capacity:
+            return
+        capacity = max(size, self.capacity * 2, 64)
+        grow = capacity - self.capacity
+        self.counts = np.concatenate((self.counts, np.zeros(grow, dtype=np.int64)))
+        self.errors = np.concatenate((self.errors, np.zeros(grow, dtype=np.int64)))
+        self.client_errors = np.concatenate((self.client_errors, np.zeros(grow, dtype=np.int64)))
+        self.duration_sum = np.concatenate((self.duration_sum, np.zeros(grow, dtype=np.float64)))
+        self.duration_max = np.concatenate((self.duration_max, np.zeros(grow, dtype=np.int64)))
+        self.length_sum = np.concatenate((self.length_sum, np.zeros(grow, dtype=np.float64)))
+        self.histograms = np.concatenate(
+            (self.histograms, np.zeros((grow, len(BUCKET_UPPER_BOUNDS)), dtype=np.int64))
+        )
+        self.capacity = capacity
+
+
+def read_chunks(stream, chunk_size=ANALYZER_CHUNK_SIZE):
+    """Yield lists of complete lines read ``chunk_size`` bytes at a time."""
+    pending = b""
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            break
+        data = pending + data
+        end = data.rfind(b"\n") + 1
+        pending = data[end:]
+        if end:
+            yield data[:end - 1].split(b"\n")
+    if pending:
+        yield [pending]
+
+
+def open_log(path):
+    if path == "-":
+        return sys.stdin.buffer
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def analyze_stream(stream, since=None, raw_paths=False, max_routes=10000, chunk_size=ANALYZER_CHUNK_SIZE):
+    """Return the ``RouteStats`` of the access log lines read from ``stream``."""
+    stats = RouteStats(max_routes)
+    normalizer = None if raw_paths else RouteNormalizer()
+    for lines in read_chunks(stream, chunk_size):
+        key_ids, statuses, durations, lengths = [], [], [], []
+        for line in lines:
+            record = parse_line(line)
+            if record is None:
+                continue
+            record_time, method, path, status, duration, length = record
+            if since is not None and record_time < since:
+                continue
+            route = path.decode("utf-8", "replace")
+            if normalizer is not None:
+                route = normalizer(route.split("?", 1)[0])
+            key_ids.append(stats.key_id(method.decode("ascii", "replace"), route))
+            statuses.append(status)
+            durations.append(duration)
+            lengths.append(length)
+        stats.add(key_ids, statuses, durations, lengths)
+    return stats
+
+
+def analyze_file(path, since=None, raw_paths=False, max_routes=10000, chunk_size=ANALYZER_CHUNK_SIZE):
+    stream = open_log(path)
+    try:
+        return analyze_stream(stream, since, raw_paths, max_routes, chunk_size)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def analyze(paths, since=None, raw_paths=False, max_routes=10000, chunk_size=ANALYZER_CHUNK_SIZE, jobs=1):
+    """Return the merged ``RouteStats`` of ``paths``, analyzed by ``jobs`` processes."""
+    stats = RouteStats(max_routes)
+    arguments = (since, raw_paths, max_routes, chunk_size)
+    if jobs > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+            futures = [executor.submit(analyze_file, path, *arguments) for path in paths]
+            for future in futures:
+                stats.merge(future.result())
+    else:
+        for path in paths:
+            stats.merge(analyze_file(path, *arguments))
+    return stats
+
+
+def format_table(rows):
+    lines = ["{:<7s} {:<40s} {:>9s} {:>7s} {:>7s} {:>9s} {:>9s} {:>9s} {:>9s} {:>9s} {:>9s}".format(
+        "method", "route", "count", "5xx", "4xx", "p50", "p90", "p99", "max", "mean", "length"
+    )]
+    for row in rows:
+        lines.append(
+            "{method:<7s} {route:<40s} {count:>9d} {errors:>7.2%} {client_errors:>7.2%} {p50:>9.1f} {p90:>9.1f} "
+            "{p99:>9.1f} {max:>9.1f} {mean:>9.1f} {length:>9.0f}".format(**row)
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize access log files per route.")
+    parser.add_argument("paths", nargs="*", default=["-"], help="log files, .gz compressed or - for stdin")
+    window = parser.add_mutually_exclusive_group()
+    window.add_argument("--since", help="skip lines older than this time, e.g. 2024-01-01T00:00:00Z")
+    window.add_argument("--last", help="only analyze this much time before now, e.g. 30m, 1h or 2d")
+    parser.add_argument("--sort", choices=COLUMNS, default="p99", help="column to sort the routes by")
+    parser.add_argument("--top", type=int, help="print at most this many routes")
+    parser.add_argument("--raw-paths", action="store_true", help="do not normalize paths into route templates")
+    parser.add_argument("--max-routes", type=int, default=10000, help="further routes are counted as __other__")
+    parser.add_argument("--jobs", type=int, default=1, help="files analyzed in parallel processes")
+    parser.add_argument("--chunk-size", type=int, default=ANALYZER_CHUNK_SIZE, help="bytes read at a time")
+    parser.add_argument("--format", choices=("text", "json"), default="text", help="output format")
+    args = parser.parse_args(argv)
+
+    if np is None:
+        parser.error("the analyzer requires numpy: pip install justice_python_common_log[analyzer]")
+
+    try:
+        since = parse_since(args.since or args.last) if args.since or args.last else None
+    except ValueError:
+        parser.error("invalid time: {!r}".format(args.since or args.last))
+
+    stats = analyze(args.paths, since, args.raw_paths, args.max_routes, args.chunk_size, args.jobs)
+    rows = sorted(stats.summary(), key=lambda row: row[args.sort], reverse=True)[:args.top]
+    if args.format == "json":
+        sys.stdout.buffer.write(orjson.dumps(rows) + b"\n")
+    else:
+        print(format_table(rows))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,192 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""ASGI module."""
+
+from time import perf_counter_ns
+
+from .config import LogConfig
+from .context import RequestContext, request_context
+from .core import AccessLogEngine, Exchange
+from .utils import BodyCapture
+
+
+class LogMiddleware:
+    """ASGI access log middleware, for FastAPI, Starlette, Quart or any other ASGI app.
+
+    Takes an ``AccessLogEngine``, or the options of one. Wraps ``send`` to
+    capture the response status without spawning an extra task or memory
+    stream per request, so streaming responses and background tasks behave
+    exactly as they do without the middleware.
+
+    In full access log mode ``receive`` and ``send`` are teed into bounded
+    buffers holding at most ``FULL_ACCESS_LOG_MAX_BODY_SIZE`` bytes per
+    direction; the bodies themselves are never buffered.
+
+    ``config`` is a ``LogConfig`` or a ``ConfigHolder`` shared with ``Log``;
+    by default it is resolved from the environment once. ``metrics`` is an
+    optional ``PipelineMetrics`` timing each stage.
+
+    Each request runs with a ``RequestContext`` in ``request_context``; with
+    ``echo_trace_id`` a generated trace id is returned in ``X-Ab-TraceID``.
+    """
+
+    def __init__(self, app, engine: AccessLogEngine = None, **options) -> None:
+        self.app = app
+        self.engine = engine if engine is not None else AccessLogEngine(**options)
+
+    @property
+    def config(self) -> LogConfig:
+        return self.engine.holder.config
+
+    @config.setter
+    def config(self, config: LogConfig):
+        self.engine.holder.config = config
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        context = RequestContext(lambda: get_headers(scope["headers"]))
+        token = request_context.set(context)
+        try:
+            await self.handle(scope, receive, send, context)
+        finally:
+            request_context.reset(token)
+
+    async def handle(self, scope, receive, send, context: RequestContext) -> None:
+        engine = self.engine
+        config = engine.holder.config
+        echo_trace_id = engine.echo_trace_id
+        path = scope["path"]
+
+        if engine.is_excluded(config, path, lambda: get_header(scope, b"user-agent")):
+            await self.app(scope, receive, with_trace_id(send, context) if echo_trace_id else send)
+            return
+
+        client = scope.get("client")
+        exchange = Exchange(context, scope["method"], path, client[0] if client else "")
+
+        capture_limit = engine.capture_limit(config)
+        if capture_limit is not None:
+            request_body = exchange.request_body = BodyCapture(capture_limit)
+            response_body = exchange.response_body = BodyCapture(capture_limit)
+
+            async def receive_wrapper():
+                message = await receive()
+                if message["type"] == "http.request":
+                    request_body.write(message.get("body", b""))
+                return message
+
+            async def send_wrapper(message) -> None:
+                if message["type"] == "http.response.start":
+                    exchange.status = message["status"]
+                    exchange.response_content_type = find_header(message.get("headers", []), b"content-type") or ""
+                    if echo_trace_id:
+                        message = add_trace_id(message, context)
+                    await send(message)
+                    return
+                if message["type"] == "http.response.body":
+                    body = message.get("body", b"")
+                    if body and exchange.first_byte is None:
+                        exchange.first_byte = perf_counter_ns()
+                    response_body.write(body)
+                    await send(message)
+                    if not message.get("more_body", False):
+                        exchange.last_byte = perf_counter_ns()
+                    return
+                await send(message)
+
+            app_receive = receive_wrapper
+        else:
+
+            async def send_wrapper(message) -> None:
+                if message["type"] == "http.response.start":
+                    exchange.status = message["status"]
+                    if echo_trace_id:
+                        message = add_trace_id(message, context)
+                await send(message)
+
+            app_receive = receive
+
+        root_path = scope.get("root_path", "")
+        exchange.start = perf_counter_ns()
+        try:
+            await self.app(scope, app_receive, send_wrapper)
+        finally:
+            # also log failed requests: 500 unless the response had started
+            end = perf_counter_ns()
+            exchange.route = get_route(scope, root_path)
+            engine.log(config, exchange, end)
+
+
+def get_route(scope, root_path=""):
+    """Return the route template the Starlette router matched, with the prefix of its mounts, or None.
+
+    The router sets the innermost matched route in ``scope["route"]``; each
+    mount on the way appends its matched prefix to ``root_path``, so the
+    prefix is the part of ``root_path`` added since the app was called.
+    """
+    route = scope.get("route")
+    path_format = getattr(route, "path_format", None)
+    if path_format is None:
+        return None
+    if hasattr(route, "routes"):
+        # a mount of an app without routes of its own, its prefix is already in root_path
+        path_format = "/{path}"
+    prefix = scope.get("root_path", "")
+    if prefix.startswith(root_path):
+        prefix = prefix[len(root_path):]
+    return prefix.rstrip("/") + path_format
+
+
+def add_trace_id(message, context: RequestContext):
+    """Return the ``http.response.start`` message with the trace id header, if it was generated."""
+    trace_id = context.trace_id
+    if not context.trace_id_generated:
+        return message
+    headers = list(message.get("headers", []))
+    headers.append((b"x-ab-traceid", trace_id.encode("latin-1")))
+    return {**message, "headers": headers}
+
+
+def with_trace_id(send, context: RequestContext):
+    async def send_wrapper(message) -> None:
+        if message["type"] == "http.response.start":
+            message = add_trace_id(message, context)
+        await send(message)
+
+    return send_wrapper
+
+
+def get_header(scope, name: bytes):
+    """Return the first value of request header ``name`` (lowercase bytes) or None."""
+    return find_header(scope["headers"], name)
+
+
+def find_header(raw_headers, name: bytes):
+    """Return the first value of header ``name`` (lowercase bytes) in ``raw_headers`` or None."""
+    for key, value in raw_headers:
+        if key.lower() == name:
+            return value.decode("latin-1")
+    return None
+
+
+def get_headers(raw_headers) -> dict:
+    """Decode ASGI ``(name, value)`` byte pairs, keeping the first value of each name."""
+    headers = {}
+    for key, value in raw_headers:
+        headers.setdefault(key.decode("latin-1").lower(), value.decode("latin-1"))
+    return headers
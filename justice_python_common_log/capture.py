@@ -0,0 +1,46 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Body capture policy module."""
+
+import random
+
+
+class CapturePolicy:
+    """Decide, once status and duration are known, whether to serialize bodies.
+
+    In full access log mode the raw request and response bytes are always
+    captured, but they are only serialized into ``request_body`` and
+    ``response_body`` when the record matches one of the enabled rules:
+    ``errors`` (status 400 and above), ``slow_threshold_ms`` or
+    ``sample_rate``. A policy without rules serializes every record.
+    """
+
+    def __init__(self, errors=False, slow_threshold_ms=None, sample_rate=None) -> None:
+        self.errors = errors
+        self.slow_threshold_ms = slow_threshold_ms
+        self.sample_rate = sample_rate
+        self.always = not errors and slow_threshold_ms is None and sample_rate is None
+
+    def should_serialize(self, status, duration_ms) -> bool:
+        if self.always:
+            return True
+        if self.errors and status >= 400:
+            return True
+        if self.slow_threshold_ms is not None and duration_ms >= self.slow_threshold_ms:
+            return True
+        return self.sample_rate is not None and random.random() < self.sample_rate
+
+
+ALWAYS = CapturePolicy()
@@ -0,0 +1,111 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""JWT claims module."""
+
+import binascii
+import threading
+import time
+from base64 import urlsafe_b64decode
+from collections import OrderedDict
+
+import orjson
+
+CLAIMS_CACHE_MAX_SIZE = 4096
+CLAIMS_CACHE_TTL = 300
+
+
+class InvalidTokenError(ValueError):
+    """Raised when a token has no readable JSON object payload."""
+
+
+def extract_claims(token):
+    """Return the payload claims of a JWS compact ``token``.
+
+    Only the payload segment is base64url-decoded and parsed; the signature is
+    neither read nor verified, so this must only be used for logging.
+    """
+    parts = token.split(".")
+    if len(parts) != 3:
+        raise InvalidTokenError("token must have 3 segments")
+
+    payload = parts[1]
+    try:
+        claims = orjson.loads(urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (binascii.Error, ValueError) as e:
+        raise InvalidTokenError("invalid token payload") from e
+
+    if not isinstance(claims, dict):
+        raise InvalidTokenError("token payload must be a JSON object")
+
+    return claims
+
+
+class ClaimsCache:
+    """Size-bounded LRU cache of token claims.
+
+    An entry lives for at most ``ttl`` seconds and never past the token's
+    ``exp`` claim. Tokens that cannot be decoded are cached as empty claims so
+    repeated garbage is not parsed again. ``hits`` and ``misses`` count lookups.
+    The returned claims are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, max_size=CLAIMS_CACHE_MAX_SIZE, ttl=CLAIMS_CACHE_TTL) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, token):
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[token]
+            self.misses += 1
+
+        try:
+            claims = extract_claims(token)
+        except InvalidTokenError:
+            claims = {}
+
+        expires_at = now + self.ttl
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)) and exp < expires_at:
+            expires_at = exp
+
+        if expires_at > now:
+            with self._lock:
+                self._entries[token] = (expires_at, claims)
+                self._entries.move_to_end(token)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+        return claims
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,383 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Log collector module.
+
+Workers of a multi-process server send their access log records to a single
+collector process over a UNIX socket, which writes them out in batches::
+
+    justice-log-collector --socket /tmp/justice-common-log.sock
+
+and in the application::
+
+    Log(app, sink=CollectorSink('/tmp/justice-common-log.sock'))
+"""
+
+import argparse
+import errno
+import os
+import selectors
+import signal
+import socket
+import stat
+import struct
+import threading
+import time
+
+import orjson
+
+from .formatter import format_time
+from .sink import BufferedSink
+
+DEFAULT_COLLECTOR_SOCKET = "/tmp/justice-common-log.sock"
+
+KIND_DGRAM = "dgram"
+KIND_STREAM = "stream"
+
+# every message starts with its type: a log record or a counters snapshot
+MESSAGE_RECORD = b"L"
+MESSAGE_COUNTERS = b"C"
+
+# stream messages are prefixed with their length
+FRAME_HEADER = struct.Struct("!I")
+
+MAX_DATAGRAM_SIZE = 212992
+
+
+def socket_type(kind):
+    if kind == KIND_DGRAM:
+        return socket.SOCK_DGRAM
+    if kind == KIND_STREAM:
+        return socket.SOCK_STREAM
+    raise ValueError("socket kind must be {!r} or {!r}, got {!r}".format(KIND_DGRAM, KIND_STREAM, kind))
+
+
+def remove_stale_socket(path, kind=socket.SOCK_DGRAM):
+    """Remove the socket a previous collector left at ``path``.
+
+    Raises ``FileExistsError`` if ``path`` is not a socket and ``OSError``
+    (``EADDRINUSE``) if a collector is still listening on it.
+    """
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(errno.EEXIST, "not a socket", path)
+
+    probe = socket.socket(socket.AF_UNIX, kind)
+    try:
+        probe.connect(path)
+    except ConnectionRefusedError:
+        os.unlink(path)
+        return
+    except OSError:
+        pass
+    finally:
+        probe.close()
+    raise OSError(errno.EADDRINUSE, "socket is in use", path)
+
+
+class CollectorSink:
+    """Send log lines to a collector process, falling back to local writing.
+
+    Each line is one datagram (or one length-prefixed frame on a stream
+    socket), so lines of different workers never interleave. Sends never
+    block: while the collector is unreachable or behind, lines go to
+    ``fallback`` (a ``BufferedSink`` on stdout by default) and reconnection
+    is retried every ``retry_interval`` seconds; a stream connection that
+    took only part of a frame is dropped and reopened. Every ``counters_interval`` seconds the counters registered
+    with ``add_counters`` are sent to the collector, which merges them
+    across workers.
+    """
+
+    def __init__(
+        self,
+        path=DEFAULT_COLLECTOR_SOCKET,
+        kind=KIND_DGRAM,
+        fallback=None,
+        retry_interval=1.0,
+        counters_interval=10.0
+    ) -> None:
+        self.path = path
+        self.kind = kind
+        self.socket_type = socket_type(kind)
+        self.fallback = fallback if fallback is not None else BufferedSink()
+        self.retry_interval = retry_interval
+        self.counters_interval = counters_interval
+        self.counter_sources = {}
+        self.sent = 0
+        self.fallbacks = 0
+
+        self._socket = None
+        self._pid = None
+        self._retry_at = 0.0
+        self._report_at = time.monotonic() + counters_interval
+        self._lock = threading.Lock()
+
+    @property
+    def dropped(self):
+        return getattr(self.fallback, "dropped", 0)
+
+    def add_counters(self, prefix, source):
+        """Report ``source()``, a ``{name: number}`` dict, as ``<prefix>.<name>`` counters."""
+        self.counter_sources[prefix] = source
+
+    def write(self, line):
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+
+        if self._send(MESSAGE_RECORD + line):
+            self.sent += 1
+        else:
+            self.fallbacks += 1
+            self.fallback.write(line)
+
+        if time.monotonic() >= self._report_at:
+            self.report_counters()
+
+    def report_counters(self):
+        """Send the current counters of this worker to the collector."""
+        self._report_at = time.monotonic() + self.counters_interval
+        counters = {"sink.sent": self.sent, "sink.fallbacks": self.fallbacks, "sink.dropped": self.dropped}
+        for prefix, source in self.counter_sources.items():
+            for name, value in source().items():
+                counters["{:s}.{:s}".format(prefix, name)] = value
+        return self._send(MESSAGE_COUNTERS + orjson.dumps({"pid": os.getpid(), "counters": counters}))
+
+    def close(self):
+        self.report_counters()
+        with self._lock:
+            self._disconnect()
+        if hasattr(self.fallback, "flush"):
+            self.fallback.flush()
+
+    def _send(self, payload):
+        with self._lock:
+            if self._pid != os.getpid():
+                # a forked worker opens its own socket
+                self._socket = None
+                self._pid = os.getpid()
+            try:
+                if self._socket is None:
+                    if time.monotonic() < self._retry_at:
+                        return False
+                    self._connect()
+                if self.socket_type == socket.SOCK_STREAM:
+                    frame = FRAME_HEADER.pack(len(payload)) + payload
+                    if self._socket.send(frame) < len(frame):
+                        # the collector would misread the rest of the stream, start a new one
+                        raise ConnectionError("partial frame")
+                else:
+                    self._socket.send(payload)
+                return True
+            except BlockingIOError:
+                if self.socket_type == socket.SOCK_DGRAM:
+                    self._disconnect()
+                    self._retry_at = time.monotonic() + self.retry_interval
+                # a full stream buffer sent nothing, the connection stays usable
+                return False
+            except OSError:
+                self._disconnect()
+                self._retry_at = time.monotonic() + self.retry_interval
+                return False
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, self.socket_type)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        # a full collector queue must not block the request
+        sock.setblocking(False)
+        self._socket = sock
+
+    def _disconnect(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+
+class Collector:
+    """Receive records from ``CollectorSink`` workers and write them to ``output``.
+
+    ``output`` is any sink, by default a ``BufferedSink`` on stdout which
+    batches the records into large writes. Counter snapshots are kept per
+    worker and summed by ``counters``; with ``stats_interval`` they are also
+    written as a ``log_type=collector_stats`` line every that many seconds.
+    """
+
+    def __init__(self, path=DEFAULT_COLLECTOR_SOCKET, output=None, kind=KIND_DGRAM, stats_interval=None) -> None:
+        self.path = path
+        self.kind = kind
+        self.socket_type = socket_type(kind)
+        self.output = output if output is not None else BufferedSink()
+        self.stats_interval = stats_interval
+        self.records = 0
+        self.worker_counters = {}
+
+        self._server = None
+        self._selector = None
+        self._buffers = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def counters(self):
+        """Return the counters of every worker summed by name."""
+        merged = {"collector.records": self.records, "collector.workers": len(self.worker_counters)}
+        for counters in list(self.worker_counters.values()):
+            for name, value in counters.items():
+                merged[name] = merged.get(name, 0) + value
+        return merged
+
+    def bind(self):
+        remove_stale_socket(self.path, self.socket_type)
+        self._server = socket.socket(socket.AF_UNIX, self.socket_type)
+        self._server.bind(self.path)
+        if self.socket_type == socket.SOCK_STREAM:
+            self._server.listen(128)
+        self._server.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._server, selectors.EVENT_READ)
+        return self
+
+    def start(self):
+        """Bind and serve from a background thread."""
+        self.bind()
+        self._thread = threading.Thread(target=self.serve_forever, name="justice-common-log-collector", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self, poll_interval=0.2):
+        if self._server is None:
+            self.bind()
+        stats_at = time.monotonic() + self.stats_interval if self.stats_interval else None
+        while not self._stopped.is_set():
+            for key, _ in self._selector.select(poll_interval):
+                if key.fileobj is self._server:
+                    self._read_server()
+                else:
+                    self._read_connection(key.fileobj)
+            if stats_at is not None and time.monotonic() >= stats_at:
+                stats_at = time.monotonic() + self.stats_interval
+                self.write_stats()
+        self._shutdown()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def handle_message(self, message):
+        kind, payload = message[:1], message[1:]
+        if kind == MESSAGE_RECORD:
+            self.records += 1
+            self.output.write(payload)
+        elif kind == MESSAGE_COUNTERS:
+            try:
+                snapshot = orjson.loads(payload)
+                self.worker_counters[snapshot["pid"]] = snapshot["counters"]
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                pass
+
+    def write_stats(self):
+        fields = " ".join("{:s}={}".format(name, value) for name, value in sorted(self.counters.items()))
+        self.output.write("time={:s} log_type=collector_stats {:s}".format(format_time(), fields))
+
+    def _read_server(self):
+        if self.socket_type == socket.SOCK_DGRAM:
+            while True:
+                try:
+                    message = self._server.recv(MAX_DATAGRAM_SIZE)
+                except (BlockingIOError, InterruptedError):
+                    return
+                self.handle_message(message)
+
+        connection, _ = self._server.accept()
+        connection.setblocking(False)
+        self._buffers[connection] = bytearray()
+        self._selector.register(connection, selectors.EVENT_READ)
+
+    def _read_connection(self, connection):
+        try:
+            data = connection.recv(65536)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self._selector.unregister(connection)
+            self._buffers.pop(connection, None)
+            connection.close()
+            return
+
+        buffer = self._buffers[connection]
+        buffer += data
+        while len(buffer) >= FRAME_HEADER.size:
+            size = FRAME_HEADER.unpack_from(buffer)[0]
+            end = FRAME_HEADER.size + size
+            if len(buffer) < end:
+                break
+            self.handle_message(bytes(buffer[FRAME_HEADER.size:end]))
+            del buffer[:end]
+
+    def _shutdown(self):
+        for connection in list(self._buffers):
+            connection.close()
+        self._buffers.clear()
+        self._selector.close()
+        self._server.close()
+        self._server = None
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+        if self.stats_interval:
+            self.write_stats()
+        if hasattr(self.output, "flush"):
+            self.output.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Collect access log records from local workers.")
+    parser.add_argument("--socket", default=DEFAULT_COLLECTOR_SOCKET, help="UNIX socket path to listen on")
+    parser.add_argument("--stream", action="store_true", help="listen on a stream instead of a datagram socket")
+    parser.add_argument("--output", help="file to append the records to (default: stdout)")
+    parser.add_argument("--buffer-size", type=int, default=65536, help="bytes buffered before a write")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="seconds a record may stay buffered")
+    parser.add_argument("--stats-interval", type=float, help="seconds between collector_stats lines")
+    args = parser.parse_args(argv)
+
+    output = BufferedSink(args.output, buffer_size=args.buffer_size, flush_interval=args.flush_interval)
+    collector = Collector(
+        args.socket,
+        output=output,
+        kind=KIND_STREAM if args.stream else KIND_DGRAM,
+        stats_interval=args.stats_interval
+    )
+
+    def handle_signal(signum, frame):
+        collector._stopped.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    collector.serve_forever()
+    output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,245 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Configuration module."""
+
+import logging
+import os
+import threading
+from collections import namedtuple
+
+from .constant import (
+    ACCESS_LOG_OUTPUT_FORMAT, ACCESS_LOG_OUTPUT_FORMATS, FULL_ACCESS_LOG_ENABLED, FULL_ACCESS_LOG_MAX_BODY_SIZE,
+    FULL_ACCESS_LOG_SUPPORTED_CONTENT_TYPES
+)
+from .encoders import parse_media_type
+from .matcher import ExclusionMatcher
+
+logger = logging.getLogger('justice-common-log')
+
+TRUE_VALUES = ("y", "yes", "t", "true", "on", "1")
+FALSE_VALUES = ("n", "no", "f", "false", "off", "0")
+
+
+def str_to_bool(value):
+    """Convert a truth string such as ``true``/``off``; replaces ``distutils.util.strtobool``."""
+    lowered = str(value).strip().lower()
+    if lowered in TRUE_VALUES:
+        return True
+    if lowered in FALSE_VALUES:
+        return False
+    raise ValueError("invalid truth value {!r}".format(value))
+
+
+def compile_patterns(patterns, full_match=True):
+    if patterns is None or isinstance(patterns, ExclusionMatcher):
+        return patterns
+    return ExclusionMatcher(patterns, full_match=full_match)
+
+
+class LogConfig(namedtuple("LogConfig", [
+    "full_access_log_enabled",
+    "max_body_size",
+    "supported_content_types",
+    "excluded_paths",
+    "excluded_agents",
+    "output_format",
+])):
+    """Immutable snapshot of the access log configuration.
+
+    ``excluded_paths`` must fully match the request path and
+    ``excluded_agents`` must match the start of the User-Agent; both are
+    compiled into an ``ExclusionMatcher``. ``output_format`` is ``"text"``
+    (``key=value`` lines) or ``"json"``.
+
+    Resolve it once with ``from_env`` (or build it explicitly) and swap the
+    whole snapshot to change it; nothing on the request path reads the
+    environment.
+    """
+
+    __slots__ = ()
+
+    def __new__(
+        cls,
+        full_access_log_enabled=False,
+        max_body_size=FULL_ACCESS_LOG_MAX_BODY_SIZE,
+        supported_content_types=FULL_ACCESS_LOG_SUPPORTED_CONTENT_TYPES.split(","),
+        excluded_paths=None,
+        excluded_agents=None,
+        output_format=ACCESS_LOG_OUTPUT_FORMAT
+    ):
+        output_format = str(output_format).strip().lower()
+        if output_format not in ACCESS_LOG_OUTPUT_FORMATS:
+            raise ValueError("invalid output format {!r}".format(output_format))
+        return super().__new__(
+            cls,
+            bool(full_access_log_enabled),
+            int(max_body_size),
+            frozenset(parse_media_type(content_type) for content_type in supported_content_types),
+            compile_patterns(excluded_paths),
+            compile_patterns(excluded_agents, full_match=False),
+            output_format,
+        )
+
+    @classmethod
+    def from_env(cls, environ=None, excluded_paths=None, excluded_agents=None):
+        """Resolve the ``*ACCESS_LOG_*`` variables from ``environ`` (default ``os.environ``)."""
+        environ = os.environ if environ is None else environ
+        return cls(
+            full_access_log_enabled=str_to_bool(environ.get("FULL_ACCESS_LOG_ENABLED", FULL_ACCESS_LOG_ENABLED)),
+            max_body_size=environ.get("FULL_ACCESS_LOG_MAX_BODY_SIZE", FULL_ACCESS_LOG_MAX_BODY_SIZE),
+            supported_content_types=str(
+                environ.get("FULL_ACCESS_LOG_SUPPORTED_CONTENT_TYPES", FULL_ACCESS_LOG_SUPPORTED_CONTENT_TYPES)
+            ).split(","),
+            excluded_paths=excluded_paths,
+            excluded_agents=excluded_agents,
+            output_format=environ.get("ACCESS_LOG_OUTPUT_FORMAT", ACCESS_LOG_OUTPUT_FORMAT),
+        )
+
+    @classmethod
+    def from_file(cls, path, excluded_paths=None, excluded_agents=None):
+        """Resolve the configuration from a ``KEY=VALUE`` file layered over ``os.environ``."""
+        environ = dict(os.environ)
+        environ.update(read_env_file(path))
+        return cls.from_env(environ, excluded_paths=excluded_paths, excluded_agents=excluded_agents)
+
+    def replace(self, **changes):
+        values = self._asdict()
+        values.update(changes)
+        return type(self)(**values)
+
+    def with_exclusions(self, excluded_paths=None, excluded_agents=None):
+        """Return this snapshot with the given exclusions; those left ``None`` are kept."""
+        changes = {}
+        if excluded_paths is not None:
+            changes["excluded_paths"] = excluded_paths
+        if excluded_agents is not None:
+            changes["excluded_agents"] = excluded_agents
+        return self.replace(**changes) if changes else self
+
+
+def read_env_file(path):
+    """Parse a dotenv style file: ``KEY=VALUE`` lines, ``#`` comments, optional quotes."""
+    values = {}
+    with open(path) as env_file:
+        for line in env_file:
+            line = line.strip()
+            if not line or line.startswith("#") or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            value = value.strip()
+            if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+                value = value[1:-1]
+            values[key.strip()] = value
+    return values
+
+
+_default_config = None
+
+
+def default_config():
+    """Return the process wide configuration resolved from the environment on first use."""
+    global _default_config
+    if _default_config is None:
+        _default_config = LogConfig.from_env()
+    return _default_config
+
+
+class ConfigHolder:
+    """Mutable reference to the current ``LogConfig``, shared with middlewares.
+
+    Readers take ``holder.config`` once per request; writers replace it in a
+    single assignment, so a request never sees a half-updated configuration.
+    """
+
+    __slots__ = ("config",)
+
+    def __init__(self, config) -> None:
+        self.config = config
+
+
+class ConfigReloader:
+    """Opt-in reload of a ``ConfigHolder`` (or ``Log``) configuration.
+
+    The snapshot is rebuilt from the environment, layered with ``path`` when
+    given, whenever ``signum`` is received or, with ``interval``, when the
+    modification time of ``path`` changes. Exclusions are carried over from
+    the current snapshot. A failed reload is logged and keeps the current one.
+    """
+
+    def __init__(self, target, path=None, signum=None, interval=None) -> None:
+        if interval is not None and path is None:
+            raise ValueError("polling for changes requires a path")
+
+        self.target = target
+        self.path = path
+        self.signum = signum
+        self.interval = interval
+        self.reloads = 0
+        self._mtime = None
+        self._stopped = threading.Event()
+        self._thread = None
+        self._previous_handler = None
+
+    def start(self):
+        if self.signum is not None:
+            import signal
+
+            self._previous_handler = signal.signal(self.signum, self._handle_signal)
+        if self.interval is not None:
+            self._mtime = self._stat()
+            self._thread = threading.Thread(target=self._poll, name="justice-common-log-config", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.signum is not None and self._previous_handler is not None:
+            import signal
+
+            signal.signal(self.signum, self._previous_handler)
+
+    def reload(self):
+        current = self.target.config
+        try:
+            if self.path is not None:
+                config = LogConfig.from_file(self.path)
+            else:
+                config = LogConfig.from_env()
+        except (OSError, ValueError) as e:
+            logger.warning("justice-common-log: keeping current configuration, reload failed: %s", e)
+            return current
+
+        config = config.replace(excluded_paths=current.excluded_paths, excluded_agents=current.excluded_agents)
+        self.target.config = config
+        self.reloads += 1
+        return config
+
+    def _handle_signal(self, signum, frame):
+        self.reload()
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _poll(self):
+        while not self._stopped.wait(self.interval):
+            mtime = self._stat()
+            if mtime is not None and mtime != self._mtime:
+                self._mtime = mtime
+                self.reload()
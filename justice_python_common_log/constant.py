@@ -14,7 +14,21 @@
 
 DEFAULT_LOG_FORMAT = 'time={:s} log_type=access method={:s} path={:s} status={:d} duration={:d}'
 FULL_LOG_FORMAT = 'time={:s} log_type=access method={:s} path="{:s}" status={:d} duration={:d} length={:d} source_ip={:s} user_agent="{:s}" referer="{:s}" trace_id={:s} namespace={:s} user_id={:s} client_id={:s} request_content_type="{:s}" request_body=AB[{:s}]AB response_content_type="{:s}" response_body=AB[{:s}]AB operation="" flight_id="{:s}" game_version="{:s}" sdk_version="{:s}" oss_version="{:s}"'
+SUMMARY_LOG_FORMAT = 'time={:s} log_type=access_summary method={:s} path={:s} status={:d} count={:d} p50={:d} p90={:d} p99={:d} max={:d} interval={:d}'
+SHEDDING_LOG_FORMAT = 'time={:s} log_type=access_shedding mode={:s} previous={:s} level={:d} pressure={:.2f}'
+
+# load shedding levels, each dropping more of the access log work
+SHEDDING_LEVEL_FULL = 0
+SHEDDING_LEVEL_NO_BODIES = 1
+SHEDDING_LEVEL_NO_TOKEN = 2
+SHEDDING_LEVEL_DEFAULT_FORMAT = 3
+SHEDDING_LEVEL_SAMPLED = 4
+SHEDDING_MODES = ("full", "no_bodies", "no_token", "default_format", "sampled")
+
+ACCESS_LOG_OUTPUT_FORMAT= "text"
+ACCESS_LOG_OUTPUT_FORMATS= ("text", "json")
 
 FULL_ACCESS_LOG_ENABLED= "False"
 FULL_ACCESS_LOG_SUPPORTED_CONTENT_TYPES= "application/json,application/xml,application/x-www-form-urlencoded,text/plain,text/html"
 FULL_ACCESS_LOG_MAX_BODY_SIZE= 10240
+FULL_ACCESS_LOG_TRUNCATED_MARKER= "...(truncated)"
@@ -0,0 +1,174 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Request context module."""
+
+import logging
+import os
+import threading
+from contextvars import ContextVar
+
+from .utils import decode_token
+
+TRACE_ID_HEADER = "X-Ab-TraceID"
+
+# random bytes read from the OS at once, 16 per trace id
+TRACE_ID_BATCH_SIZE = 256
+
+# request context fields added to log records by `RequestContextFilter`
+CONTEXT_FIELDS = (
+    "trace_id",
+    "user_id",
+    "client_id",
+    "namespace",
+    "flight_id",
+    "game_version",
+    "sdk_version",
+    "oss_version",
+)
+
+NO_CLAIMS = {}
+
+
+class TraceIdGenerator:
+    """Generate random 32 hex character trace IDs, like ``uuid.uuid4().hex``.
+
+    Random bytes are read from ``os.urandom`` ``batch_size`` IDs at a time
+    instead of once per ID. The buffer is discarded in forked children so
+    worker processes never hand out the same IDs.
+    """
+
+    def __init__(self, batch_size=TRACE_ID_BATCH_SIZE) -> None:
+        self.batch_size = batch_size
+        self._buffer = ""
+        self._offset = 0
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset)
+
+    def __call__(self) -> str:
+        with self._lock:
+            offset = self._offset
+            if offset >= len(self._buffer):
+                self._buffer = os.urandom(16 * self.batch_size).hex()
+                offset = 0
+            self._offset = offset + 32
+            return self._buffer[offset:offset + 32]
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._buffer = ""
+        self._offset = 0
+
+
+generate_trace_id = TraceIdGenerator()
+
+
+class RequestContext:
+    """Fields of the current request shared by the access log and application logs.
+
+    ``headers`` is a mapping of the request headers, or a function returning
+    one; header names are looked up lowercase. Every field is read, and the
+    bearer token decoded, only when first used, then kept for the rest of
+    the request. A missing ``X-Ab-TraceID`` is generated and ``trace_id_generated``
+    is set.
+    """
+
+    __slots__ = ("_headers", "_trace_id", "_claims", "trace_id_generated")
+
+    def __init__(self, headers) -> None:
+        self._headers = headers
+        self._trace_id = None
+        self._claims = None
+        self.trace_id_generated = False
+
+    @property
+    def headers(self):
+        if callable(self._headers):
+            self._headers = self._headers()
+        return self._headers
+
+    @property
+    def trace_id(self) -> str:
+        trace_id = self._trace_id
+        if trace_id is None:
+            trace_id = self.headers.get("x-ab-traceid")
+            if not trace_id:
+                trace_id = generate_trace_id()
+                self.trace_id_generated = True
+            self._trace_id = trace_id
+        return trace_id
+
+    @property
+    def claims(self) -> dict:
+        """Return the unverified bearer token claims, empty without a token."""
+        claims = self._claims
+        if claims is None:
+            authorization = self.headers.get("authorization")
+            claims = self._claims = decode_token(authorization) if authorization else NO_CLAIMS
+        return claims
+
+    @property
+    def user_id(self) -> str:
+        return self.claims.get("user_id", "")
+
+    @property
+    def client_id(self) -> str:
+        return self.claims.get("client_id", "")
+
+    @property
+    def namespace(self) -> str:
+        return self.claims.get("namespace", "")
+
+    @property
+    def flight_id(self) -> str:
+        return self.headers.get("x-flight-id", "")
+
+    @property
+    def game_version(self) -> str:
+        return self.headers.get("game-client-version", "")
+
+    @property
+    def sdk_version(self) -> str:
+        return self.headers.get("accelbyte-sdk-version", "")
+
+    @property
+    def oss_version(self) -> str:
+        return self.headers.get("accelbyte-oss-version", "")
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in CONTEXT_FIELDS}
+
+
+request_context = ContextVar("justice_common_log_request_context", default=None)
+
+
+def get_request_context():
+    """Return the ``RequestContext`` of the request being handled, or None."""
+    return request_context.get()
+
+
+class RequestContextFilter(logging.Filter):
+    """Add the request context fields to the records of application loggers.
+
+    Attach it to a handler or logger to use ``%(trace_id)s``, ``%(user_id)s``
+    and the other ``CONTEXT_FIELDS`` in log formats; they are empty outside
+    of a request.
+    """
+
+    def filter(self, record) -> bool:
+        context = request_context.get()
+        for field in CONTEXT_FIELDS:
+            setattr(record, field, getattr(context, field) if context is not None else "")
+        return True
@@ -0,0 +1,329 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Access log engine module.
+
+The framework independent part of the access log: exclusion, aggregation,
+sampling, record building, formatting and emission. The WSGI and ASGI
+adapters only collect an ``Exchange`` per request and hand it over.
+"""
+
+import logging
+from time import perf_counter_ns
+from typing import TYPE_CHECKING
+
+from .config import ConfigHolder, LogConfig
+from .constant import (
+    ACCESS_LOG_OUTPUT_FORMATS, SHEDDING_LEVEL_DEFAULT_FORMAT, SHEDDING_LEVEL_FULL, SHEDDING_LEVEL_NO_BODIES,
+    SHEDDING_LEVEL_NO_TOKEN, SHEDDING_LEVEL_SAMPLED
+)
+from .formatter import build_formatters, format_time
+from .metrics import STAGE_CAPTURE, STAGE_EMIT, STAGE_EXCLUSION, STAGE_FORMAT, STAGE_TOKEN, PipelineMetrics
+from .utils import duration_ms, get_captured_body, logger_sink
+
+if TYPE_CHECKING:  # optional features are only imported by the applications using them
+    from .aggregate import LatencyAggregator
+    from .capture import CapturePolicy
+    from .context import RequestContext
+    from .routes import RouteNormalizer
+    from .shedding import LoadShedder
+
+logger = logging.getLogger('justice-common-log')
+
+NO_CLAIMS = {}
+
+
+class Exchange:
+    """What an adapter knows about one request and its response.
+
+    ``route`` is the route template matched by the framework, if any.
+    ``request_body`` and ``response_body`` are ``BodyCapture`` buffers in full
+    access log mode only. ``first_byte`` and ``last_byte`` are the
+    ``perf_counter_ns`` times the response body started and ended, when the
+    body was streamed.
+    """
+
+    __slots__ = (
+        "context",
+        "method",
+        "path",
+        "route",
+        "status",
+        "start",
+        "first_byte",
+        "last_byte",
+        "remote_addr",
+        "request_body",
+        "response_body",
+        "response_content_type",
+        "body",
+    )
+
+    def __init__(self, context: 'RequestContext', method, path, remote_addr="") -> None:
+        self.context = context
+        self.method = method
+        self.path = path
+        self.route = None
+        self.status = 500
+        self.start = 0
+        self.first_byte = None
+        self.last_byte = None
+        self.remote_addr = remote_addr
+        self.request_body = None
+        self.response_body = None
+        self.response_content_type = ""
+        # the whole response body, when the framework already holds it in memory
+        self.body = None
+
+
+class AccessLogEngine:
+    """Build and write the access log line of each ``Exchange``.
+
+    Takes the options of ``Log``. ``config`` is a ``LogConfig`` or a
+    ``ConfigHolder``; by default it is resolved from the environment once.
+    ``excluded_paths`` and ``excluded_agents``, when given, replace those of
+    ``config``.
+    Adapters read ``holder.config`` once per request and pass that snapshot
+    along with the exchange.
+    """
+
+    def __init__(
+        self,
+        excluded_paths=None,
+        excluded_agents=None,
+        sink=None,
+        fields=None,
+        config=None,
+        sampler=None,
+        capture_policy: 'CapturePolicy' = None,
+        metrics: PipelineMetrics = None,
+        aggregator: 'LatencyAggregator' = None,
+        normalizer: 'RouteNormalizer' = None,
+        precise_duration=False,
+        echo_trace_id=False,
+        shedder: 'LoadShedder' = None,
+        stream_timing=False
+    ) -> None:
+        if config is None:
+            config = LogConfig.from_env(excluded_paths=excluded_paths, excluded_agents=excluded_agents)
+        elif isinstance(config, ConfigHolder):
+            config.config = config.config.with_exclusions(excluded_paths, excluded_agents)
+        else:
+            config = config.with_exclusions(excluded_paths, excluded_agents)
+        self.holder = config if isinstance(config, ConfigHolder) else ConfigHolder(config)
+        self.sink = sink
+        self.sampler = sampler
+        self.capture_policy = capture_policy
+        self.formatters = {
+            output_format: build_formatters(
+                fields,
+                sample_weight=sampler is not None or (
+                    shedder is not None and shedder.max_level >= SHEDDING_LEVEL_SAMPLED
+                ),
+                output_format=output_format,
+                precise_duration=precise_duration,
+                stream_timing=stream_timing
+            )
+            for output_format in ACCESS_LOG_OUTPUT_FORMATS
+        }
+        self.precise_duration = precise_duration
+        self.echo_trace_id = echo_trace_id
+        self._write = sink.write if sink is not None else logger_sink(logger)
+        self.metrics = metrics
+        if metrics is not None:
+            metrics.track_sink(sink)
+        self.aggregator = aggregator
+        if aggregator is not None:
+            aggregator.bind(self._write, self.holder)
+        self.normalizer = normalizer
+        self.shedder = shedder
+        if shedder is not None:
+            shedder.bind(self._write, self.holder, sink)
+
+    @property
+    def config(self) -> LogConfig:
+        return self.holder.config
+
+    @config.setter
+    def config(self, config: LogConfig):
+        self.holder.config = config
+
+    def is_excluded(self, config: LogConfig, path, get_user_agent) -> bool:
+        """Return whether requests to ``path`` are left out; ``get_user_agent()`` is only called if needed."""
+        metrics = self.metrics
+        if metrics is None:
+            return self._is_excluded(config, path, get_user_agent)
+
+        started = perf_counter_ns()
+        excluded = self._is_excluded(config, path, get_user_agent)
+        metrics.observe(STAGE_EXCLUSION, perf_counter_ns() - started)
+        if excluded:
+            metrics.increment("excluded")
+        return excluded
+
+    def capture_limit(self, config: LogConfig):
+        """Return how many bytes of each body adapters capture for a request starting now.
+
+        ``None`` means no capture; ``0`` only counts the body, while shedding bodies.
+        """
+        if not config.full_access_log_enabled:
+            return None
+        if self.shedder is not None and self.shedder.level >= SHEDDING_LEVEL_NO_BODIES:
+            return 0
+        return config.max_body_size
+
+    def route(self, exchange: Exchange) -> str:
+        """Return the matched route template with a ``normalizer``, else the request path."""
+        if self.normalizer is None:
+            return exchange.path
+        if exchange.route is not None:
+            return exchange.route
+        return self.normalizer(exchange.path)
+
+    def log(self, config: LogConfig, exchange: Exchange, end):
+        """Write the access log line of ``exchange``, finished at ``end`` (``perf_counter_ns``)."""
+        shedder = self.shedder
+        if shedder is None:
+            self._log(config, exchange, end, SHEDDING_LEVEL_FULL)
+            return
+        started = perf_counter_ns()
+        self._log(config, exchange, end, shedder.level)
+        finished = perf_counter_ns()
+        shedder.observe(finished - started, (end - exchange.start) / 1e6, finished)
+
+    def _log(self, config: LogConfig, exchange: Exchange, end, level):
+        precise = self.precise_duration
+        duration = duration_ms(end - exchange.start, precise)
+        route = self.route(exchange)
+        status = exchange.status
+        metrics = self.metrics
+        weight = 1
+
+        if self.aggregator is not None:
+            self.aggregator.record(exchange.method, route, status, duration)
+            if not self.aggregator.logs_individually(route, exchange.path):
+                return
+
+        if self.sampler is not None:
+            weight = self.sampler.sample(route, status, duration)
+            if not weight:
+                if metrics is not None:
+                    metrics.increment("sampled_out")
+                return
+
+        if level >= SHEDDING_LEVEL_SAMPLED:
+            if not self.shedder.keep(status):
+                if metrics is not None:
+                    metrics.increment("sampled_out")
+                return
+            if status < 400:
+                weight /= self.shedder.sample_rate
+
+        default_formatter, full_formatter = self.formatters[config.output_format]
+
+        if not config.full_access_log_enabled or level >= SHEDDING_LEVEL_DEFAULT_FORMAT:
+            if metrics is not None:
+                started = perf_counter_ns()
+            line = default_formatter.format(
+                format_time(), exchange.method, route, status, duration, sample_weight=weight
+            )
+            if metrics is not None:
+                self.emit(line, started)
+            else:
+                self._write(line)
+            return
+
+        context = exchange.context
+        headers = context.headers
+        request_size = exchange.request_body.size if exchange.request_body is not None else 0
+        response_size = exchange.response_body.size if exchange.response_body is not None else 0
+        request_content_type = request_body_text = ""
+        response_content_type = response_body_text = ""
+
+        if level >= SHEDDING_LEVEL_NO_TOKEN:
+            claims = NO_CLAIMS
+        elif metrics is not None and headers.get("authorization"):
+            started = perf_counter_ns()
+            claims = context.claims
+            metrics.observe(STAGE_TOKEN, perf_counter_ns() - started)
+        else:
+            claims = context.claims
+
+        if request_size:
+            request_content_type = headers.get("content-type") or ""
+        if response_size:
+            response_content_type = exchange.response_content_type
+
+        if metrics is not None:
+            started = perf_counter_ns()
+        capture_policy = self.capture_policy
+        if level < SHEDDING_LEVEL_NO_BODIES and (
+            capture_policy is None or capture_policy.should_serialize(status, duration)
+        ):
+            if request_size:
+                request_body_text = get_captured_body(exchange.request_body, request_content_type, config)
+            if response_size:
+                response_body_text = get_captured_body(exchange.response_body, response_content_type, config)
+        if metrics is not None:
+            metrics.observe(STAGE_CAPTURE, perf_counter_ns() - started)
+            started = perf_counter_ns()
+
+        line = full_formatter.format(
+            time=format_time(),
+            method=exchange.method,
+            path=route,
+            status=status,
+            duration=duration,
+            ttfb=duration_ms((exchange.first_byte or end) - exchange.start, precise),
+            ttlb=duration_ms((exchange.last_byte or end) - exchange.start, precise),
+            length=response_size,
+            source_ip=headers.get("x-forwarded-for") or exchange.remote_addr or "",
+            user_agent=headers.get("user-agent") or "",
+            referer=headers.get("referer") or "",
+            trace_id=context.trace_id,
+            namespace=claims.get("namespace", ""),
+            user_id=claims.get("user_id", ""),
+            client_id=claims.get("client_id", ""),
+            request_content_type=request_content_type,
+            request_body=request_body_text,
+            response_content_type=response_content_type,
+            response_body=response_body_text,
+            flight_id=context.flight_id,
+            game_version=context.game_version,
+            sdk_version=context.sdk_version,
+            oss_version=context.oss_version,
+            sample_weight=weight
+        )
+
+        if metrics is not None:
+            self.emit(line, started)
+        else:
+            self._write(line)
+
+    def emit(self, line, format_started):
+        """Write ``line``, recording the format stage from ``format_started`` and the emit stage."""
+        metrics = self.metrics
+        formatted = perf_counter_ns()
+        metrics.observe(STAGE_FORMAT, formatted - format_started)
+        self._write(line)
+        metrics.observe(STAGE_EMIT, perf_counter_ns() - formatted)
+        metrics.increment("logged")
+
+    @staticmethod
+    def _is_excluded(config: LogConfig, path, get_user_agent) -> bool:
+        if config.excluded_agents:
+            user_agent = get_user_agent()
+            if user_agent is not None and config.excluded_agents(user_agent):
+                return True
+        return bool(config.excluded_paths) and config.excluded_paths(path)
@@ -0,0 +1,142 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Body encoders module."""
+
+import re
+from functools import lru_cache
+
+from .constant import FULL_ACCESS_LOG_TRUNCATED_MARKER
+
+XML_WHITESPACE_PATTERN = re.compile(rb'>\s+<')
+
+# control characters and the `]AB` closing delimiter, which would split or end a text body
+BODY_ESCAPE_PATTERN = re.compile(r'[\x00-\x1f\x7f-\x9f]|\](?=AB)')
+BODY_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+# structured syntax suffixes (RFC 6839) handled like their base media type
+SUFFIX_MEDIA_TYPES = {"+json": "application/json", "+xml": "application/xml"}
+
+ENCODERS = {}
+
+
+class JsonText(str):
+    """Minified JSON document; JSON output embeds it as is instead of as a string."""
+
+    __slots__ = ()
+
+
+def escape_body(text):
+    """Return ``text`` safe to write between ``AB[`` and ``]AB`` on a single line.
+
+    Line breaks and tabs become ``\\n``, ``\\r`` and ``\\t``, other control
+    characters and the ``]`` of ``]AB`` become ``\\xNN`` escapes.
+    """
+    if text.isprintable() and "]AB" not in text:
+        return text
+    return BODY_ESCAPE_PATTERN.sub(_escape_character, text)
+
+
+def _escape_character(match):
+    character = match.group()
+    return BODY_ESCAPES.get(character) or "\\x{:02x}".format(ord(character))
+
+
+def register_encoder(media_type, encoder):
+    """Render bodies of ``media_type`` with ``encoder(view, truncated) -> str``.
+
+    ``view`` is a ``memoryview`` of at most ``FULL_ACCESS_LOG_MAX_BODY_SIZE``
+    bytes; ``truncated`` tells that it is only the beginning of the body.
+    """
+    ENCODERS[media_type] = encoder
+    find_encoder.cache_clear()
+
+
+@lru_cache(maxsize=256)
+def parse_media_type(content_type):
+    """Return the lowercase ``type/subtype`` of a Content-Type header value."""
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def base_media_type(media_type):
+    """Return the media type a ``+json``/``+xml`` type is handled as, or itself."""
+    for suffix, base in SUFFIX_MEDIA_TYPES.items():
+        if media_type.endswith(suffix):
+            return base
+    return media_type
+
+
+@lru_cache(maxsize=256)
+def find_encoder(media_type):
+    encoder = ENCODERS.get(media_type) or ENCODERS.get(base_media_type(media_type))
+    if encoder is None and media_type.startswith("text/"):
+        encoder = encode_text
+    return encoder
+
+
+def is_supported_media_type(media_type, supported_content_types):
+    return media_type in supported_content_types or base_media_type(media_type) in supported_content_types
+
+
+def encode_body(body, content_type, max_body_size, supported_content_types, truncated=False):
+    """Render a request or response body for the access log.
+
+    Bodies of unsupported content types render as ``""``. Bodies larger than
+    ``max_body_size`` are cut to that size, without copying the rest, and end
+    with ``FULL_ACCESS_LOG_TRUNCATED_MARKER``.
+    """
+    if not body or not content_type:
+        return ""
+
+    media_type = parse_media_type(content_type)
+    if not is_supported_media_type(media_type, supported_content_types):
+        return ""
+
+    encoder = find_encoder(media_type) or encode_text
+    view = memoryview(body)
+    if len(view) > max_body_size:
+        view = view[:max_body_size]
+        truncated = True
+
+    if truncated:
+        return encoder(view, True) + FULL_ACCESS_LOG_TRUNCATED_MARKER
+    return encoder(view, False)
+
+
+def encode_text(view, truncated):
+    return str(view, "utf-8", "replace")
+
+
+def encode_json(view, truncated):
+    if truncated:
+        # a prefix of a JSON document cannot be parsed
+        return encode_text(view, truncated)
+    import orjson
+
+    try:
+        return JsonText(orjson.dumps(orjson.loads(view)).decode("utf-8"))
+    except orjson.JSONDecodeError:
+        return encode_text(view, truncated)
+
+
+def encode_xml(view, truncated):
+    return str(XML_WHITESPACE_PATTERN.sub(b"><", view), "utf-8", "replace").strip()
+
+
+register_encoder("application/json", encode_json)
+register_encoder("application/xml", encode_xml)
+register_encoder("text/xml", encode_xml)
+register_encoder("application/x-www-form-urlencoded", encode_text)
+register_encoder("text/plain", encode_text)
+register_encoder("text/html", encode_text)
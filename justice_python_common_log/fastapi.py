@@ -14,85 +14,83 @@
 
 """FastAPI module."""
 
-import logging
-import os
-import re
-import uuid
-from datetime import datetime, timezone
-from distutils.util import strtobool
+from typing import TYPE_CHECKING
 
-from fastapi import FastAPI, Request
-from starlette.concurrency import iterate_in_threadpool
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import Message
+from .asgi import LogMiddleware, add_trace_id, get_header, get_headers, with_trace_id  # noqa: F401
+from .config import ConfigHolder, LogConfig
+from .metrics import PipelineMetrics
 
-from .constant import DEFAULT_LOG_FORMAT, FULL_LOG_FORMAT, FULL_ACCESS_LOG_ENABLED
-from .utils import get_request_body, decode_token, get_response_body
+if TYPE_CHECKING:  # optional features are only imported by the applications using them
+    from fastapi import FastAPI
 
-# configure logger format
-logging.basicConfig(level=logging.INFO, format='%(message)s')
-logger = logging.getLogger('justice-common-log')
+    from .aggregate import LatencyAggregator
+    from .capture import CapturePolicy
+    from .routes import RouteNormalizer
+    from .shedding import LoadShedder
 
 
-class LogMiddleware(BaseHTTPMiddleware):
+class Log:
+    """Log FastAPI extensions class."""
+
     def __init__(
         self,
-        app: FastAPI,
+        app: 'FastAPI' = None,
         excluded_paths=None,
-        excluded_agents=None
+        excluded_agents=None,
+        sink=None,
+        fields=None,
+        config: LogConfig = None,
+        sampler=None,
+        capture_policy: 'CapturePolicy' = None,
+        metrics: PipelineMetrics = None,
+        aggregator: 'LatencyAggregator' = None,
+        normalizer: 'RouteNormalizer' = None,
+        precise_duration=False,
+        echo_trace_id=False,
+        shedder: 'LoadShedder' = None,
+        stream_timing=False
     ) -> None:
-        super().__init__(app)
-        self.excluded_paths = excluded_paths
-        self.excluded_agents = excluded_agents
-
-        if self.excluded_paths is not None:
-            self.excluded_paths = [re.compile(pattern) for pattern in self.excluded_paths]
-
-        if self.excluded_agents is not None:
-            self.excluded_agents = [re.compile(pattern) for pattern in excluded_agents]
-
-    async def dispatch(self, request: Request, call_next):
-        start_time = datetime.now()
-        response = await call_next(request)
-        process_time = (datetime.now() - start_time).total_seconds() * 1000
-
-        if self.excluded_agents:
-            if request.headers.get("User-Agent") is not None:
-                if any(pattern.match(request.headers.get("User-Agent")) for pattern in self.excluded_agents):
-                    return response
-
-        if self.excluded_paths:
-            if any(pattern.fullmatch(request.url.path) for pattern in self.excluded_paths):
-                return response
-
-        data = {
-            "time": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
-            "method": request.method,
-            "path": request.url.path,
-            "status": response.status_code,
-            "duration": int(process_time)
-        }
-
-        logger.info(DEFAULT_LOG_FORMAT.format(
-            data.get("time"),
-            data.get("method"),
-            data.get("path"),
-            data.get("status"),
-            data.get("duration")
-        ))
-
-        return response
-
-class Log:
-    """Log FastAPI extensions class."""
-
-    def __init__(self, app: FastAPI = None, excluded_paths=None, excluded_agents=None) -> None:
         self.app = app
-        self.excluded_paths = excluded_paths
-        self.excluded_agents = excluded_agents
+        self.holder = ConfigHolder(
+            config.with_exclusions(excluded_paths, excluded_agents) if config is not None
+            else LogConfig.from_env(excluded_paths=excluded_paths, excluded_agents=excluded_agents)
+        )
+        self.sink = sink
+        self.fields = fields
+        self.sampler = sampler
+        self.capture_policy = capture_policy
+        self.metrics = metrics
+        self.aggregator = aggregator
+        self.normalizer = normalizer
+        self.precise_duration = precise_duration
+        self.echo_trace_id = echo_trace_id
+        self.shedder = shedder
+        self.stream_timing = stream_timing
 
         if app is not None:
             self.init_app(app)
 
-    def init_app(self, app: FastAPI):
-        app.add_middleware(LogMiddleware, excluded_paths=self.excluded_paths, excluded_agents=self.excluded_agents)
+    @property
+    def config(self) -> LogConfig:
+        return self.holder.config
+
+    @config.setter
+    def config(self, config: LogConfig):
+        self.holder.config = config
+
+    def init_app(self, app: 'FastAPI'):
+        app.add_middleware(
+            LogMiddleware,
+            sink=self.sink,
+            fields=self.fields,
+            config=self.holder,
+            sampler=self.sampler,
+            capture_policy=self.capture_policy,
+            metrics=self.metrics,
+            aggregator=self.aggregator,
+            normalizer=self.normalizer,
+            precise_duration=self.precise_duration,
+            echo_trace_id=self.echo_trace_id,
+            shedder=self.shedder,
+            stream_timing=self.stream_timing
+        )
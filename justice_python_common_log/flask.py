@@ -14,129 +14,106 @@
 
 """Flask module."""
 
-import os
-import re
-import uuid
 import logging
-from distutils.util import strtobool
-from datetime import datetime, timezone
-from flask import g, Flask, request
+from typing import TYPE_CHECKING
+from flask import Flask, request
 from flask.wrappers import Response
-from .constant import DEFAULT_LOG_FORMAT, FULL_LOG_FORMAT, FULL_ACCESS_LOG_ENABLED
-from .utils import get_request_body, get_response_body, decode_token
+from .config import LogConfig
+from .core import AccessLogEngine
+from .metrics import PipelineMetrics
+from .wsgi import EXCHANGE_ENVIRON_KEY, LogMiddleware
 
-# configure logger format
-logging.basicConfig(level=logging.INFO, format='%(message)s')
-logger = logging.getLogger('justice-common-log')
+if TYPE_CHECKING:  # optional features are only imported by the applications using them
+    from .aggregate import LatencyAggregator
+    from .capture import CapturePolicy
+    from .routes import RouteNormalizer
+    from .shedding import LoadShedder
 
 
 class Log:
     """Log Flask extensions class.
+
+    Wraps ``app.wsgi_app`` in the WSGI ``LogMiddleware`` and hands it the
+    matched URL rule and, unless streamed, the finished response body.
+
+    Each request runs with a ``RequestContext`` in ``request_context``; with
+    ``echo_trace_id`` a generated trace id is returned in ``X-Ab-TraceID``.
     """
 
-    def __init__(self, app: Flask = None, excluded_paths=None, excluded_agents=None) -> None:
-        self.app = app
+    def __init__(
+        self,
+        app: Flask = None,
+        excluded_paths=None,
+        excluded_agents=None,
+        sink=None,
+        fields=None,
+        config: LogConfig = None,
+        sampler=None,
+        capture_policy: 'CapturePolicy' = None,
+        metrics: PipelineMetrics = None,
+        aggregator: 'LatencyAggregator' = None,
+        normalizer: 'RouteNormalizer' = None,
+        precise_duration=False,
+        echo_trace_id=False,
+        shedder: 'LoadShedder' = None,
+        stream_timing=False
+    ) -> None:
         self.app = app
-        self.excluded_paths = excluded_paths
-        self.excluded_agents = excluded_agents
+        self.engine = AccessLogEngine(
+            excluded_paths=excluded_paths,
+            excluded_agents=excluded_agents,
+            sink=sink,
+            fields=fields,
+            config=config,
+            sampler=sampler,
+            capture_policy=capture_policy,
+            metrics=metrics,
+            aggregator=aggregator,
+            normalizer=normalizer,
+            precise_duration=precise_duration,
+            echo_trace_id=echo_trace_id,
+            shedder=shedder,
+            stream_timing=stream_timing
+        )
+        self.holder = self.engine.holder
         werkzeug_logger = logging.getLogger('werkzeug')
         werkzeug_logger.disabled = True
 
-        if self.excluded_paths is not None:
-            self.excluded_paths = [re.compile(pattern) for pattern in self.excluded_paths]
-
-        if self.excluded_agents is not None:
-            self.excluded_agents = [re.compile(pattern) for pattern in excluded_agents]
-
         if app is not None:
             self.init_app(app)
 
+    @property
+    def config(self) -> LogConfig:
+        return self.holder.config
+
+    @config.setter
+    def config(self, config: LogConfig):
+        self.holder.config = config
+
     def init_app(self, app: Flask):
-        app.before_request(self.start_request_time)
+        app.wsgi_app = LogMiddleware(app.wsgi_app, self.engine)
         app.after_request(self.filter)
 
-    def start_request_time(self):
-        g.start = datetime.now()
-
     def filter(self, response: Response) -> Response:
-
-        response.direct_passthrough = False
-
-        if self.excluded_agents:
-            if request.headers.get("User-Agent") is not None:
-                if any(pattern.match(request.headers.get("User-Agent")) for pattern in self.excluded_agents):
-                    return response
-
-        if self.excluded_paths:
-            if any(pattern.fullmatch(request.path) for pattern in self.excluded_paths):
-                return response
-
-        data = {
-            "time": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
-            "method": request.method,
-            "path": request.path,
-            "status": response.status_code,
-            "duration": int((datetime.now() - g.start).total_seconds() * 1000)
-        }
-
-        if strtobool(os.getenv("FULL_ACCESS_LOG_ENABLED", FULL_ACCESS_LOG_ENABLED)):
-
-            data["user_agent"] = request.headers.get("User-Agent", "")
-            data["referer"] = request.headers.get("Referer", "")
-            data["user_ip"] = request.headers.get("X-Forwarded-For", request.remote_addr)
-            data["trace_id"] = request.headers.get("X-Ab-TraceID", uuid.uuid4().hex)
-            data["flight_id"] = request.headers.get("x-flight-id", "")
-            data["game_version"] = request.headers.get("Game-Client-Version", "")
-            data["sdk_version"] = request.headers.get("AccelByte-SDK-Version", "")
-            data["oss_version"] = request.headers.get("AccelByte-OSS-Version", "")
-
-            if request.headers.get("Authorization"):
-                data_token = decode_token(request.headers.get("Authorization"))
-                data["user_id"] = data_token.get("user_id", "")
-                data["client_id"] = data_token.get("client_id", "")
-                data["namespace"] = data_token.get("namespace", "")
-
-            if request.data:
-                data["request_content_type"] = request.content_type
-                data["request_body"] = get_request_body(request.data, request.content_type)
-
-            if response.data:
-                data["length"] = len(response.data)
-                data["response_content_type"] = response.content_type
-                data["response_body"] = get_response_body(response.data, response.content_type)
-
-            logger.info(FULL_LOG_FORMAT.format(
-                data.get("time"),
-                data.get("method"),
-                data.get("path"),
-                data.get("status"),
-                data.get("duration"),
-                data.get("length", 0),
-                data.get("user_ip"),
-                data.get("user_agent"),
-                data.get("referer"),
-                data.get("trace_id"),
-                data.get("namespace", ""),
-                data.get("user_id", ""),
-                data.get("client_id", ""),
-                data.get("request_content_type", ""),
-                data.get("request_body", ""),
-                data.get("response_content_type", ""),
-                data.get("response_body", ""),
-                data.get("flight_id", ""),
-                data.get("game_version", ""),
-                data.get("sdk_version", ""),
-                data.get("oss_version", "")
-            ))
-
+        exchange = request.environ.get(EXCHANGE_ENVIRON_KEY)
+        if exchange is None:
+            # excluded, or the app is not wrapped
+            return response
+
+        rule = request.url_rule
+        if rule is not None:
+            exchange.route = rule.rule
+
+        if response.is_streamed:
+            # logged once the server has drained and closed the stream
+            return response
+
+        if exchange.response_body is not None:
+            capture = exchange.request_body
+            if capture.limit and capture.size <= capture.limit:
+                # read what the view left unread through the input tee, only as far as it is logged
+                request.stream.read(capture.limit - capture.size + 1)
+            exchange.body = response.iter_encoded()
         else:
-
-            logger.info(DEFAULT_LOG_FORMAT.format(
-                data.get("time"),
-                data.get("method"),
-                data.get("path"),
-                data.get("status"),
-                data.get("duration")
-            ))
-
+            exchange.body = ()
         return response
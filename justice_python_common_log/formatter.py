@@ -0,0 +1,234 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Record formatter module."""
+
+import re
+import time
+from string import Formatter
+
+from .constant import DEFAULT_LOG_FORMAT, FULL_LOG_FORMAT
+from .encoders import JsonText, escape_body
+
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+# literal text preceding a placeholder ends with `name=`, `name="` or `name=AB[`
+FIELD_NAME_PATTERN = re.compile(r'(\w+)=(?:"|AB\[)?$')
+
+# `key=value` or `key="value"` pairs written as is, such as `log_type=access`
+CONSTANT_FIELD_PATTERN = re.compile(r'(\w+)=(?:"([^"]*)"|([^\s"]+))')
+
+# defaults of the fields that are not strings
+FIELD_DEFAULTS = {"status": "0", "duration": "0", "ttfb": "0", "ttlb": "0", "length": "0", "sample_weight": "1"}
+
+# durations in ms, logged with microsecond decimals by precise formatters
+DURATION_FIELD_PATTERN = re.compile(r'\b((?:duration|ttfb|ttlb)=)\{:d\}')
+PRECISE_DURATION_FORMAT = r'\1{:.3f}'
+
+SAMPLE_WEIGHT_FORMAT = " sample_weight={:g}"
+
+# time to the first and to the last byte of the response body, in ms
+STREAM_TIMING_FORMAT = " ttfb={:d} ttlb={:d}"
+
+_timestamp = (0, time.strftime(TIME_FORMAT, time.gmtime(0)))
+
+
+def format_time():
+    """Return the current UTC time, formatted once per wall-clock second."""
+    global _timestamp
+    second = int(time.time())
+    cached = _timestamp
+    if cached[0] != second:
+        cached = _timestamp = (second, time.strftime(TIME_FORMAT, time.gmtime(second)))
+    return cached[1]
+
+
+def json_functions():
+    """Return orjson's ``(dumps, fragment)``, importing orjson on first use."""
+    import orjson
+
+    try:
+        fragment = orjson.Fragment
+    except AttributeError:  # orjson < 3.9 cannot embed serialized JSON, parse it again
+
+        def fragment(text):
+            return orjson.loads(str(text))
+
+    return orjson.dumps, fragment
+
+
+def parse_fields(template):
+    """Return ``[(literal, field_name, format_spec), ...]`` for a log format template."""
+    parts = []
+    for literal, field, format_spec, conversion in Formatter().parse(template):
+        if field is None:
+            parts.append((literal, None, None))
+            continue
+        if field or conversion:
+            raise ValueError("log format placeholders must be positional, got {!r}".format(field))
+        match = FIELD_NAME_PATTERN.search(literal)
+        if match is None:
+            raise ValueError("cannot infer the field name before {!r}".format(literal))
+        parts.append((literal, match.group(1), format_spec))
+    return parts
+
+
+class RecordFormatter:
+    """Access log line formatter compiled once from a format template.
+
+    ``template`` uses the positional ``key={:s}`` style of ``DEFAULT_LOG_FORMAT``
+    and ``FULL_LOG_FORMAT``. ``format`` is generated as a single f-string, taking
+    the fields positionally in template order or by keyword; fields missing
+    from the call render as ``""`` (``0`` for integer fields). Every known
+    field is accepted by keyword even if the template does not log it.
+
+    The template is validated at once but only compiled on the first
+    ``format`` call, so formatters that are never used cost no compilation.
+    """
+
+    def __init__(self, template) -> None:
+        self.template = template
+        parts = parse_fields(template)
+        self.fields = tuple(field for _, field, _ in parts if field is not None)
+        if len(set(self.fields)) != len(self.fields):
+            raise ValueError("log format fields must be unique: {!r}".format(self.fields))
+        self._parts = parts
+
+    def format(self, *args, **kwargs):
+        # replaced on the instance by the compiled function on first use
+        self.format = self._compile(self._parts)
+        return self.format(*args, **kwargs)
+
+    @classmethod
+    def from_fields(cls, fields):
+        """Build a formatter logging ``fields`` as written in ``FULL_LOG_FORMAT`` or ``STREAM_TIMING_FORMAT``.
+
+        ``time`` and ``log_type=access`` always lead the line.
+        """
+        snippets = {field: literal for literal, field, _ in _field_snippets(FULL_LOG_FORMAT + STREAM_TIMING_FORMAT)}
+        unknown = [field for field in fields if field not in snippets]
+        if unknown:
+            raise ValueError("unknown log fields: {!r}".format(unknown))
+
+        template = snippets["time"] + " log_type=access"
+        for field in fields:
+            if field != "time":
+                template += " " + snippets[field]
+        return cls(template)
+
+    def extend(self, template):
+        """Return a formatter logging ``template`` after the fields of this one."""
+        return type(self)(self.template + template)
+
+    def _compile(self, parts):
+        arguments = list(self.fields) + [field for field in KNOWN_FIELDS if field not in self.fields]
+        params = ", ".join("{:s}={:s}".format(field, FIELD_DEFAULTS.get(field, "''")) for field in arguments)
+        pieces = []
+        for literal, field, format_spec in parts:
+            if literal:
+                pieces.append(repr(literal))
+            if field is None:
+                continue
+            if literal.endswith("AB["):
+                # bodies must neither span lines nor close their delimiter early
+                pieces.append("f'{{_escape_body({:s}):{:s}}}'".format(field, format_spec))
+            else:
+                pieces.append("f'{{{:s}:{:s}}}'".format(field, format_spec))
+
+        source = "def format({:s}):\n    return {:s}\n".format(params, " ".join(pieces) or "''")
+        namespace = {"_escape_body": escape_body}
+        exec(compile(source, "<log format {!r}>".format(self.template), "exec"), namespace)
+        return namespace["format"]
+
+
+class JsonRecordFormatter(RecordFormatter):
+    """Access log formatter writing each record as a JSON object, as bytes.
+
+    Keys and their order are those of the ``key=value`` template, including
+    constants such as ``log_type``; integer fields stay numbers. Bodies
+    rendered as ``JsonText`` are embedded as JSON instead of as strings.
+    """
+
+    def _compile(self, parts):
+        arguments = list(self.fields) + [field for field in KNOWN_FIELDS if field not in self.fields]
+        params = ", ".join("{:s}={:s}".format(field, FIELD_DEFAULTS.get(field, "''")) for field in arguments)
+        items = []
+        for literal, field, _ in parts:
+            match = FIELD_NAME_PATTERN.search(literal) if field is not None else None
+            constants = literal[:match.start()] if match is not None else literal
+            for constant in CONSTANT_FIELD_PATTERN.finditer(constants):
+                value = constant.group(2) if constant.group(2) is not None else constant.group(3)
+                items.append("{!r}: {!r}".format(constant.group(1), value))
+            if field is None:
+                continue
+            if literal.endswith("AB["):
+                value = "_fragment({0:s}) if {0:s}.__class__ is _JsonText else {0:s}".format(field)
+            else:
+                value = field
+            items.append("{!r}: {:s}".format(field, value))
+
+        source = "def format({:s}):\n    return _dumps({{{:s}}})\n".format(params, ", ".join(items))
+        dumps, fragment = json_functions()
+        namespace = {"_dumps": dumps, "_fragment": fragment, "_JsonText": JsonText}
+        exec(compile(source, "<json log format {!r}>".format(self.template), "exec"), namespace)
+        return namespace["format"]
+
+
+def _field_snippets(template):
+    """Yield ``(snippet, field, format_spec)`` with each field's own ``key=...`` text."""
+    for literal, field, format_spec in parse_fields(template):
+        if field is None:
+            continue
+        opening = literal[FIELD_NAME_PATTERN.search(literal).start():]
+        closing = '"' if opening.endswith('"') else ']AB' if opening.endswith('AB[') else ''
+        yield opening + "{:" + format_spec + "}" + closing, field, format_spec
+
+
+KNOWN_FIELDS = tuple(field for _, field, _ in parse_fields(FULL_LOG_FORMAT) if field is not None) + (
+    "ttfb",
+    "ttlb",
+    "sample_weight",
+)
+
+DEFAULT_FORMATTER = RecordFormatter(DEFAULT_LOG_FORMAT)
+FULL_FORMATTER = RecordFormatter(FULL_LOG_FORMAT)
+JSON_DEFAULT_FORMATTER = JsonRecordFormatter(DEFAULT_LOG_FORMAT)
+JSON_FULL_FORMATTER = JsonRecordFormatter(FULL_LOG_FORMAT)
+
+
+def build_formatters(
+    fields=None, sample_weight=False, output_format="text", precise_duration=False, stream_timing=False
+):
+    """Return the ``(default, full)`` formatters for a ``Log`` integration.
+
+    ``output_format`` is ``"text"`` for ``key=value`` lines or ``"json"`` for
+    JSON lines (bytes) with the same fields. With ``stream_timing`` full lines
+    end with ``ttfb`` and ``ttlb``. With ``precise_duration`` the durations
+    are fractional ms, logged with three decimals.
+    """
+    if output_format == "json":
+        default, full, cls = JSON_DEFAULT_FORMATTER, JSON_FULL_FORMATTER, JsonRecordFormatter
+    else:
+        default, full, cls = DEFAULT_FORMATTER, FULL_FORMATTER, RecordFormatter
+    if fields is not None:
+        full = cls.from_fields(fields)
+    if stream_timing and "ttfb" not in full.fields:
+        full = full.extend(STREAM_TIMING_FORMAT)
+    if sample_weight:
+        default = default.extend(SAMPLE_WEIGHT_FORMAT)
+        full = full.extend(SAMPLE_WEIGHT_FORMAT)
+    if precise_duration:
+        default = cls(DURATION_FIELD_PATTERN.sub(PRECISE_DURATION_FORMAT, default.template))
+        full = cls(DURATION_FIELD_PATTERN.sub(PRECISE_DURATION_FORMAT, full.template))
+    return default, full
@@ -0,0 +1,97 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Exclusion matcher module."""
+
+import re
+from functools import lru_cache
+
+MATCHER_CACHE_SIZE = 1024
+
+# backreferences and global inline flags cannot survive being merged into a
+# single alternation
+UNMERGEABLE_PATTERN = re.compile(r'\\\d|\(\?P=|^\(\?[aiLmsux]+\)')
+REGEX_METACHARACTERS = frozenset('.^$*+?{}[]\\|()')
+
+
+def is_literal(pattern):
+    return not REGEX_METACHARACTERS.intersection(pattern)
+
+
+class ExclusionMatcher:
+    """Match a value against many regex patterns in close to constant time.
+
+    Literal patterns go into a hash set (``full_match``) or a ``startswith``
+    tuple (prefix ``match``); the remaining ones are merged into a single
+    alternation regex. Patterns that cannot be merged, such as precompiled
+    patterns with flags, are tried one by one. Decisions for the most recent
+    ``cache_size`` values are cached.
+    """
+
+    def __init__(self, patterns, full_match=True, cache_size=MATCHER_CACHE_SIZE) -> None:
+        self.patterns = tuple(patterns)
+        self.full_match = full_match
+
+        literals = []
+        sources = []
+        self.others = []
+        for pattern in self.patterns:
+            if isinstance(pattern, str):
+                if is_literal(pattern):
+                    literals.append(pattern)
+                    continue
+                if not UNMERGEABLE_PATTERN.search(pattern):
+                    sources.append(pattern)
+                    continue
+                pattern = re.compile(pattern)
+            elif pattern.flags == re.UNICODE and is_literal(pattern.pattern):
+                literals.append(pattern.pattern)
+                continue
+            elif pattern.flags == re.UNICODE and not UNMERGEABLE_PATTERN.search(pattern.pattern):
+                sources.append(pattern.pattern)
+                continue
+            self.others.append(pattern)
+
+        self.literals = frozenset(literals) if full_match else tuple(literals)
+        self.regex = None
+        if sources:
+            try:
+                self.regex = re.compile("|".join("(?:{:s})".format(source) for source in sources))
+            except re.error:
+                self.others.extend(re.compile(source) for source in sources)
+
+        self.matches = lru_cache(maxsize=cache_size)(self._matches)
+
+    def __call__(self, value) -> bool:
+        return self.matches(value)
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+    def __repr__(self):
+        return "ExclusionMatcher({!r}, full_match={!r})".format(self.patterns, self.full_match)
+
+    def _matches(self, value) -> bool:
+        if self.full_match:
+            if value in self.literals:
+                return True
+            if self.regex is not None and self.regex.fullmatch(value):
+                return True
+            return any(pattern.fullmatch(value) for pattern in self.others)
+
+        if self.literals and value.startswith(self.literals):
+            return True
+        if self.regex is not None and self.regex.match(value):
+            return True
+        return any(pattern.match(value) for pattern in self.others)
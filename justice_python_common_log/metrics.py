@@ -0,0 +1,139 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Self-instrumentation module."""
+
+import threading
+from bisect import bisect_left
+
+STAGE_EXCLUSION = "exclusion"
+STAGE_TOKEN = "token"
+STAGE_CAPTURE = "capture"
+STAGE_FORMAT = "format"
+STAGE_EMIT = "emit"
+
+STAGES = (STAGE_EXCLUSION, STAGE_TOKEN, STAGE_CAPTURE, STAGE_FORMAT, STAGE_EMIT)
+
+COUNTERS = ("logged", "excluded", "sampled_out")
+
+# upper bounds in ns, 1us to ~16ms doubling
+DEFAULT_BUCKETS = tuple(1000 * 2 ** i for i in range(15))
+
+METRICS_PREFIX = "justice_common_log"
+
+
+class Histogram:
+    """Fixed bucket histogram of durations in ns."""
+
+    __slots__ = ("bounds", "counts", "count", "sum", "_lock")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS) -> None:
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        """Return ``{"count", "sum_ns", "buckets": [(upper bound or None, cumulative count), ...]}``."""
+        with self._lock:
+            counts = list(self.counts)
+            total, value_sum = self.count, self.sum
+        buckets = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (None,), counts):
+            cumulative += count
+            buckets.append((bound, cumulative))
+        return {"count": total, "sum_ns": value_sum, "buckets": buckets}
+
+
+class PipelineMetrics:
+    """Per-stage timing and outcome counters of the access log pipeline.
+
+    Pass an instance as ``metrics`` to ``Log``; stages are timed with
+    ``time.perf_counter_ns`` only when metrics are enabled:
+
+    * ``exclusion``: matching the excluded paths and agents
+    * ``token``: decoding the bearer token claims
+    * ``capture``: buffering and rendering the request and response bodies
+    * ``format``: building the line
+    * ``emit``: handing the line to the sink
+
+    ``logged``, ``excluded`` and ``sampled_out`` count requests; ``dropped``
+    is read from the ``dropped`` counter of the sinks passed to ``track_sink``.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS) -> None:
+        self.stages = {stage: Histogram(buckets) for stage in STAGES}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.sinks = []
+        self._lock = threading.Lock()
+
+    def observe(self, stage, duration_ns):
+        self.stages[stage].observe(duration_ns)
+
+    def increment(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def track_sink(self, sink):
+        if sink is not None and sink not in self.sinks:
+            self.sinks.append(sink)
+
+    @property
+    def dropped(self):
+        return sum(getattr(sink, "dropped", 0) for sink in self.sinks)
+
+    def snapshot(self):
+        """Return the histograms of every stage and the counters as plain data."""
+        with self._lock:
+            counters = dict(self.counters)
+        counters["dropped"] = self.dropped
+        return {
+            "stages": {stage: histogram.snapshot() for stage, histogram in self.stages.items()},
+            "counters": counters,
+        }
+
+    def prometheus(self, prefix=METRICS_PREFIX):
+        """Render the snapshot in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines = [
+            "# HELP {:s}_stage_duration_seconds Time spent in each access log stage.".format(prefix),
+            "# TYPE {:s}_stage_duration_seconds histogram".format(prefix),
+        ]
+        for stage, histogram in snapshot["stages"].items():
+            for bound, count in histogram["buckets"]:
+                le = "+Inf" if bound is None else "{:g}".format(bound / 1e9)
+                lines.append('{:s}_stage_duration_seconds_bucket{{stage="{:s}",le="{:s}"}} {:d}'.format(
+                    prefix, stage, le, count
+                ))
+            lines.append('{:s}_stage_duration_seconds_sum{{stage="{:s}"}} {:g}'.format(
+                prefix, stage, histogram["sum_ns"] / 1e9
+            ))
+            lines.append('{:s}_stage_duration_seconds_count{{stage="{:s}"}} {:d}'.format(
+                prefix, stage, histogram["count"]
+            ))
+
+        lines.append("# HELP {:s}_requests_total Requests by access log outcome.".format(prefix))
+        lines.append("# TYPE {:s}_requests_total counter".format(prefix))
+        for outcome, count in snapshot["counters"].items():
+            lines.append('{:s}_requests_total{{outcome="{:s}"}} {:d}'.format(prefix, outcome, count))
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,56 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Route normalization module."""
+
+import re
+from functools import lru_cache
+
+NORMALIZER_CACHE_SIZE = 1024
+
+# path segments replaced by default: numbers, UUIDs and long hex IDs such as
+# user IDs
+DEFAULT_RULES = (
+    (r"\d+", "{id}"),
+    (r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}", "{id}"),
+    (r"[0-9a-fA-F]{16,}", "{id}"),
+)
+
+
+class RouteNormalizer:
+    """Turn request paths into route templates.
+
+    Pass it as ``normalizer`` to ``Log`` to log the matched route template,
+    e.g. ``/users/<user_id>`` in Flask or ``/users/{user_id}`` in FastAPI,
+    instead of the raw path. Paths that match no route are normalized by
+    replacing each ``/`` separated segment that fully matches one of
+    ``rules``, ``(pattern, replacement)`` pairs, with its replacement.
+    Results for the most recent ``cache_size`` paths are cached.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES, cache_size=NORMALIZER_CACHE_SIZE) -> None:
+        self.rules = tuple((re.compile(pattern), replacement) for pattern, replacement in rules)
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def __call__(self, path) -> str:
+        return self.normalize(path)
+
+    def _normalize(self, path):
+        segments = path.split("/")
+        for index, segment in enumerate(segments):
+            for pattern, replacement in self.rules:
+                if pattern.fullmatch(segment):
+                    segments[index] = replacement
+                    break
+        return "/".join(segments)
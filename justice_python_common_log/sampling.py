@@ -0,0 +1,132 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sampling module."""
+
+import random
+import threading
+import time
+
+
+class TokenBucket:
+    """Allow ``rate`` events per second on average, with bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None) -> None:
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+
+# paths whose dropped weight is carried separately, beyond which it is carried per status class
+MAX_CARRIED_KEYS = 1024
+
+
+class Sampler:
+    """Decide which access log lines to write.
+
+    ``sample`` returns the weight of the line, i.e. how many requests it stands
+    for, or ``0`` to drop it. The rate comes from ``path_rates`` (keyed by
+    path), then ``status_rates`` (keyed by status code or class such as
+    ``"2xx"``), then ``rate``. Lines kept by rate are capped by a token bucket
+    of ``max_per_second``; the weight of the lines dropped by the cap is added
+    to the next line kept for the same path and status class, so summed
+    weights still count every request. 5xx, 4xx and requests slower than
+    ``slow_threshold_ms`` are always kept with weight 1; disabling
+    ``keep_server_errors`` or ``keep_client_errors`` still keeps the slow ones.
+    """
+
+    def __init__(
+        self,
+        rate=1.0,
+        path_rates=None,
+        status_rates=None,
+        max_per_second=None,
+        burst=None,
+        keep_server_errors=True,
+        keep_client_errors=True,
+        slow_threshold_ms=None
+    ) -> None:
+        self.rate = rate
+        self.path_rates = dict(path_rates or {})
+        self.status_rates = {str(status).lower(): rate for status, rate in (status_rates or {}).items()}
+        self.bucket = TokenBucket(max_per_second, burst) if max_per_second is not None else None
+        self.keep_server_errors = keep_server_errors
+        self.keep_client_errors = keep_client_errors
+        self.slow_threshold_ms = slow_threshold_ms
+
+        self.kept = 0
+        self.sampled_out = 0
+        self.rate_limited = 0
+
+        # weight of the lines dropped by the cap, per path and status class
+        self._carried = {}
+        self._lock = threading.Lock()
+
+    def always_keep(self, status, duration_ms) -> bool:
+        if status >= 500:
+            if self.keep_server_errors:
+                return True
+        elif status >= 400 and self.keep_client_errors:
+            return True
+        return self.slow_threshold_ms is not None and duration_ms >= self.slow_threshold_ms
+
+    def rate_for(self, path, status) -> float:
+        rate = self.path_rates.get(path)
+        if rate is not None:
+            return rate
+        if self.status_rates:
+            status = str(status)
+            rate = self.status_rates.get(status)
+            if rate is None:
+                rate = self.status_rates.get(status[0] + "xx")
+            if rate is not None:
+                return rate
+        return self.rate
+
+    def sample(self, path, status, duration_ms) -> float:
+        if self.always_keep(status, duration_ms):
+            self.kept += 1
+            return 1.0
+
+        rate = self.rate_for(path, status)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            self.sampled_out += 1
+            return 0.0
+
+        weight = 1.0 / min(rate, 1.0)
+        if self.bucket is not None:
+            key = (path, status // 100)
+            with self._lock:
+                if not self.bucket.take():
+                    self.rate_limited += 1
+                    if key not in self._carried and len(self._carried) >= MAX_CARRIED_KEYS:
+                        key = (None, status // 100)
+                    self._carried[key] = self._carried.get(key, 0.0) + weight
+                    return 0.0
+                weight += self._carried.pop(key, 0.0) + self._carried.pop((None, status // 100), 0.0)
+
+        self.kept += 1
+        return weight
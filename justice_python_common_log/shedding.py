@@ -0,0 +1,188 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Load shedding module."""
+
+import random
+import threading
+
+from .constant import (
+    SHEDDING_LEVEL_FULL, SHEDDING_LEVEL_SAMPLED, SHEDDING_LOG_FORMAT, SHEDDING_MODES
+)
+from .formatter import JsonRecordFormatter, RecordFormatter, format_time
+
+SHEDDING_FORMATTERS = {
+    "text": RecordFormatter(SHEDDING_LOG_FORMAT),
+    "json": JsonRecordFormatter(SHEDDING_LOG_FORMAT),
+}
+
+
+def sink_queue_fill(sink):
+    """Return a function giving how full the queue of ``sink`` is, from 0 to 1, or None.
+
+    Knows the ``BackgroundWriter`` queue and the ``SpoolSink`` ring.
+    """
+    if hasattr(sink, "queue_size") and hasattr(sink, "max_queue_size"):
+        return lambda: sink.queue_size / sink.max_queue_size
+    if hasattr(sink, "backlog") and hasattr(sink, "capacity"):
+        return lambda: sink.backlog / sink.capacity
+    return None
+
+
+class LoadShedder:
+    """Degrade the access log step by step while the logging pipeline is under pressure.
+
+    Pressure is the largest ratio of a signal to its limit: the average cost
+    of ``Log`` per record against ``max_record_cost_us``, the average
+    request duration against ``max_latency_ms``, and how full the queue of
+    the sink is against ``max_queue_fill``. Signals without a limit are
+    ignored. Averages are exponentially weighted by ``smoothing``.
+
+    Every ``interval`` seconds the mode moves one level up while the
+    pressure is at least 1, up to ``max_level``: ``no_bodies`` stops body
+    capture, ``no_token`` also skips decoding the bearer token,
+    ``default_format`` writes ``DEFAULT_LOG_FORMAT`` lines and ``sampled``
+    also keeps only ``sample_rate`` of the 1xx-3xx lines. The mode moves
+    back one level each time the pressure stayed below ``recover_ratio`` for
+    ``recover_after`` seconds.
+
+    Pass it as ``shedder`` to ``Log``; each mode change is written as an
+    ``access_shedding`` line to the same sink and counted in ``changes``.
+    """
+
+    def __init__(
+        self,
+        max_record_cost_us=200,
+        max_latency_ms=None,
+        max_queue_fill=0.5,
+        queue_fill=None,
+        interval=1.0,
+        recover_ratio=0.5,
+        recover_after=10.0,
+        max_level=SHEDDING_LEVEL_SAMPLED,
+        sample_rate=0.1,
+        smoothing=0.1
+    ) -> None:
+        self.max_record_cost_ns = max_record_cost_us * 1000 if max_record_cost_us is not None else None
+        self.max_latency_ms = max_latency_ms
+        self.max_queue_fill = max_queue_fill
+        self.queue_fill = queue_fill
+        self.interval_ns = int(interval * 1e9)
+        self.recover_ratio = recover_ratio
+        self.recover_after_ns = int(recover_after * 1e9)
+        self.max_level = max_level
+        self.sample_rate = sample_rate
+        self.smoothing = smoothing
+
+        self.level = SHEDDING_LEVEL_FULL
+        self.pressure = 0.0
+        self.record_cost_ns = 0.0
+        self.latency_ms = 0.0
+        self.changes = 0
+        self.escalations = 0
+        self.recoveries = 0
+        self.shed = 0
+
+        self._next_check = None
+        self._low_since = None
+        self._lock = threading.Lock()
+        self._write = None
+        self._holder = None
+
+    @property
+    def mode(self) -> str:
+        return SHEDDING_MODES[self.level]
+
+    def bind(self, write, holder, sink=None):
+        """Write mode changes with ``write`` in the output format of ``holder.config``.
+
+        Without a ``queue_fill`` function the queue of ``sink`` is watched, if it has one.
+        """
+        self._write = write
+        self._holder = holder
+        if self.queue_fill is None:
+            self.queue_fill = sink_queue_fill(sink)
+
+    def observe(self, record_cost_ns, latency_ms, now_ns):
+        """Account for one request, re-evaluating the mode once per ``interval``."""
+        smoothing = self.smoothing
+        self.record_cost_ns += (record_cost_ns - self.record_cost_ns) * smoothing
+        self.latency_ms += (latency_ms - self.latency_ms) * smoothing
+
+        if self._next_check is None:
+            self._next_check = now_ns + self.interval_ns
+        elif now_ns >= self._next_check:
+            self.evaluate(now_ns)
+
+    def keep(self, status) -> bool:
+        """Return whether the line of a response with ``status`` is kept in ``sampled`` mode."""
+        if status >= 400 or random.random() < self.sample_rate:
+            return True
+        self.shed += 1
+        return False
+
+    def evaluate(self, now_ns):
+        with self._lock:
+            if now_ns < self._next_check:
+                # evaluated by another thread meanwhile
+                return
+            self._next_check = now_ns + self.interval_ns
+            pressure = self.pressure = self.measure()
+            level = self.level
+
+            if pressure >= 1:
+                self._low_since = None
+                if level < self.max_level:
+                    self.escalations += 1
+                    self.change(level + 1, pressure)
+            elif pressure < self.recover_ratio and level > SHEDDING_LEVEL_FULL:
+                if self._low_since is None:
+                    self._low_since = now_ns
+                elif now_ns - self._low_since >= self.recover_after_ns:
+                    # each further step back needs another quiet period
+                    self._low_since = now_ns
+                    self.recoveries += 1
+                    self.change(level - 1, pressure)
+            else:
+                self._low_since = None
+
+    def measure(self) -> float:
+        """Return the current pressure, 1 being the limit of the most loaded signal."""
+        pressure = 0.0
+        if self.max_record_cost_ns:
+            pressure = self.record_cost_ns / self.max_record_cost_ns
+        if self.max_latency_ms:
+            pressure = max(pressure, self.latency_ms / self.max_latency_ms)
+        if self.max_queue_fill and self.queue_fill is not None:
+            pressure = max(pressure, self.queue_fill() / self.max_queue_fill)
+        return pressure
+
+    def change(self, level, pressure):
+        previous, self.level = self.level, level
+        self.changes += 1
+        if self._write is not None:
+            output_format = self._holder.config.output_format if self._holder is not None else "text"
+            self._write(SHEDDING_FORMATTERS[output_format].format(
+                format_time(), SHEDDING_MODES[level], SHEDDING_MODES[previous], level, pressure
+            ))
+
+    def counters(self) -> dict:
+        """Return the current level and the counters, e.g. for ``CollectorSink.add_counters``."""
+        return {
+            "level": self.level,
+            "changes": self.changes,
+            "escalations": self.escalations,
+            "recoveries": self.recoveries,
+            "shed": self.shed,
+        }
@@ -0,0 +1,144 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Buffered sink module."""
+
+import atexit
+import os
+import socket
+import threading
+import time
+
+UNIX_SOCKET_PREFIX = "unix:"
+
+
+class BufferedSink:
+    """Write pre-formatted lines straight to a file descriptor, bypassing ``logging``.
+
+    ``target`` is ``None`` (stdout), a file descriptor, a file path opened for
+    appending, or ``"unix:<path>"`` for a UNIX stream socket. Lines are
+    appended to a per-process buffer written out once it holds ``buffer_size``
+    bytes, or when the oldest buffered line is ``flush_interval`` seconds old.
+    Lines that cannot be written, e.g. while the socket is unreachable, are
+    counted in ``dropped``. The buffer is flushed on interpreter exit.
+    """
+
+    def __init__(self, target=None, buffer_size=65536, flush_interval=1.0) -> None:
+        self.target = target
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        self._fd = None
+        self._socket = None
+        self._closed = False
+        self._stopped = threading.Event()
+        self._start()
+        atexit.register(self.close)
+
+    def _start(self):
+        if self._socket is not None:
+            # a forked child opens its own connection
+            self._socket.close()
+            self._socket = None
+        self._pid = os.getpid()
+        self._buffer = bytearray()
+        self._lines = 0
+        self._first_line_time = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="justice-common-log-sink", daemon=True)
+        self._thread.start()
+
+    def write(self, line):
+        """Buffer ``line`` (str or bytes, without trailing newline)."""
+        if self._pid != os.getpid():
+            # do not write the lines buffered by the parent process twice
+            self._start()
+
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+
+        with self._lock:
+            if self._closed:
+                return
+            if not self._buffer:
+                self._first_line_time = time.monotonic()
+            self._buffer += line
+            self._buffer += b"\n"
+            self._lines += 1
+            if len(self._buffer) >= self.buffer_size:
+                self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._flush()
+            self._closed = True
+            self._disconnect()
+        self._stopped.set()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval / 2):
+            with self._lock:
+                if self._buffer and time.monotonic() - self._first_line_time >= self.flush_interval:
+                    self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        data, lines = self._buffer, self._lines
+        self._buffer = bytearray()
+        self._lines = 0
+        try:
+            self._send(memoryview(data))
+        except OSError:
+            self._disconnect()
+            self.dropped += lines
+
+    def _send(self, data):
+        if isinstance(self.target, str) and self.target.startswith(UNIX_SOCKET_PREFIX):
+            if self._socket is None:
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                try:
+                    sock.connect(self.target[len(UNIX_SOCKET_PREFIX):])
+                except OSError:
+                    sock.close()
+                    raise
+                self._socket = sock
+            self._socket.sendall(data)
+            return
+
+        if self._fd is None:
+            if self.target is None:
+                self._fd = 1
+            elif isinstance(self.target, int):
+                self._fd = self.target
+            else:
+                self._fd = os.open(self.target, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        while data:
+            data = data[os.write(self._fd, data):]
+
+    def _disconnect(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        if self._fd is not None and isinstance(self.target, str):
+            os.close(self._fd)
+            self._fd = None
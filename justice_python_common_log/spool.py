@@ -0,0 +1,324 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory-mapped spool module.
+
+The spool file starts with a ``SPOOL_HEADER_SIZE`` byte header followed by
+a ring of ``capacity`` bytes. Records are a ``RECORD_HEADER`` (payload
+length and CRC-32) followed by the payload, and may wrap around the end of
+the ring. The header holds the write and read offsets, which only grow;
+their position in the ring is the offset modulo the capacity. A record is
+visible to the drain only once the write offset has moved past it, so a
+worker dying mid-write never exposes a partial record.
+"""
+
+import argparse
+import atexit
+import fcntl
+import mmap
+import os
+import signal
+import struct
+import threading
+import zlib
+
+from .sink import BufferedSink
+
+SPOOL_MAGIC = b"JCLSPOOL"
+SPOOL_VERSION = 1
+SPOOL_HEADER_SIZE = 64
+DEFAULT_SPOOL_CAPACITY = 16 * 1024 * 1024
+
+# magic, version, capacity
+SPOOL_FILE_HEADER = struct.Struct("!8sII")
+# write offset, read offset, dropped records
+SPOOL_COUNTERS = struct.Struct("!QQQ")
+SPOOL_COUNTERS_POSITION = SPOOL_FILE_HEADER.size
+OFFSET = struct.Struct("!Q")
+WRITE_OFFSET_POSITION = SPOOL_COUNTERS_POSITION
+READ_OFFSET_POSITION = SPOOL_COUNTERS_POSITION + 8
+DROPPED_POSITION = SPOOL_COUNTERS_POSITION + 16
+
+# payload length, CRC-32 of the payload
+RECORD_HEADER = struct.Struct("!II")
+
+# bytes of the spool file locked with ``fcntl.lockf`` by writers and drains
+APPEND_LOCK = 0
+DRAIN_LOCK = 1
+
+
+class SpoolSink:
+    """Append log lines to a fixed-size memory-mapped ring file.
+
+    Every worker process opens the same ``path``; appends are serialized
+    with a ``lockf`` lock and only copy the line into the shared mapping, so
+    ``write`` never waits on the log consumer. When the ring holds no room
+    for a line it is dropped and counted in ``dropped``, shared by all
+    writers; memory use is bounded by ``capacity``. Lines written before a
+    crash stay in the file and are forwarded by the next drain.
+
+    An existing spool file keeps its capacity. With a ``target`` sink, e.g.
+    a ``BufferedSink``, a drain thread forwards new lines every
+    ``drain_interval`` seconds; otherwise run ``drain`` or the
+    ``justice-log-spool`` command separately. Lines are forwarded before the
+    read offset is saved, so a drain interrupted in between forwards them
+    again.
+    """
+
+    def __init__(
+        self,
+        path,
+        capacity=DEFAULT_SPOOL_CAPACITY,
+        target=None,
+        drain_interval=0.5,
+        batch_size=256
+    ) -> None:
+        self.path = path
+        self.target = target
+        self.drain_interval = drain_interval
+        self.batch_size = batch_size
+        self.corrupted = 0
+
+        self._closed = False
+        self._final_counters = None
+        self._thread = None
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, APPEND_LOCK)
+            try:
+                self.capacity = self._open(capacity)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, APPEND_LOCK)
+            self._map = mmap.mmap(self._fd, SPOOL_HEADER_SIZE + self.capacity)
+        except BaseException:
+            os.close(self._fd)
+            raise
+        self._start()
+        atexit.register(self.close)
+
+    def _open(self, capacity):
+        if os.fstat(self._fd).st_size >= SPOOL_HEADER_SIZE:
+            magic, version, existing = SPOOL_FILE_HEADER.unpack(os.pread(self._fd, SPOOL_FILE_HEADER.size, 0))
+            if magic != SPOOL_MAGIC or version != SPOOL_VERSION:
+                raise ValueError("{!r} is not a version {:d} spool file".format(self.path, SPOOL_VERSION))
+            return existing
+
+        if capacity <= RECORD_HEADER.size:
+            raise ValueError("capacity must be larger than {:d} bytes".format(RECORD_HEADER.size))
+        os.ftruncate(self._fd, SPOOL_HEADER_SIZE + capacity)
+        os.pwrite(
+            self._fd,
+            SPOOL_FILE_HEADER.pack(SPOOL_MAGIC, SPOOL_VERSION, capacity) + SPOOL_COUNTERS.pack(0, 0, 0),
+            0
+        )
+        return capacity
+
+    def _start(self):
+        # the mapping is shared with forked children, the locks and the thread are not
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._drain_lock = threading.Lock()
+        self._stopped = threading.Event()
+        if self.target is not None:
+            self._thread = threading.Thread(target=self._run, name="justice-common-log-spool", daemon=True)
+            self._thread.start()
+
+    @property
+    def dropped(self):
+        return self._snapshot()[2]
+
+    @property
+    def backlog(self):
+        """Bytes of records waiting to be drained."""
+        write_offset, read_offset, _ = self._snapshot()
+        return write_offset - read_offset
+
+    def _snapshot(self):
+        if self._final_counters is not None:
+            return self._final_counters
+        return SPOOL_COUNTERS.unpack_from(self._map, SPOOL_COUNTERS_POSITION)
+
+    def write(self, line):
+        """Append ``line`` (str or bytes, without trailing newline), or drop it if the ring is full."""
+        if self._pid != os.getpid():
+            self._start()
+
+        if isinstance(line, str):
+            line = line.encode("utf-8")
+        size = RECORD_HEADER.size + len(line)
+
+        with self._lock:
+            if self._closed:
+                return
+            spool = self._map
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, APPEND_LOCK)
+            try:
+                write_offset, read_offset, dropped = SPOOL_COUNTERS.unpack_from(spool, SPOOL_COUNTERS_POSITION)
+                if write_offset - read_offset + size > self.capacity:
+                    OFFSET.pack_into(spool, DROPPED_POSITION, dropped + 1)
+                    return
+                self._put(write_offset, RECORD_HEADER.pack(len(line), zlib.crc32(line)))
+                self._put(write_offset + RECORD_HEADER.size, line)
+                # publish the record only once it is complete
+                OFFSET.pack_into(spool, WRITE_OFFSET_POSITION, write_offset + size)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, APPEND_LOCK)
+
+    def drain(self, target=None, max_records=None):
+        """Forward up to ``max_records`` spooled lines to ``target``, then save the read offset.
+
+        ``target`` defaults to the ``target`` of the spool. Returns the number
+        of lines forwarded. Records failing their checksum are skipped and
+        counted in ``corrupted``.
+        """
+        target = target if target is not None else self.target
+        if self._pid != os.getpid():
+            self._start()
+
+        with self._drain_lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, DRAIN_LOCK)
+            try:
+                with self._lock:
+                    if self._closed:
+                        return 0
+                    write_offset, read_offset, _ = self._counters()
+
+                lines = []
+                offset = read_offset
+                while offset < write_offset and (max_records is None or len(lines) < max_records):
+                    if write_offset - offset < RECORD_HEADER.size:
+                        offset = self._skip_corrupted(write_offset)
+                        break
+                    length, checksum = RECORD_HEADER.unpack(self._get(offset, RECORD_HEADER.size))
+                    end = offset + RECORD_HEADER.size + length
+                    if end > write_offset:
+                        offset = self._skip_corrupted(write_offset)
+                        break
+                    line = self._get(offset + RECORD_HEADER.size, length)
+                    offset = end
+                    if zlib.crc32(line) != checksum:
+                        self.corrupted += 1
+                        continue
+                    lines.append(line)
+
+                for line in lines:
+                    target.write(line)
+
+                with self._lock:
+                    fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, APPEND_LOCK)
+                    try:
+                        OFFSET.pack_into(self._map, READ_OFFSET_POSITION, offset)
+                    finally:
+                        fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, APPEND_LOCK)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, DRAIN_LOCK)
+        return len(lines)
+
+    def flush(self):
+        """Forward every spooled line to ``target``, if any, and sync the file to disk."""
+        if self.target is not None:
+            while self.drain(max_records=self.batch_size) == self.batch_size:
+                pass
+            if hasattr(self.target, "flush"):
+                self.target.flush()
+        with self._lock:
+            if not self._closed:
+                self._map.flush()
+
+    def close(self):
+        if self._closed:
+            return
+        self._stopped.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join()
+        self.flush()
+        with self._lock:
+            self._closed = True
+            self._final_counters = SPOOL_COUNTERS.unpack_from(self._map, SPOOL_COUNTERS_POSITION)
+            self._map.close()
+            os.close(self._fd)
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while not self._stopped.wait(self.drain_interval):
+            try:
+                while self.drain(max_records=self.batch_size) == self.batch_size:
+                    pass
+            except Exception:  # a broken target must not kill the drain thread, the lines stay spooled
+                pass
+
+    def _counters(self):
+        fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, APPEND_LOCK)
+        try:
+            return SPOOL_COUNTERS.unpack_from(self._map, SPOOL_COUNTERS_POSITION)
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, APPEND_LOCK)
+
+    def _skip_corrupted(self, write_offset):
+        # a damaged length hides where the next record starts: drop the rest
+        self.corrupted += 1
+        return write_offset
+
+    def _put(self, offset, data):
+        position = offset % self.capacity
+        first = min(len(data), self.capacity - position)
+        start = SPOOL_HEADER_SIZE + position
+        view = memoryview(data)
+        self._map[start:start + first] = view[:first]
+        if first < len(data):
+            self._map[SPOOL_HEADER_SIZE:SPOOL_HEADER_SIZE + len(data) - first] = view[first:]
+
+    def _get(self, offset, size):
+        position = offset % self.capacity
+        first = min(size, self.capacity - position)
+        start = SPOOL_HEADER_SIZE + position
+        data = self._map[start:start + first]
+        if first < size:
+            data += self._map[SPOOL_HEADER_SIZE:SPOOL_HEADER_SIZE + size - first]
+        return data
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forward the access log records of a spool file.")
+    parser.add_argument("path", help="spool file written by SpoolSink")
+    parser.add_argument("--output", help="file to append the records to (default: stdout)")
+    parser.add_argument("--follow", action="store_true", help="keep forwarding new records until stopped")
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between drains with --follow")
+    parser.add_argument("--batch-size", type=int, default=256, help="records forwarded per drain")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        parser.error("no spool file at {!r}".format(args.path))
+
+    output = BufferedSink(args.output)
+    spool = SpoolSink(args.path)
+    stopped = threading.Event()
+
+    def handle_signal(signum, frame):
+        stopped.set()
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    while True:
+        while spool.drain(output, max_records=args.batch_size) == args.batch_size and not stopped.is_set():
+            pass
+        if not args.follow or stopped.wait(args.interval):
+            break
+    spool.close()
+    output.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
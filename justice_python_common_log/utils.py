@@ -14,62 +14,116 @@
 
 """utils module."""
 
-import os
-import jwt
-import orjson
-from .constant import FULL_ACCESS_LOG_SUPPORTED_CONTENT_TYPES, FULL_ACCESS_LOG_MAX_BODY_SIZE
+import logging
 
-full_access_log_max_body_size = int(os.getenv("FULL_ACCESS_LOG_MAX_BODY_SIZE", FULL_ACCESS_LOG_MAX_BODY_SIZE))
-supported_content_type_list = str(os.getenv("FULL_ACCESS_LOG_SUPPORTED_CONTENT_TYPES", FULL_ACCESS_LOG_SUPPORTED_CONTENT_TYPES)).split(",")
+from .config import default_config
+from .encoders import encode_body, is_supported_media_type, parse_media_type
 
+claims_cache = None
 
-def get_request_body(request_context, content_type):
-    if not content_type or not is_supported_content_type(content_type):
-        return ""
 
-    if len(request_context) != 0:
-        if len(request_context) > full_access_log_max_body_size:
-            return "data too large"
+def get_request_body(request_context, content_type, config=None):
+    config = config or default_config()
 
-        if content_type == 'application/json':
-            return minify_json_string(request_context)
+    return encode_body(request_context, content_type, config.max_body_size, config.supported_content_types)
 
-    return str(request_context)
 
+def get_response_body(response_context, content_type, is_fastapi=False, config=None):
+    config = config or default_config()
 
-def get_response_body(response_context, content_type, is_fastapi=False):
-    if not content_type or not is_supported_content_type(content_type):
-        return ""
+    if is_fastapi:
+        # FastAPI response bodies arrive as a list of chunks
+        response_context = b"".join(response_context)
 
-    if len(response_context) != 0:
-        if len(response_context) > full_access_log_max_body_size:
-            return "data too large"
+    return encode_body(response_context, content_type, config.max_body_size, config.supported_content_types)
 
-        if is_fastapi:
-            return minify_json_string(response_context[0])
-        else:
-            return minify_json_string(response_context)
 
-    return str(response_context)
+class BodyCapture:
+    """Keep the first ``limit`` bytes of a body written in chunks.
+
+    ``size`` counts every byte written, so the total length is known without
+    holding the whole body in memory.
+    """
+
+    __slots__ = ("limit", "data", "size")
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.data = bytearray()
+        self.size = 0
+
+    def write(self, chunk):
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        self.size += len(chunk)
+        room = self.limit - len(self.data)
+        if room > 0:
+            self.data += chunk[:room]
+
+    @property
+    def truncated(self):
+        return self.size > self.limit
+
+
+def get_captured_body(capture, content_type, config=None):
+    """Render a ``BodyCapture`` like ``get_request_body``/``get_response_body``."""
+    config = config or default_config()
+
+    return encode_body(
+        capture.data, content_type, config.max_body_size, config.supported_content_types, capture.truncated
+    )
 
 
 def minify_json_string(string_context):
+    import orjson
+
     string_context_compress = orjson.dumps(orjson.loads(string_context)).decode("utf-8")
 
     return string_context_compress
 
 
-def is_supported_content_type(content_type):
-    if content_type in supported_content_type_list:
-        return True
+def is_supported_content_type(content_type, config=None):
+    config = config or default_config()
+
+    return is_supported_media_type(parse_media_type(content_type), config.supported_content_types)
 
-    return False
+
+def duration_ms(duration_ns, precise=False):
+    """Convert a ``perf_counter_ns`` delta to whole ms, or fractional ms when ``precise``."""
+    if precise:
+        return duration_ns / 1000000
+    return duration_ns // 1000000
+
+
+def logger_sink(logger):
+    """Return a ``write`` function logging text and JSON (bytes) lines with ``logger``.
+
+    This is the default sink; only then is ``logging`` configured, with
+    ``basicConfig``, which does nothing if the application configured it.
+    """
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    def write(line):
+        logger.info(line if isinstance(line, str) else line.decode("utf-8"))
+
+    return write
 
 
 def decode_token(token):
-    try:
-        data_token = jwt.decode(token.replace("Bearer ", ""), options={"verify_signature": False})
-    except:
-        data_token = dict()
+    """Return the unverified claims of a bearer token, or an empty dict.
+
+    Claims are served from ``claims_cache``, created with the ``claims``
+    module on the first call; see ``ClaimsCache`` for its hit and miss
+    counters.
+    """
+    cache = claims_cache if claims_cache is not None else get_claims_cache()
+    return cache.get(token.replace("Bearer ", ""))
+
+
+def get_claims_cache():
+    global claims_cache
+    if claims_cache is None:
+        from .claims import ClaimsCache
 
-    return data_token
+        claims_cache = ClaimsCache()
+    return claims_cache
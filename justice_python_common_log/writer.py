@@ -0,0 +1,187 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Background writer module."""
+
+import atexit
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST)
+
+
+class BackgroundWriter:
+    """Write log lines from a bounded queue on a dedicated thread.
+
+    ``write`` only appends to an in-memory queue; a writer thread joins up to
+    ``batch_size`` lines into a single write on ``stream``. A line never waits
+    longer than ``flush_interval`` seconds to be written. When the queue holds
+    ``max_queue_size`` lines the ``overflow`` policy decides whether ``write``
+    blocks, drops the new line or drops the oldest queued line; dropped lines
+    are counted in ``dropped``. Pending lines are flushed on interpreter exit.
+    """
+
+    def __init__(
+        self,
+        stream=None,
+        max_queue_size=10000,
+        batch_size=256,
+        flush_interval=0.5,
+        overflow=OVERFLOW_BLOCK
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("overflow must be one of {}, got {!r}".format(OVERFLOW_POLICIES, overflow))
+
+        self.stream = stream
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.dropped = 0
+
+        self._closed = False
+        self._start()
+        atexit.register(self.close)
+
+    def _start(self):
+        self._pid = os.getpid()
+        self._queue = deque()
+        self._unwritten = 0
+        self._flushing = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._written = threading.Condition(self._lock)
+        self._thread = threading.Thread(target=self._run, name="justice-common-log-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def queue_size(self):
+        return len(self._queue)
+
+    def write(self, line):
+        """Queue ``line`` (str or bytes, without trailing newline)."""
+        if self._pid != os.getpid():
+            # the writer thread does not survive a fork, e.g. gunicorn --preload
+            self._start()
+
+        with self._lock:
+            if self._closed:
+                return
+
+            if len(self._queue) >= self.max_queue_size:
+                if self.overflow == OVERFLOW_DROP_NEWEST:
+                    self.dropped += 1
+                    return
+                elif self.overflow == OVERFLOW_DROP_OLDEST:
+                    self._queue.popleft()
+                    self._unwritten -= 1
+                    self.dropped += 1
+                else:
+                    while len(self._queue) >= self.max_queue_size and not self._closed:
+                        self._not_full.wait()
+
+            self._queue.append(line)
+            self._unwritten += 1
+            if len(self._queue) == 1 or len(self._queue) >= self.batch_size:
+                self._not_empty.notify()
+
+    def flush(self, timeout=None):
+        """Block until every queued line has been written."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            self._flushing += 1
+            self._not_empty.notify()
+            try:
+                while self._unwritten > 0 and self._thread.is_alive():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._written.wait(remaining)
+            finally:
+                self._flushing -= 1
+        return True
+
+    def close(self):
+        """Write pending lines and stop the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._not_empty.notify()
+            self._not_full.notify_all()
+
+        if self._pid == os.getpid():
+            self._thread.join()
+        atexit.unregister(self.close)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+
+                if len(self._queue) < self.batch_size and not self._closed and not self._flushing:
+                    # give the batch a chance to fill up
+                    self._not_empty.wait(self.flush_interval)
+
+                count = min(len(self._queue), self.batch_size)
+                batch = [self._queue.popleft() for _ in range(count)]
+                self._not_full.notify_all()
+                closed = self._closed
+
+            failed = self._write_batch(batch) if batch else False
+
+            with self._lock:
+                if failed:
+                    self.dropped += len(batch)
+                self._unwritten -= len(batch)
+                if self._unwritten <= 0:
+                    self._written.notify_all()
+                if closed and not self._queue:
+                    return
+
+    def _write_batch(self, batch):
+        stream = self.stream if self.stream is not None else sys.stderr
+        buffer = getattr(stream, "buffer", None)
+
+        try:
+            if buffer is not None:
+                buffer.write(b"".join(_encode(line) for line in batch))
+                buffer.flush()
+            else:
+                stream.write("".join(_decode(line) for line in batch))
+                stream.flush()
+        except Exception:  # a broken stream must not kill the writer thread
+            return True
+        return False
+
+
+def _encode(line):
+    if isinstance(line, str):
+        line = line.encode("utf-8")
+    return line + b"\n"
+
+
+def _decode(line):
+    if isinstance(line, bytes):
+        line = line.decode("utf-8")
+    return line + "\n"
@@ -0,0 +1,243 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""WSGI module."""
+
+from contextvars import copy_context
+from time import perf_counter_ns
+
+from .config import LogConfig
+from .context import TRACE_ID_HEADER, RequestContext, request_context
+from .core import AccessLogEngine, Exchange
+from .utils import BodyCapture
+
+# environ key of the current `Exchange`, for framework integrations to fill in
+EXCHANGE_ENVIRON_KEY = "justice_common_log.exchange"
+
+
+class LogMiddleware:
+    """WSGI access log middleware, for Flask, Django or any other WSGI app.
+
+    Takes an ``AccessLogEngine``, or the options of one. Responses returned
+    as a list or tuple are logged right away; any other response iterable is
+    logged once the server closes it, so streamed bodies report their total
+    time.
+
+    In full access log mode ``wsgi.input`` and the response are teed into
+    bounded buffers holding at most ``FULL_ACCESS_LOG_MAX_BODY_SIZE`` bytes
+    per direction; the bodies themselves are never buffered.
+
+    Each request runs with a ``RequestContext`` in ``request_context``; with
+    ``echo_trace_id`` a generated trace id is returned in ``X-Ab-TraceID``.
+    """
+
+    def __init__(self, app, engine: AccessLogEngine = None, **options) -> None:
+        self.app = app
+        self.engine = engine if engine is not None else AccessLogEngine(**options)
+
+    @property
+    def config(self) -> LogConfig:
+        return self.engine.holder.config
+
+    @config.setter
+    def config(self, config: LogConfig):
+        self.engine.holder.config = config
+
+    def __call__(self, environ, start_response):
+        context = RequestContext(WSGIHeaders(environ))
+        token = request_context.set(context)
+        try:
+            return self.handle(environ, start_response, context)
+        finally:
+            request_context.reset(token)
+
+    def handle(self, environ, start_response, context: RequestContext):
+        engine = self.engine
+        config = engine.holder.config
+        path = get_path(environ)
+
+        if engine.echo_trace_id:
+            start_response = with_trace_id(start_response, context)
+
+        if engine.is_excluded(config, path, lambda: environ.get("HTTP_USER_AGENT")):
+            return self.app(environ, start_response)
+
+        exchange = Exchange(context, environ.get("REQUEST_METHOD", "GET"), path, environ.get("REMOTE_ADDR", ""))
+        environ[EXCHANGE_ENVIRON_KEY] = exchange
+
+        capture_limit = engine.capture_limit(config)
+        if capture_limit is not None:
+            exchange.request_body = BodyCapture(capture_limit)
+            exchange.response_body = BodyCapture(capture_limit)
+            environ["wsgi.input"] = InputCapture(environ["wsgi.input"], exchange.request_body)
+
+            def start_response_wrapper(status, headers, exc_info=None):
+                exchange.status = int(status[:3])
+                for name, value in headers:
+                    if name.lower() == "content-type":
+                        exchange.response_content_type = value
+                        break
+                return start_response(status, headers, exc_info)
+        else:
+
+            def start_response_wrapper(status, headers, exc_info=None):
+                exchange.status = int(status[:3])
+                return start_response(status, headers, exc_info)
+
+        exchange.start = perf_counter_ns()
+        try:
+            iterable = self.app(environ, start_response_wrapper)
+        except BaseException:
+            # the server answers 500, whatever status was passed to start_response
+            exchange.status = 500
+            engine.log(config, exchange, perf_counter_ns())
+            raise
+
+        body = exchange.body
+        if body is None:
+            if not isinstance(iterable, (list, tuple)):
+                # log once the server has drained and closed the stream
+                return ResponseStream(iterable, exchange, lambda: engine.log(config, exchange, perf_counter_ns()))
+            body = iterable
+
+        end = perf_counter_ns()
+        capture = exchange.response_body
+        if capture is not None:
+            for chunk in body:
+                capture.write(chunk)
+        engine.log(config, exchange, end)
+        return iterable
+
+
+class WSGIHeaders:
+    """Read-only view of the request headers of a WSGI ``environ``, by lowercase name."""
+
+    __slots__ = ("environ",)
+
+    def __init__(self, environ) -> None:
+        self.environ = environ
+
+    def get(self, name, default=None):
+        key = name.upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = "HTTP_" + key
+        return self.environ.get(key, default)
+
+    def __getitem__(self, name):
+        value = self.get(name)
+        if value is None:
+            raise KeyError(name)
+        return value
+
+    def __contains__(self, name):
+        return self.get(name) is not None
+
+
+class InputCapture:
+    """``wsgi.input`` wrapper writing everything the app reads into a ``BodyCapture``."""
+
+    __slots__ = ("stream", "capture")
+
+    def __init__(self, stream, capture: BodyCapture) -> None:
+        self.stream = stream
+        self.capture = capture
+
+    def read(self, *args):
+        data = self.stream.read(*args)
+        self.capture.write(data)
+        return data
+
+    def readline(self, *args):
+        line = self.stream.readline(*args)
+        self.capture.write(line)
+        return line
+
+    def readlines(self, *args):
+        lines = self.stream.readlines(*args)
+        for line in lines:
+            self.capture.write(line)
+        return lines
+
+    def __iter__(self):
+        for line in self.stream:
+            self.capture.write(line)
+            yield line
+
+
+class ResponseStream:
+    """WSGI response iterable that counts and captures a streamed body.
+
+    Sets ``first_byte`` and ``last_byte`` of the exchange to the
+    ``perf_counter_ns`` time the first chunk was produced and the stream was
+    exhausted. ``on_close()`` runs once, when the server closes the response,
+    so the access log line reports the total stream time.
+
+    The body is produced and closed in the context variables of the request,
+    so ``request_context`` is still set while a generator runs.
+    """
+
+    def __init__(self, iterable, exchange: Exchange, on_close) -> None:
+        self.iterable = iterable
+        self.exchange = exchange
+        self.on_close = on_close
+        self.closed = False
+        self.context = copy_context()
+
+    def __iter__(self):
+        exchange = self.exchange
+        capture = exchange.response_body
+        run = self.context.run
+        iterator = run(iter, self.iterable)
+        while True:
+            try:
+                chunk = run(next, iterator)
+            except StopIteration:
+                break
+            if exchange.first_byte is None:
+                exchange.first_byte = perf_counter_ns()
+            if capture is not None:
+                capture.write(chunk)
+            yield chunk
+        exchange.last_byte = perf_counter_ns()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if hasattr(self.iterable, "close"):
+                self.context.run(self.iterable.close)
+        finally:
+            self.on_close()
+
+
+def with_trace_id(start_response, context: RequestContext):
+    """Wrap ``start_response`` to add the trace id header, if it was generated."""
+
+    def start_response_wrapper(status, headers, exc_info=None):
+        trace_id = context.trace_id
+        if context.trace_id_generated:
+            headers = [*headers, (TRACE_ID_HEADER, trace_id)]
+        return start_response(status, headers, exc_info)
+
+    return start_response_wrapper
+
+
+def get_path(environ) -> str:
+    """Return the request path of ``environ`` like ``werkzeug.Request.path``."""
+    path = environ.get("PATH_INFO", "")
+    if not path.isascii():
+        # WSGI servers decode the raw path as latin-1
+        path = path.encode("latin-1").decode("utf-8", "replace")
+    return "/" + path.lstrip("/")
@@ -10,30 +10,37 @@ with open('README.rst') as readme_file:
 with open('HISTORY.rst') as history_file:
     history = history_file.read()
 
-requirements = ['pyjwt[crypto]==2.4.0','orjson==3.9.15']
+requirements = ['orjson==3.9.15']
 
-test_requirements = ['pyjwt[crypto]==2.4.0','orjson==3.9.15']
+test_requirements = ['orjson==3.9.15']
 
 optional_requirements = {
     "flask": ["Flask>=1.0"],
-    "fastapi": ["fastapi==0.98.0"]
+    "fastapi": ["fastapi==0.98.0"],
+    "analyzer": ["numpy>=1.17"]
 }
 
 setup(
     author="Accelbyte Analytics",
     author_email='justice-analytics-team@accelbyte.net',
-    python_requires='>=3.6',
+    python_requires='>=3.7',
     classifiers=[
         'Development Status :: 2 - Pre-Alpha',
         'Intended Audience :: Developers',
         'License :: OSI Approved :: Apache Software License',
         'Natural Language :: English',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.6',
         'Programming Language :: Python :: 3.7',
         'Programming Language :: Python :: 3.8',
     ],
     description="Justice common log format for python",
+    entry_points={
+        'console_scripts': [
+            'justice-log-collector=justice_python_common_log.collector:main',
+            'justice-log-analyzer=justice_python_common_log.analyzer:main',
+            'justice-log-spool=justice_python_common_log.spool:main',
+        ],
+    },
     install_requires=requirements,
     extras_require=optional_requirements,
     license="Apache Software License 2.0",
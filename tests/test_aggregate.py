@@ -0,0 +1,132 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.aggregate` module."""
+
+import os
+import re
+import unittest
+from unittest import mock
+
+import orjson
+
+from justice_python_common_log.aggregate import (
+    LatencyAggregator, LatencyHistogram, bucket_index, bucket_upper_bound
+)
+from justice_python_common_log.config import ConfigHolder, LogConfig
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """Tests for `LatencyHistogram`."""
+
+    def test_bucket_bounds(self):
+        for value in list(range(2000)) + [123456, 10 ** 7]:
+            upper = bucket_upper_bound(bucket_index(value))
+            self.assertGreaterEqual(upper, value)
+            self.assertLessEqual(upper - value, value / 16)
+            self.assertNotEqual(bucket_index(upper + 1), bucket_index(value))
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.record(value)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.max, 1000)
+        self.assertAlmostEqual(histogram.percentile(50), 500, delta=500 / 16)
+        self.assertAlmostEqual(histogram.percentile(99), 990, delta=990 / 16)
+        self.assertLessEqual(len(histogram.counts), 150)
+
+    def test_empty(self):
+        self.assertEqual(LatencyHistogram().percentile(50), 0)
+
+
+class TestLatencyAggregator(unittest.TestCase):
+    """Tests for `LatencyAggregator`."""
+
+    def create(self, output_format="text", **kwargs):
+        aggregator = LatencyAggregator(interval=3600, **kwargs)
+        self.lines = []
+        aggregator.bind(self.lines.append, ConfigHolder(LogConfig(output_format=output_format)))
+        self.addCleanup(aggregator.close)
+        return aggregator
+
+    def test_summary_lines(self):
+        aggregator = self.create()
+        for duration in (1, 2, 3, 100):
+            aggregator.record("GET", "/items", 200, duration)
+        aggregator.record("GET", "/items", 500, 7)
+
+        self.assertEqual(aggregator.flush(), 2)
+        self.assertRegex(
+            self.lines[0],
+            r"^time=\S+ log_type=access_summary method=GET path=/items status=200 count=4 "
+            r"p50=2 p90=100 p99=100 max=100 interval=3600$"
+        )
+        self.assertIn("status=500 count=1 p50=7", self.lines[1])
+        self.assertEqual(aggregator.flush(), 0)
+
+    def test_json_summary(self):
+        aggregator = self.create(output_format="json")
+        aggregator.record("POST", "/items", 201, 5)
+        aggregator.flush()
+
+        record = orjson.loads(self.lines[0])
+        self.assertEqual(record["log_type"], "access_summary")
+        self.assertEqual((record["count"], record["p99"], record["max"]), (1, 5, 5))
+
+    def test_key_cap(self):
+        aggregator = self.create(max_keys=2)
+        for index in range(5):
+            aggregator.record("GET", "/items/{:d}".format(index), 200, 1)
+        aggregator.flush()
+
+        self.assertEqual(len(self.lines), 3)
+        self.assertEqual(aggregator.overflowed, 3)
+        self.assertTrue(re.search(r"path=__other__ status=200 count=3 ", self.lines[2]))
+
+    def test_individual_paths(self):
+        aggregator = LatencyAggregator(individual_paths=["/login"])
+
+        self.assertTrue(aggregator.logs_individually("/login"))
+        self.assertFalse(aggregator.logs_individually("/items"))
+
+        aggregator = LatencyAggregator(individual_paths=["/users/{uid}", "/health"])
+        self.assertTrue(aggregator.logs_individually("/users/{uid}", "/users/42"))
+        self.assertTrue(aggregator.logs_individually("/{id}", "/health"))
+        self.assertFalse(aggregator.logs_individually("/items/{id}", "/items/42"))
+
+    def test_close_flushes(self):
+        aggregator = self.create()
+        aggregator.record("GET", "/items", 200, 1)
+        aggregator.close()
+
+        self.assertEqual(len(self.lines), 1)
+
+    def test_restarts_after_fork(self):
+        aggregator = self.create()
+        aggregator.record("GET", "/parent", 200, 1)
+        parent_thread = aggregator._thread
+        # stands for the thread left in the parent process
+        self.addCleanup(aggregator._stopped.set)
+
+        with mock.patch("justice_python_common_log.aggregate.os.getpid", return_value=os.getpid() + 1):
+            aggregator.record("GET", "/child", 200, 1)
+            self.assertIsNot(aggregator._thread, parent_thread)
+            self.assertTrue(aggregator._thread.is_alive())
+            aggregator.flush()
+            aggregator.close()
+
+        self.assertEqual(len(self.lines), 1)
+        self.assertIn("path=/child", self.lines[0])
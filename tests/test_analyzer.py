@@ -0,0 +1,144 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.analyzer` module."""
+
+import contextlib
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+import orjson
+
+from justice_python_common_log import analyzer
+from justice_python_common_log.formatter import (
+    DEFAULT_FORMATTER, FULL_FORMATTER, JSON_FULL_FORMATTER, RecordFormatter
+)
+
+TIME = "2024-01-01T00:00:00Z"
+
+
+def default_line(path, status, duration, time=TIME):
+    return DEFAULT_FORMATTER.format(time, "GET", path, status, duration).encode()
+
+
+@unittest.skipIf(analyzer.np is None, "requires numpy")
+class TestAnalyzer(unittest.TestCase):
+    """Tests for the access log analyzer."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_log(self, name, lines, opener=open):
+        path = os.path.join(self.directory.name, name)
+        with opener(path, "wb") as log_file:
+            log_file.write(b"\n".join(lines) + b"\n")
+        return path
+
+    def test_parse_default_line(self):
+        record = analyzer.parse_line(default_line("/ping", 200, 12))
+
+        self.assertEqual(record, (TIME.encode(), b"GET", b"/ping", 200, 12.0, 0))
+
+    def test_parse_full_line_ignores_bodies_and_quoted_fields(self):
+        line = FULL_FORMATTER.format(
+            time=TIME,
+            method="POST",
+            path="/users",
+            status=201,
+            duration=30,
+            length=42,
+            user_agent='agent log_type=access method=PUT status=500',
+            request_body='{"log":"time=x log_type=access method=GET path=/ status=500 duration=9"}',
+        ).encode()
+
+        self.assertEqual(analyzer.parse_line(line), (TIME.encode(), b"POST", b"/users", 201, 30.0, 42))
+
+    def test_parse_json_and_custom_lines(self):
+        json_line = JSON_FULL_FORMATTER.format(time=TIME, method="GET", path="/a", status=404, duration=5, length=3)
+        custom_line = RecordFormatter.from_fields(["path", "status", "duration"]).format(
+            time=TIME, path="/b", status=500, duration=7
+        ).encode()
+
+        self.assertEqual(analyzer.parse_line(json_line), (TIME.encode(), b"GET", b"/a", 404, 5.0, 3))
+        self.assertEqual(analyzer.parse_line(custom_line), (TIME.encode(), b"", b"/b", 500, 7.0, 0))
+        self.assertIsNone(analyzer.parse_line(b"time=x log_type=access_summary method=GET path=/ status=200"))
+        self.assertIsNone(analyzer.parse_line(b"Traceback (most recent call last):"))
+
+    def test_route_summary(self):
+        lines = [default_line("/users/{:d}".format(index), 200, index % 100 + 1) for index in range(1000)]
+        lines += [default_line("/users/1", 500, 1000)] * 50
+        path = self.write_log("access.log", lines)
+
+        rows = analyzer.analyze([path], chunk_size=4096).summary()
+
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual((row["method"], row["route"], row["count"]), ("GET", "/users/{id}", 1050))
+        self.assertAlmostEqual(row["errors"], 50 / 1050)
+        self.assertAlmostEqual(row["p50"], 52, delta=52 / 16)
+        self.assertAlmostEqual(row["p99"], 1000, delta=1000 / 16)
+        self.assertEqual(row["max"], 1000)
+
+    def test_since_and_raw_paths(self):
+        path = self.write_log("access.log", [
+            default_line("/users/1", 200, 1, time="2024-01-01T00:00:00Z"),
+            default_line("/users/2", 200, 1, time="2024-01-01T01:00:00Z"),
+            default_line("/users/3", 200, 1, time="2024-01-01T02:00:00Z"),
+        ])
+
+        rows = analyzer.analyze([path], since=b"2024-01-01T01:00:00Z", raw_paths=True).summary()
+
+        self.assertEqual(sorted(row["route"] for row in rows), ["/users/2", "/users/3"])
+
+    def test_parse_since(self):
+        self.assertEqual(analyzer.parse_since("1h", now=7200), b"1970-01-01T01:00:00Z")
+        self.assertEqual(analyzer.parse_since(TIME), TIME.encode())
+        with self.assertRaises(ValueError):
+            analyzer.parse_since("yesterday")
+
+    def test_max_routes(self):
+        lines = [default_line("/r{:d}".format(index), 200, 1) for index in range(10)]
+        path = self.write_log("access.log", lines)
+
+        stats = analyzer.analyze([path], raw_paths=True, max_routes=3)
+
+        routes = {row["route"]: row["count"] for row in stats.summary()}
+        self.assertEqual(routes["__other__"], 7)
+
+    def test_merge_files_in_parallel(self):
+        first = self.write_log("first.log", [default_line("/ping", 200, 1)] * 3)
+        second = self.write_log("second.log.gz", [default_line("/ping", 503, 9)] * 2, opener=gzip.open)
+
+        for jobs in (1, 2):
+            rows = analyzer.analyze([first, second], jobs=jobs).summary()
+
+            self.assertEqual(len(rows), 1)
+            self.assertEqual(rows[0]["count"], 5)
+            self.assertAlmostEqual(rows[0]["errors"], 0.4)
+            self.assertEqual(rows[0]["max"], 9)
+
+    def test_main_json_output(self):
+        path = self.write_log("access.log", [default_line("/slow", 200, 90), default_line("/fast", 200, 1)])
+        output = io.TextIOWrapper(io.BytesIO())
+
+        with contextlib.redirect_stdout(output):
+            self.assertEqual(analyzer.main([path, "--format", "json", "--sort", "p99", "--top", "1"]), 0)
+
+        output.flush()
+        rows = orjson.loads(output.buffer.getvalue())
+        self.assertEqual([row["route"] for row in rows], ["/slow"])
@@ -0,0 +1,155 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.asgi` module."""
+
+import asyncio
+import re
+import unittest
+
+import orjson
+from starlette.routing import Mount, Route
+
+from justice_python_common_log.asgi import LogMiddleware, get_route
+from justice_python_common_log.config import LogConfig
+from justice_python_common_log.context import get_request_context
+from tests.data.dummy import TEST_TOKEN
+
+DEFAULT_LINE = re.compile(
+    r'^time=\S+ log_type=access method=(\w+) path=(\S+) status=(\d+) duration=(\d+)$'
+)
+
+
+async def application(scope, receive, send):
+    """Bare ASGI app without any framework."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    if scope["path"] == "/context":
+        body = get_request_context().client_id.encode()
+    await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+    await send({"type": "http.response.body", "body": body[:4], "more_body": True})
+    await send({"type": "http.response.body", "body": body[4:]})
+
+
+def call(app, path, body=b"", headers=()):
+    """Run one request through ``app``, returning the sent messages."""
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": path,
+        "headers": [(name.encode(), value.encode()) for name, value in headers],
+        "client": ("10.0.0.1", 1234),
+    }
+    messages = [
+        {"type": "http.request", "body": body[:2], "more_body": True},
+        {"type": "http.request", "body": body[2:]},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+class TestASGILogMiddleware(unittest.TestCase):
+    """Tests for the generic ASGI `LogMiddleware`."""
+
+    def test_default_log_format(self):
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            sent = call(LogMiddleware(application), "/echo", b"{}")
+
+        self.assertEqual(sent[0]["status"], 200)
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertEqual(match.group(1, 2, 3), ("POST", "/echo", "200"))
+
+    def test_full_access_log(self):
+        app = LogMiddleware(application, config=LogConfig(full_access_log_enabled=True))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            call(
+                app,
+                "/echo",
+                b'{"a": 1}',
+                headers=[("content-type", "application/json"), ("authorization", "Bearer " + TEST_TOKEN)],
+            )
+
+        message = logs.records[0].getMessage()
+        self.assertIn("length=8", message)
+        self.assertIn("source_ip=10.0.0.1", message)
+        self.assertIn("client_id=0000000000000", message)
+        self.assertIn('request_body=AB[{"a":1}]AB', message)
+        self.assertIn('response_body=AB[{"a":1}]AB', message)
+        self.assertIn('response_content_type="application/json"', message)
+
+    def test_failing_app_is_logged(self):
+        async def app(scope, receive, send):
+            raise RuntimeError("boom")
+
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            with self.assertRaises(RuntimeError):
+                call(LogMiddleware(app), "/fail")
+
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertEqual(match.group(2, 3), ("/fail", "500"))
+
+    def test_ttfb_counts_until_the_first_body_byte(self):
+        async def app(scope, receive, send):
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"", "more_body": True})
+            await asyncio.sleep(0.05)
+            await send({"type": "http.response.body", "body": b"a"})
+
+        config = LogConfig(full_access_log_enabled=True, output_format="json")
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            call(LogMiddleware(app, config=config, stream_timing=True), "/slow")
+
+        record = orjson.loads(logs.records[0].getMessage())
+        self.assertGreaterEqual(record["ttfb"], 40)
+        self.assertGreaterEqual(record["ttlb"], record["ttfb"])
+
+    def test_request_context_and_echo(self):
+        app = LogMiddleware(application, config=LogConfig(excluded_paths=["/context"]), echo_trace_id=True)
+        with self.assertNoLogs('justice-common-log', level='INFO'):
+            sent = call(app, "/context", headers=[("authorization", "Bearer " + TEST_TOKEN)])
+
+        self.assertEqual(b"".join(message.get("body", b"") for message in sent[1:]), b"0000000000000")
+        headers = dict(sent[0]["headers"])
+        self.assertRegex(headers[b"x-ab-traceid"].decode(), "^[0-9a-f]{32}$")
+
+    def test_lifespan_passthrough(self):
+        scopes = []
+
+        async def app(scope, receive, send):
+            scopes.append(scope["type"])
+
+        asyncio.run(LogMiddleware(app)({"type": "lifespan"}, None, None))
+
+        self.assertEqual(scopes, ["lifespan"])
+
+    def test_get_route(self):
+        route = Route("/users/{uid}", lambda request: None)
+        self.assertIsNone(get_route({"root_path": "/api"}))
+        self.assertEqual(get_route({"route": route, "root_path": "/api"}, "/api"), "/users/{uid}")
+        self.assertEqual(get_route({"route": route, "root_path": "/api/v1"}, "/api"), "/v1/users/{uid}")
+
+        mount = Mount("/static", lambda scope, receive, send: None)
+        self.assertEqual(get_route({"route": mount, "root_path": "/static"}), "/static/{path}")
@@ -0,0 +1,46 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.capture` module."""
+
+import unittest
+from unittest import mock
+
+from justice_python_common_log.capture import ALWAYS, CapturePolicy
+
+
+class TestCapturePolicy(unittest.TestCase):
+    """Tests for `CapturePolicy`."""
+
+    def test_always(self):
+        self.assertTrue(ALWAYS.should_serialize(200, 0))
+
+    def test_errors(self):
+        policy = CapturePolicy(errors=True)
+
+        self.assertFalse(policy.should_serialize(200, 10000))
+        self.assertTrue(policy.should_serialize(404, 0))
+        self.assertTrue(policy.should_serialize(500, 0))
+
+    def test_slow(self):
+        policy = CapturePolicy(slow_threshold_ms=100)
+
+        self.assertFalse(policy.should_serialize(500, 99))
+        self.assertTrue(policy.should_serialize(200, 100))
+
+    def test_sampled(self):
+        policy = CapturePolicy(sample_rate=0.1)
+        with mock.patch("justice_python_common_log.capture.random.random", side_effect=[0.05, 0.5]):
+            self.assertTrue(policy.should_serialize(200, 0))
+            self.assertFalse(policy.should_serialize(200, 0))
@@ -0,0 +1,97 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.claims` module."""
+
+import base64
+import time
+import unittest
+from unittest import mock
+
+import orjson
+
+from justice_python_common_log.claims import ClaimsCache, InvalidTokenError, extract_claims
+from tests.data.dummy import TEST_TOKEN
+
+
+def make_token(claims):
+    payload = base64.urlsafe_b64encode(orjson.dumps(claims)).rstrip(b"=").decode()
+    return "eyJhbGciOiJIUzI1NiJ9.{:s}.signature".format(payload)
+
+
+class TestExtractClaims(unittest.TestCase):
+    """Tests for `extract_claims`."""
+
+    def test_extract_claims(self):
+        claims = extract_claims(TEST_TOKEN)
+        self.assertEqual(claims["namespace"], "test")
+        self.assertEqual(claims["client_id"], "0000000000000")
+
+    def test_invalid_tokens(self):
+        for token in ("", "a.b", "a.!!!.c", "a.bm90IGpzb24.c"):
+            with self.assertRaises(InvalidTokenError):
+                extract_claims(token)
+
+    def test_payload_must_be_object(self):
+        with self.assertRaises(InvalidTokenError):
+            extract_claims(make_token([1, 2]))
+
+
+class TestClaimsCache(unittest.TestCase):
+    """Tests for `ClaimsCache`."""
+
+    def test_hit_and_miss_counters(self):
+        cache = ClaimsCache()
+        token = make_token({"namespace": "test", "exp": time.time() + 60})
+
+        first = cache.get(token)
+        second = cache.get(token)
+
+        self.assertIs(first, second)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_bounded_lru(self):
+        cache = ClaimsCache(max_size=2)
+        tokens = [make_token({"user_id": str(i)}) for i in range(3)]
+        cache.get(tokens[0])
+        cache.get(tokens[1])
+        cache.get(tokens[0])
+        cache.get(tokens[2])
+
+        self.assertEqual(len(cache), 2)
+        cache.get(tokens[1])
+        self.assertEqual(cache.misses, 4)
+
+    def test_evicted_at_exp(self):
+        cache = ClaimsCache(ttl=300)
+        now = time.time()
+        token = make_token({"exp": now + 10})
+
+        with mock.patch("justice_python_common_log.claims.time.time", return_value=now):
+            cache.get(token)
+        with mock.patch("justice_python_common_log.claims.time.time", return_value=now + 11):
+            cache.get(token)
+
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_expired_token_not_cached(self):
+        cache = ClaimsCache()
+        self.assertEqual(cache.get(TEST_TOKEN)["namespace"], "test")
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_token_cached_as_empty(self):
+        cache = ClaimsCache()
+        self.assertEqual(cache.get("garbage"), {})
+        self.assertEqual(cache.get("garbage"), {})
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
@@ -0,0 +1,233 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.collector` module."""
+
+import errno
+import os
+import select
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+import orjson
+
+from justice_python_common_log.collector import (
+    FRAME_HEADER, MESSAGE_COUNTERS, MESSAGE_RECORD, Collector, CollectorSink
+)
+
+
+class ListSink:
+    """Sink keeping every line."""
+
+    def __init__(self) -> None:
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+class TestCollector(unittest.TestCase):
+    """Tests for `Collector` and `CollectorSink`."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "collector.sock")
+
+    def start_collector(self, kind):
+        output = ListSink()
+        collector = Collector(self.path, output=output, kind=kind).start()
+        self.addCleanup(collector.stop)
+        return collector, output
+
+    def test_datagram_round_trip(self):
+        collector, output = self.start_collector("dgram")
+        sink = CollectorSink(self.path, fallback=ListSink())
+        self.addCleanup(sink.close)
+
+        sink.write("first")
+        sink.write(b"second")
+
+        self.assertTrue(wait_for(lambda: len(output.lines) == 2))
+        self.assertEqual(output.lines, [b"first", b"second"])
+        self.assertEqual(sink.sent, 2)
+        self.assertEqual(collector.records, 2)
+
+    def test_stream_round_trip(self):
+        collector, output = self.start_collector("stream")
+        sink = CollectorSink(self.path, kind="stream", fallback=ListSink())
+        self.addCleanup(sink.close)
+
+        for index in range(100):
+            sink.write("line {:d}".format(index))
+
+        self.assertTrue(wait_for(lambda: len(output.lines) == 100))
+        self.assertEqual(output.lines[-1], b"line 99")
+
+    def test_stream_does_not_block_on_a_stalled_collector(self):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(server.close)
+        server.bind(self.path)
+        server.listen(8)
+        fallback = ListSink()
+        sink = CollectorSink(self.path, kind="stream", fallback=fallback, retry_interval=0)
+        self.addCleanup(sink.close)
+
+        line = b"x" * 10000
+        for _ in range(200):
+            sink.write(line)
+
+        self.assertTrue(fallback.lines)
+        self.assertEqual(sink.sent + sink.fallbacks, 200)
+
+        # the stream holds whole frames only
+        connection, _ = server.accept()
+        connection.setblocking(False)
+        data = bytearray()
+        while wait_for(lambda: select.select([connection], [], [], 0)[0], timeout=0.2):
+            chunk = connection.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+        connection.close()
+        while data:
+            end = FRAME_HEADER.size + FRAME_HEADER.unpack_from(data)[0]
+            self.assertEqual(bytes(data[FRAME_HEADER.size:end]), MESSAGE_RECORD + line)
+            del data[:end]
+
+    def test_stream_reconnects_after_a_partial_frame(self):
+        class PartialSocket:
+            closed = False
+
+            def send(self, data):
+                return len(data) // 2
+
+            def close(self):
+                self.closed = True
+
+        fallback = ListSink()
+        sink = CollectorSink(self.path, kind="stream", fallback=fallback, retry_interval=0)
+        partial = sink._socket = PartialSocket()
+        sink._pid = os.getpid()
+
+        sink.write("line")
+
+        self.assertTrue(partial.closed)
+        self.assertIsNone(sink._socket)
+        self.assertEqual(fallback.lines, [b"line"])
+
+    def test_falls_back_when_collector_is_unreachable(self):
+        fallback = ListSink()
+        sink = CollectorSink(self.path, fallback=fallback, retry_interval=0)
+
+        sink.write("lost")
+
+        self.assertEqual(fallback.lines, [b"lost"])
+        self.assertEqual(sink.fallbacks, 1)
+
+        collector, output = self.start_collector("dgram")
+        sink.write("delivered")
+
+        self.assertTrue(wait_for(lambda: output.lines == [b"delivered"]))
+        self.assertEqual(fallback.lines, [b"lost"])
+        sink.close()
+
+    def test_merges_worker_counters(self):
+        collector = Collector(self.path, output=ListSink())
+        for pid, logged in ((1, 3), (2, 4), (1, 5)):
+            collector.handle_message(MESSAGE_COUNTERS + orjson.dumps(
+                {"pid": pid, "counters": {"metrics.logged": logged}}
+            ))
+        collector.handle_message(MESSAGE_RECORD + b"line")
+
+        counters = collector.counters
+
+        self.assertEqual(counters["metrics.logged"], 9)
+        self.assertEqual(counters["collector.workers"], 2)
+        self.assertEqual(counters["collector.records"], 1)
+
+    def test_reports_counters(self):
+        collector, _ = self.start_collector("dgram")
+        sink = CollectorSink(self.path, fallback=ListSink())
+        sink.add_counters("metrics", lambda: {"logged": 7})
+        sink.write("line")
+
+        self.assertTrue(sink.report_counters())
+        self.assertTrue(wait_for(lambda: collector.counters.get("metrics.logged") == 7))
+        self.assertEqual(collector.counters["sink.sent"], 1)
+        sink.close()
+
+    def test_writes_stats(self):
+        output = ListSink()
+        collector = Collector(self.path, output=output)
+        collector.handle_message(MESSAGE_RECORD + b"line")
+
+        collector.write_stats()
+
+        self.assertIn("log_type=collector_stats", output.lines[-1])
+        self.assertIn("collector.records=1", output.lines[-1])
+
+    def test_rejects_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            Collector(self.path, output=ListSink(), kind="raw")
+
+    def test_replaces_a_stale_socket(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        stale.bind(self.path)
+        stale.close()
+
+        collector, output = self.start_collector("dgram")
+        sink = CollectorSink(self.path, fallback=ListSink())
+        self.addCleanup(sink.close)
+        sink.write("line")
+
+        self.assertTrue(wait_for(lambda: output.lines == [b"line"]))
+
+    def test_refuses_to_replace_a_file_or_a_running_collector(self):
+        with open(self.path, "w") as file:
+            file.write("data")
+        with self.assertRaises(FileExistsError):
+            Collector(self.path).bind()
+        self.assertTrue(os.path.isfile(self.path))
+        os.unlink(self.path)
+
+        for kind in ("dgram", "stream"):
+            with self.subTest(kind=kind):
+                collector, _ = self.start_collector(kind)
+                with self.assertRaises(OSError) as raised:
+                    Collector(self.path, kind="dgram").bind()
+                self.assertEqual(raised.exception.errno, errno.EADDRINUSE)
+                self.assertTrue(stat.S_ISSOCK(os.lstat(self.path).st_mode))
+                collector.stop()
+
+    def test_entry_point(self):
+        result = subprocess.run(
+            [sys.executable, "-m", "justice_python_common_log.collector", "--help"],
+            capture_output=True,
+            check=True
+        )
+
+        self.assertIn(b"--socket", result.stdout)
@@ -0,0 +1,140 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.config` module."""
+
+import os
+import signal
+import tempfile
+import time
+import unittest
+
+from justice_python_common_log.config import ConfigHolder, ConfigReloader, LogConfig, str_to_bool
+
+
+class TestLogConfig(unittest.TestCase):
+    """Tests for `LogConfig`."""
+
+    def test_str_to_bool(self):
+        self.assertTrue(str_to_bool("True"))
+        self.assertTrue(str_to_bool(" on "))
+        self.assertFalse(str_to_bool("0"))
+        with self.assertRaises(ValueError):
+            str_to_bool("maybe")
+
+    def test_defaults(self):
+        config = LogConfig.from_env({})
+
+        self.assertFalse(config.full_access_log_enabled)
+        self.assertEqual(config.max_body_size, 10240)
+        self.assertIn("application/json", config.supported_content_types)
+        self.assertIsNone(config.excluded_paths)
+        self.assertEqual(config.output_format, "text")
+
+    def test_from_env(self):
+        config = LogConfig.from_env(
+            {
+                "FULL_ACCESS_LOG_ENABLED": "true",
+                "FULL_ACCESS_LOG_MAX_BODY_SIZE": "100",
+                "FULL_ACCESS_LOG_SUPPORTED_CONTENT_TYPES": "text/plain",
+                "ACCESS_LOG_OUTPUT_FORMAT": "JSON",
+            },
+            excluded_paths=["/health"],
+        )
+
+        self.assertTrue(config.full_access_log_enabled)
+        self.assertEqual(config.max_body_size, 100)
+        self.assertEqual(config.supported_content_types, frozenset(["text/plain"]))
+        self.assertTrue(config.excluded_paths("/health"))
+        self.assertEqual(config.output_format, "json")
+        with self.assertRaises(ValueError):
+            LogConfig(output_format="xml")
+
+    def test_immutable(self):
+        config = LogConfig()
+        with self.assertRaises(AttributeError):
+            config.max_body_size = 1
+        self.assertEqual(config.replace(max_body_size=1).max_body_size, 1)
+
+    def test_with_exclusions(self):
+        config = LogConfig(excluded_paths=["/health"])
+        self.assertIs(config.with_exclusions(), config)
+
+        config = config.with_exclusions(excluded_agents=["kube-probe"])
+        self.assertTrue(config.excluded_paths("/health"))
+        self.assertTrue(config.excluded_agents("kube-probe/1.27"))
+
+    def test_from_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".env", delete=False) as env_file:
+            env_file.write("# comment\nFULL_ACCESS_LOG_ENABLED='yes'\nFULL_ACCESS_LOG_MAX_BODY_SIZE=5\n")
+        self.addCleanup(os.unlink, env_file.name)
+
+        config = LogConfig.from_file(env_file.name)
+        self.assertTrue(config.full_access_log_enabled)
+        self.assertEqual(config.max_body_size, 5)
+
+
+class TestConfigReloader(unittest.TestCase):
+    """Tests for `ConfigReloader`."""
+
+    def setUp(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".env", delete=False) as env_file:
+            env_file.write("FULL_ACCESS_LOG_ENABLED=false\n")
+        self.path = env_file.name
+        self.addCleanup(os.unlink, self.path)
+        self.holder = ConfigHolder(LogConfig(excluded_agents=["ELB"]))
+
+    def enable_full_mode(self):
+        with open(self.path, "w") as env_file:
+            env_file.write("FULL_ACCESS_LOG_ENABLED=true\n")
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000))
+
+    def test_reload_keeps_exclusions(self):
+        self.enable_full_mode()
+        config = ConfigReloader(self.holder, path=self.path).reload()
+
+        self.assertIs(self.holder.config, config)
+        self.assertTrue(config.full_access_log_enabled)
+        self.assertTrue(config.excluded_agents("ELB-HealthChecker"))
+
+    def test_failed_reload_keeps_current(self):
+        current = self.holder.config
+        with self.assertLogs('justice-common-log', level='WARNING'):
+            ConfigReloader(self.holder, path=self.path + ".missing").reload()
+        self.assertIs(self.holder.config, current)
+
+    def test_mtime_polling(self):
+        reloader = ConfigReloader(self.holder, path=self.path, interval=0.01).start()
+        self.addCleanup(reloader.stop)
+        self.enable_full_mode()
+
+        deadline = time.monotonic() + 2
+        while not self.holder.config.full_access_log_enabled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(self.holder.config.full_access_log_enabled)
+
+    @unittest.skipUnless(hasattr(signal, "SIGUSR1"), "requires SIGUSR1")
+    def test_signal(self):
+        reloader = ConfigReloader(self.holder, path=self.path, signum=signal.SIGUSR1).start()
+        self.addCleanup(reloader.stop)
+        self.enable_full_mode()
+
+        os.kill(os.getpid(), signal.SIGUSR1)
+        self.assertEqual(reloader.reloads, 1)
+        self.assertTrue(self.holder.config.full_access_log_enabled)
+
+    def test_polling_requires_path(self):
+        with self.assertRaises(ValueError):
+            ConfigReloader(self.holder, interval=1)
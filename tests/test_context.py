@@ -0,0 +1,107 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.context` module."""
+
+import logging
+import os
+import unittest
+
+from justice_python_common_log.context import (
+    CONTEXT_FIELDS, RequestContext, RequestContextFilter, TraceIdGenerator, request_context
+)
+from tests.data.dummy import TEST_TOKEN
+
+
+class TestTraceIdGenerator(unittest.TestCase):
+    """Tests for `TraceIdGenerator`."""
+
+    def test_unique_hex_ids(self):
+        generate = TraceIdGenerator(batch_size=4)
+
+        trace_ids = [generate() for _ in range(100)]
+
+        self.assertEqual(len(set(trace_ids)), 100)
+        for trace_id in trace_ids:
+            self.assertRegex(trace_id, r"^[0-9a-f]{32}$")
+
+    @unittest.skipUnless(hasattr(os, "fork"), "requires fork")
+    def test_forked_child_draws_new_ids(self):
+        generate = TraceIdGenerator()
+        generate()
+        read, write = os.pipe()
+
+        pid = os.fork()
+        if pid == 0:
+            os.write(write, generate().encode())
+            os._exit(0)
+        os.waitpid(pid, 0)
+        child_id = os.read(read, 32).decode()
+        os.close(read)
+        os.close(write)
+
+        self.assertNotEqual(child_id, generate())
+
+
+class TestRequestContext(unittest.TestCase):
+    """Tests for `RequestContext` and `RequestContextFilter`."""
+
+    def test_reads_headers_lazily_once(self):
+        calls = []
+
+        def headers():
+            calls.append(1)
+            return {"authorization": "Bearer " + TEST_TOKEN, "x-flight-id": "flight"}
+
+        context = RequestContext(headers)
+        self.assertEqual(calls, [])
+
+        self.assertEqual(context.client_id, "0000000000000")
+        self.assertEqual(context.namespace, "test")
+        self.assertEqual(context.flight_id, "flight")
+        self.assertEqual(calls, [1])
+
+    def test_generates_trace_id_once(self):
+        context = RequestContext({})
+
+        trace_id = context.trace_id
+
+        self.assertTrue(context.trace_id_generated)
+        self.assertEqual(context.trace_id, trace_id)
+        self.assertEqual(context.user_id, "")
+
+    def test_uses_trace_id_header(self):
+        context = RequestContext({"x-ab-traceid": "trace"})
+
+        self.assertEqual(context.trace_id, "trace")
+        self.assertFalse(context.trace_id_generated)
+
+    def test_filter(self):
+        logger = logging.getLogger("tests.context")
+        logger.addFilter(RequestContextFilter())
+        self.addCleanup(logger.removeFilter, logger.filters[-1])
+
+        with self.assertLogs(logger) as logs:
+            logger.info("outside")
+            token = request_context.set(RequestContext({"x-ab-traceid": "trace"}))
+            try:
+                logger.info("inside")
+            finally:
+                request_context.reset(token)
+
+        outside, inside = logs.records
+        for field in CONTEXT_FIELDS:
+            self.assertEqual(getattr(outside, field), "")
+        self.assertEqual(inside.trace_id, "trace")
+        self.assertEqual(inside.user_id, "")
@@ -0,0 +1,72 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.encoders` module."""
+
+import unittest
+
+from justice_python_common_log.config import LogConfig
+from justice_python_common_log.encoders import (
+    ENCODERS, encode_body, escape_body, parse_media_type, register_encoder
+)
+from tests.data.dummy import TEST_REQUEST_BODY, TEST_REQUEST_BODY_RESULT
+
+SUPPORTED = LogConfig().supported_content_types
+
+
+def encode(body, content_type, max_body_size=10240):
+    return encode_body(body, content_type, max_body_size, SUPPORTED)
+
+
+class TestEncoders(unittest.TestCase):
+    """Tests for the body encoder registry."""
+
+    def test_parse_media_type(self):
+        self.assertEqual(parse_media_type("Application/JSON; charset=utf-8"), "application/json")
+        self.assertEqual(parse_media_type("text/plain"), "text/plain")
+
+    def test_json_with_parameters_and_suffix(self):
+        self.assertEqual(encode(TEST_REQUEST_BODY, "application/json; charset=utf-8"), TEST_REQUEST_BODY_RESULT)
+        self.assertEqual(encode(TEST_REQUEST_BODY, "application/problem+json"), TEST_REQUEST_BODY_RESULT)
+
+    def test_invalid_json_falls_back_to_text(self):
+        self.assertEqual(encode(b'{"a": ', "application/json"), '{"a": ')
+
+    def test_xml_whitespace_collapse(self):
+        body = b'<?xml version="1.0"?>\n<a>\n  <b>text</b>\n</a>\n'
+        self.assertEqual(encode(body, "application/soap+xml"), '<?xml version="1.0"?><a><b>text</b></a>')
+
+    def test_text_and_form(self):
+        self.assertEqual(encode(b"hello", "text/plain"), "hello")
+        self.assertEqual(encode(b"a=1&b=%20", "application/x-www-form-urlencoded"), "a=1&b=%20")
+
+    def test_unsupported_or_empty(self):
+        self.assertEqual(encode(b"alert(1)", "application/javascript"), "")
+        self.assertEqual(encode(b"", "application/json"), "")
+        self.assertEqual(encode(b"x", None), "")
+
+    def test_truncation(self):
+        self.assertEqual(encode(TEST_REQUEST_BODY, "application/json", 10), TEST_REQUEST_BODY[:10].decode() + "...(truncated)")
+        self.assertEqual(encode(bytearray(b"abcdef"), "text/plain", 3), "abc...(truncated)")
+
+    def test_escape_body(self):
+        self.assertEqual(escape_body('{"a":[1]}'), '{"a":[1]}')
+        self.assertEqual(escape_body("a\r\nb\tc\x00"), "a\\r\\nb\\tc\\x00")
+        self.assertEqual(escape_body("x]AB time=t log_type=access"), "x\\x5dAB time=t log_type=access")
+
+    def test_register_encoder(self):
+        self.addCleanup(ENCODERS.pop, "text/csv")
+        register_encoder("text/csv", lambda view, truncated: "rows={:d}".format(bytes(view).count(b"\n")))
+
+        self.assertEqual(encode_body(b"a,b\n1,2\n", "text/csv", 10240, SUPPORTED | {"text/csv"}), "rows=2")
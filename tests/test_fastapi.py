@@ -0,0 +1,315 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.fastapi` module."""
+
+import asyncio
+import re
+import unittest
+from unittest import mock
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+import orjson
+
+from justice_python_common_log.aggregate import LatencyAggregator
+from justice_python_common_log.capture import CapturePolicy
+from justice_python_common_log.config import LogConfig
+from justice_python_common_log.context import get_request_context
+from justice_python_common_log.fastapi import Log
+from justice_python_common_log.metrics import PipelineMetrics
+from justice_python_common_log.routes import RouteNormalizer
+from justice_python_common_log.sampling import Sampler
+from tests.data.dummy import TEST_REQUEST_BODY, TEST_REQUEST_BODY_RESULT, TEST_TOKEN
+
+DEFAULT_LINE = re.compile(
+    r'^time=\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ log_type=access method=(\w+) path=(\S+) status=(\d+) duration=(\d+)$'
+)
+
+
+def create_app(**kwargs):
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ping": "pong"}
+
+    @app.get("/users/{user_id}")
+    def user(user_id: str):
+        return {"user_id": user_id}
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse(iter([b"a" * 10, b"b" * 10]), media_type="text/plain")
+
+    @app.get("/slow")
+    def slow():
+        async def chunks():
+            yield b"a"
+            await asyncio.sleep(0.05)
+            yield b"b"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return await request.json()
+
+    @app.post("/reject")
+    async def reject(request: Request):
+        await request.body()
+        return JSONResponse({"detail": "rejected"}, status_code=400)
+
+    @app.get("/download")
+    def download():
+        return StreamingResponse((b"x" * 1024 for _ in range(100)), media_type="application/json")
+
+    @app.get("/context")
+    def context():
+        return get_request_context().as_dict()
+
+    Log(app, **kwargs)
+    return app
+
+
+class TestFastAPILog(unittest.TestCase):
+    """Tests for the FastAPI `Log` extension."""
+
+    def test_default_log_format(self):
+        client = TestClient(create_app())
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/ping")
+
+        self.assertEqual(response.json(), {"ping": "pong"})
+        self.assertEqual(len(logs.records), 1)
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertIsNotNone(match)
+        self.assertEqual(match.group(1, 2, 3), ("GET", "/ping", "200"))
+
+    def test_streaming_response(self):
+        client = TestClient(create_app())
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/stream")
+
+        self.assertEqual(response.content, b"a" * 10 + b"b" * 10)
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertEqual(match.group(2, 3), ("/stream", "200"))
+
+    def test_not_found_status(self):
+        client = TestClient(create_app())
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/unknown")
+
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertEqual(match.group(2, 3), ("/unknown", "404"))
+
+    def test_sampling(self):
+        client = TestClient(create_app(sampler=Sampler(rate=0.5, path_rates={"/stream": 0})))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/stream")
+            with mock.patch("justice_python_common_log.sampling.random.random", return_value=0.1):
+                client.get("/ping")
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertRegex(logs.records[0].getMessage(), r"path=/ping status=200 duration=\d+ sample_weight=2$")
+
+    def test_aggregation(self):
+        aggregator = LatencyAggregator(interval=3600)
+        self.addCleanup(aggregator.close)
+        client = TestClient(create_app(aggregator=aggregator))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            for _ in range(3):
+                client.get("/ping")
+            client.get("/missing")
+            aggregator.flush()
+
+        messages = [record.getMessage() for record in logs.records]
+        self.assertEqual(len(messages), 2)
+        self.assertIn("log_type=access_summary method=GET path=/ping status=200 count=3 ", messages[0])
+        self.assertIn("path=/missing status=404 count=1 ", messages[1])
+
+    def test_route_template(self):
+        client = TestClient(create_app(normalizer=RouteNormalizer()))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/users/0f2b6b3a5a9c4e1f8d7c6b5a4f3e2d1c")
+            client.get("/missing/42")
+
+        self.assertEqual(DEFAULT_LINE.match(logs.records[0].getMessage()).group(2), "/users/{user_id}")
+        self.assertEqual(DEFAULT_LINE.match(logs.records[1].getMessage()).group(2), "/missing/{id}")
+
+    def test_route_template_of_mounted_apps(self):
+        sub = FastAPI()
+
+        @sub.get("/users/{uid}")
+        def user(uid: str):
+            return {"uid": uid}
+
+        app = create_app(normalizer=RouteNormalizer())
+        app.mount("/v1", sub)
+        app.mount("/v2", sub)
+        client = TestClient(app)
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/v1/users/1")
+            client.get("/v2/users/2")
+
+        routes = [DEFAULT_LINE.match(record.getMessage()).group(2) for record in logs.records]
+        self.assertEqual(routes, ["/v1/users/{uid}", "/v2/users/{uid}"])
+
+    def test_precise_duration(self):
+        client = TestClient(create_app(precise_duration=True))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/ping")
+
+        self.assertRegex(logs.records[0].getMessage(), r" duration=\d+\.\d{3}$")
+
+    def test_request_context(self):
+        client = TestClient(create_app())
+        with self.assertLogs('justice-common-log', level='INFO'):
+            response = client.get("/context", headers={
+                "Authorization": "Bearer " + TEST_TOKEN,
+                "X-Ab-TraceID": "trace",
+                "Game-Client-Version": "1.2.3",
+            })
+
+        context = response.json()
+        self.assertEqual(context["trace_id"], "trace")
+        self.assertEqual(context["namespace"], "test")
+        self.assertEqual(context["client_id"], "0000000000000")
+        self.assertEqual(context["game_version"], "1.2.3")
+        self.assertNotIn("x-ab-traceid", response.headers)
+        self.assertIsNone(get_request_context())
+
+    def test_echo_trace_id(self):
+        client = TestClient(create_app(echo_trace_id=True, excluded_paths=["/ping"]))
+        with self.assertLogs('justice-common-log', level='INFO'):
+            response = client.get("/context")
+            provided = client.get("/context", headers={"X-Ab-TraceID": "trace"})
+        excluded = client.get("/ping")
+
+        self.assertRegex(response.headers["x-ab-traceid"], r"^[0-9a-f]{32}$")
+        self.assertEqual(response.headers["x-ab-traceid"], response.json()["trace_id"])
+        self.assertNotIn("x-ab-traceid", provided.headers)
+        self.assertRegex(excluded.headers["x-ab-traceid"], r"^[0-9a-f]{32}$")
+
+    def test_excluded_paths(self):
+        client = TestClient(create_app(excluded_paths=["/pi.*"]))
+        with self.assertNoLogs('justice-common-log', level='INFO'):
+            client.get("/ping")
+
+    def test_explicit_config_with_exclusions(self):
+        client = TestClient(create_app(config=LogConfig(), excluded_paths=["/pi.*"], excluded_agents=["probe"]))
+        with self.assertNoLogs('justice-common-log', level='INFO'):
+            client.get("/ping")
+            client.get("/unknown", headers={"User-Agent": "probe/1.0"})
+
+    def test_excluded_agents(self):
+        client = TestClient(create_app(excluded_agents=["ELB"]))
+        with self.assertNoLogs('justice-common-log', level='INFO'):
+            client.get("/ping", headers={"User-Agent": "ELB-HealthChecker/2.0"})
+
+
+@mock.patch.dict("os.environ", {"FULL_ACCESS_LOG_ENABLED": "true"})
+class TestFastAPIFullLog(unittest.TestCase):
+    """Tests for the FastAPI `Log` extension in full access log mode."""
+
+    def test_full_log_format(self):
+        client = TestClient(create_app())
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.post(
+                "/echo",
+                content=TEST_REQUEST_BODY,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": "Bearer " + TEST_TOKEN,
+                    "X-Ab-TraceID": "trace",
+                    "User-Agent": "test-agent",
+                },
+            )
+
+        message = logs.records[0].getMessage()
+        self.assertIn('method=POST path="/echo" status=200', message)
+        self.assertIn('length={:d} '.format(len(TEST_REQUEST_BODY_RESULT)), message)
+        self.assertIn('user_agent="test-agent"', message)
+        self.assertIn('trace_id=trace namespace=test', message)
+        self.assertIn('client_id=0000000000000', message)
+        self.assertIn('request_content_type="application/json"', message)
+        self.assertIn('request_body=AB[{:s}]AB'.format(TEST_REQUEST_BODY_RESULT), message)
+        self.assertIn('response_body=AB[{:s}]AB'.format(TEST_REQUEST_BODY_RESULT), message)
+
+    def test_generated_trace_id_matches_echo(self):
+        client = TestClient(create_app(echo_trace_id=True))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/ping")
+
+        self.assertIn("trace_id={:s} ".format(response.headers["x-ab-traceid"]), logs.records[0].getMessage())
+
+    def test_json_output(self):
+        client = TestClient(create_app(
+            config=LogConfig(full_access_log_enabled=True, output_format="json"), stream_timing=True
+        ))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.post("/echo", content=TEST_REQUEST_BODY, headers={"Content-Type": "application/json"})
+            client.get("/stream")
+
+        record = orjson.loads(logs.records[0].getMessage())
+        self.assertEqual(record["method"], "POST")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["request_body"], orjson.loads(TEST_REQUEST_BODY))
+        self.assertEqual(orjson.loads(logs.records[1].getMessage())["response_body"], "a" * 10 + "b" * 10)
+
+    def test_metrics(self):
+        metrics = PipelineMetrics()
+        client = TestClient(create_app(excluded_paths=["/ping"], metrics=metrics))
+        with self.assertLogs('justice-common-log', level='INFO'):
+            client.get("/ping")
+            client.post("/echo", content=TEST_REQUEST_BODY, headers={"Authorization": "Bearer " + TEST_TOKEN})
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["counters"]["logged"], 1)
+        self.assertEqual(snapshot["counters"]["excluded"], 1)
+        for stage in ("exclusion", "token", "capture", "format", "emit"):
+            self.assertGreaterEqual(snapshot["stages"][stage]["count"], 1, stage)
+
+    def test_stream_timing(self):
+        client = TestClient(create_app(
+            config=LogConfig(full_access_log_enabled=True, output_format="json"), stream_timing=True
+        ))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/slow")
+
+        record = orjson.loads(logs.records[0].getMessage())
+        self.assertGreaterEqual(record["ttlb"] - record["ttfb"], 40)
+        self.assertGreaterEqual(record["duration"], record["ttlb"])
+        self.assertEqual(record["response_body"], "ab")
+
+    def test_errors_only_capture_policy(self):
+        client = TestClient(create_app(capture_policy=CapturePolicy(errors=True)))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.post("/echo", content=TEST_REQUEST_BODY, headers={"Content-Type": "application/json"})
+            client.post("/reject", content=TEST_REQUEST_BODY, headers={"Content-Type": "application/json"})
+
+        self.assertIn('request_body=AB[]AB', logs.records[0].getMessage())
+        self.assertIn('status=400', logs.records[1].getMessage())
+        self.assertIn('request_body=AB[{:s}]AB'.format(TEST_REQUEST_BODY_RESULT), logs.records[1].getMessage())
+        self.assertIn('response_body=AB[{"detail":"rejected"}]AB', logs.records[1].getMessage())
+
+    def test_large_streaming_response(self):
+        client = TestClient(create_app())
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/download")
+
+        self.assertEqual(len(response.content), 102400)
+        message = logs.records[0].getMessage()
+        self.assertIn('length=102400 ', message)
+        self.assertIn('response_body=AB[{:s}...(truncated)]AB'.format("x" * 10240), message)
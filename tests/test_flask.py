@@ -0,0 +1,351 @@
+# Copyright 2022 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.flask` module."""
+
+import io
+import re
+import time
+import unittest
+from unittest import mock
+
+import flask
+import orjson
+
+from justice_python_common_log.aggregate import LatencyAggregator
+from justice_python_common_log.capture import CapturePolicy
+from justice_python_common_log.config import LogConfig
+from justice_python_common_log.context import get_request_context
+from justice_python_common_log.flask import Log
+from justice_python_common_log.metrics import PipelineMetrics
+from justice_python_common_log.routes import RouteNormalizer
+from justice_python_common_log.sampling import Sampler
+from justice_python_common_log.writer import BackgroundWriter
+from tests.data.dummy import TEST_REQUEST_BODY, TEST_REQUEST_BODY_RESULT, TEST_TOKEN
+
+DEFAULT_LINE = re.compile(
+    r'^time=\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ log_type=access method=(\w+) path=(\S+) status=(\d+) duration=(\d+)$'
+)
+
+
+def create_app(**kwargs):
+    app = flask.Flask(__name__)
+
+    @app.route("/ping")
+    def ping():
+        return {"ping": "pong"}
+
+    @app.route("/echo", methods=["POST"])
+    def echo():
+        return flask.Response(flask.request.data, content_type="application/json")
+
+    @app.route("/ignore", methods=["POST"])
+    def ignore():
+        return {"ignored": True}
+
+    @app.route("/users/<user_id>")
+    def user(user_id):
+        return {"user_id": user_id}
+
+    @app.route("/slow")
+    def slow():
+        def chunks():
+            yield b"a"
+            time.sleep(0.05)
+            yield b"b"
+        return flask.Response(chunks(), content_type="text/plain")
+
+    @app.route("/download")
+    def download():
+        return flask.Response((b"x" * 1024 for _ in range(100)), content_type="application/json")
+
+    @app.route("/context")
+    def context():
+        return get_request_context().as_dict()
+
+    app.log = Log(app, **kwargs)
+    return app
+
+
+class TestFlaskLog(unittest.TestCase):
+    """Tests for the Flask `Log` extension."""
+
+    def test_default_log_format(self):
+        client = create_app().test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/ping")
+
+        self.assertEqual(response.json, {"ping": "pong"})
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertIsNotNone(match)
+        self.assertEqual(match.group(1, 2, 3), ("GET", "/ping", "200"))
+
+    def test_streamed_response_logged_on_close(self):
+        client = create_app().test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/download")
+            self.assertEqual(len(response.data), 102400)
+            self.assertEqual(logs.records, [])
+            response.close()
+
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertEqual(match.group(2, 3), ("/download", "200"))
+
+    def test_background_writer_sink(self):
+        stream = io.StringIO()
+        writer = BackgroundWriter(stream)
+        client = create_app(sink=writer).test_client()
+        client.get("/ping")
+        writer.close()
+
+        match = DEFAULT_LINE.match(stream.getvalue().rstrip("\n"))
+        self.assertEqual(match.group(2, 3), ("/ping", "200"))
+
+    def test_json_output(self):
+        client = create_app(config=LogConfig(output_format="json")).test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/ping")
+
+        record = orjson.loads(logs.records[0].getMessage())
+        self.assertEqual(list(record), ["time", "log_type", "method", "path", "status", "duration"])
+        self.assertEqual((record["path"], record["status"]), ("/ping", 200))
+
+    def test_metrics(self):
+        metrics = PipelineMetrics()
+        client = create_app(excluded_paths=["/echo"], metrics=metrics).test_client()
+        with self.assertLogs('justice-common-log', level='INFO'):
+            client.get("/ping")
+            client.post("/echo", data=b"{}")
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["counters"]["logged"], 1)
+        self.assertEqual(snapshot["counters"]["excluded"], 1)
+        self.assertEqual(snapshot["stages"]["exclusion"]["count"], 2)
+        self.assertEqual(snapshot["stages"]["format"]["count"], 1)
+        self.assertEqual(snapshot["stages"]["emit"]["count"], 1)
+
+    def test_aggregation(self):
+        aggregator = LatencyAggregator(interval=3600, individual_paths=["/echo"])
+        self.addCleanup(aggregator.close)
+        client = create_app(aggregator=aggregator).test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/ping")
+            client.get("/ping")
+            client.post("/echo", data=b"{}")
+            aggregator.flush()
+
+        messages = [record.getMessage() for record in logs.records]
+        self.assertEqual(len(messages), 3)
+        self.assertTrue(DEFAULT_LINE.match(messages[0]))
+        self.assertIn("method=GET path=/ping status=200 count=2 ", messages[1])
+        self.assertIn("method=POST path=/echo status=200 count=1 ", messages[2])
+
+    def test_aggregation_with_individual_route(self):
+        aggregator = LatencyAggregator(interval=3600, individual_paths=["/users/<user_id>"])
+        self.addCleanup(aggregator.close)
+        client = create_app(aggregator=aggregator, normalizer=RouteNormalizer()).test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/users/42")
+
+        self.assertEqual(DEFAULT_LINE.match(logs.records[0].getMessage()).group(2), "/users/<user_id>")
+
+    def test_route_template(self):
+        sampler = Sampler(path_rates={"/users/<user_id>": 0})
+        client = create_app(normalizer=RouteNormalizer(), sampler=sampler).test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/users/0f2b6b3a5a9c4e1f8d7c6b5a4f3e2d1c")
+            client.get("/missing/42").close()
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("path=/missing/{id} status=404", logs.records[0].getMessage())
+
+    def test_precise_duration(self):
+        client = create_app(precise_duration=True).test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/ping")
+
+        self.assertRegex(logs.records[0].getMessage(), r" duration=\d+\.\d{3}$")
+
+    def test_config_swap(self):
+        app = create_app()
+        log = app.log
+        client = app.test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/ping")
+            log.config = log.config.replace(full_access_log_enabled=True)
+            client.get("/ping")
+
+        self.assertIsNotNone(DEFAULT_LINE.match(logs.records[0].getMessage()))
+        self.assertIn('path="/ping"', logs.records[1].getMessage())
+
+    def test_explicit_config(self):
+        client = create_app(config=LogConfig(excluded_paths=["/ping"])).test_client()
+        with self.assertNoLogs('justice-common-log', level='INFO'):
+            client.get("/ping")
+
+    def test_explicit_config_with_exclusions(self):
+        client = create_app(config=LogConfig(full_access_log_enabled=True), excluded_paths=["/ping"]).test_client()
+        with self.assertNoLogs('justice-common-log', level='INFO'):
+            client.get("/ping")
+
+    def test_sampling(self):
+        client = create_app(sampler=Sampler(path_rates={"/ping": 0})).test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.get("/ping")
+            client.get("/unknown").close()
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertRegex(logs.records[0].getMessage(), r"path=/unknown status=404 duration=\d+ sample_weight=1$")
+
+    def test_request_context(self):
+        client = create_app().test_client()
+        with self.assertLogs('justice-common-log', level='INFO'):
+            response = client.get("/context", headers={
+                "Authorization": "Bearer " + TEST_TOKEN,
+                "X-Ab-TraceID": "trace",
+                "AccelByte-SDK-Version": "4.5.6",
+            })
+
+        context = response.get_json()
+        self.assertEqual(context["trace_id"], "trace")
+        self.assertEqual(context["namespace"], "test")
+        self.assertEqual(context["sdk_version"], "4.5.6")
+        self.assertNotIn("X-Ab-TraceID", response.headers)
+        self.assertIsNone(get_request_context())
+
+    def test_echo_trace_id(self):
+        client = create_app(echo_trace_id=True).test_client()
+        with self.assertLogs('justice-common-log', level='INFO'):
+            response = client.get("/context")
+            provided = client.get("/context", headers={"X-Ab-TraceID": "trace"})
+
+        self.assertRegex(response.headers["X-Ab-TraceID"], r"^[0-9a-f]{32}$")
+        self.assertEqual(response.headers["X-Ab-TraceID"], response.get_json()["trace_id"])
+        self.assertNotIn("X-Ab-TraceID", provided.headers)
+
+    def test_excluded_paths(self):
+        client = create_app(excluded_paths=["/pi.*"]).test_client()
+        with self.assertNoLogs('justice-common-log', level='INFO'):
+            client.get("/ping")
+
+    def test_excluded_agents(self):
+        client = create_app(excluded_agents=["ELB"]).test_client()
+        with self.assertNoLogs('justice-common-log', level='INFO'):
+            client.get("/ping", headers={"User-Agent": "ELB-HealthChecker/2.0"})
+
+
+@mock.patch.dict("os.environ", {"FULL_ACCESS_LOG_ENABLED": "true"})
+class TestFlaskFullLog(unittest.TestCase):
+    """Tests for the Flask `Log` extension in full access log mode."""
+
+    def test_full_log_format(self):
+        client = create_app().test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.post(
+                "/echo",
+                data=TEST_REQUEST_BODY,
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": "Bearer " + TEST_TOKEN,
+                    "X-Ab-TraceID": "trace",
+                    "User-Agent": "test-agent",
+                },
+            )
+
+        message = logs.records[0].getMessage()
+        self.assertIn('method=POST path="/echo" status=200', message)
+        self.assertIn('length={:d} '.format(len(TEST_REQUEST_BODY)), message)
+        self.assertIn('user_agent="test-agent"', message)
+        self.assertIn('trace_id=trace namespace=test', message)
+        self.assertIn('request_body=AB[{:s}]AB'.format(TEST_REQUEST_BODY_RESULT), message)
+        self.assertIn('response_body=AB[{:s}]AB'.format(TEST_REQUEST_BODY_RESULT), message)
+
+    def test_unread_request_body_read_up_to_the_limit(self):
+        client = create_app().test_client()
+        body = io.BytesIO(b"x" * 102400)
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.post(
+                "/ignore",
+                input_stream=body,
+                headers={"Content-Type": "text/plain", "Content-Length": str(len(body.getvalue()))},
+            )
+
+        self.assertEqual(body.tell(), 10241)
+        self.assertIn('request_body=AB[{:s}...(truncated)]AB'.format("x" * 10240), logs.records[0].getMessage())
+
+    def test_generated_trace_id_matches_echo(self):
+        client = create_app(echo_trace_id=True).test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/ping")
+
+        self.assertIn("trace_id={:s} ".format(response.headers["X-Ab-TraceID"]), logs.records[0].getMessage())
+
+    def test_json_output_to_writer(self):
+        stream = io.TextIOWrapper(io.BytesIO())
+        writer = BackgroundWriter(stream)
+        config = LogConfig(full_access_log_enabled=True, output_format="json")
+        client = create_app(config=config, sink=writer).test_client()
+        client.post("/echo", data=TEST_REQUEST_BODY, headers={"Content-Type": "application/json"})
+        writer.close()
+
+        record = orjson.loads(stream.buffer.getvalue())
+        self.assertEqual(record["path"], "/echo")
+        self.assertEqual(record["request_body"], orjson.loads(TEST_REQUEST_BODY))
+        self.assertEqual(record["response_body"], orjson.loads(TEST_REQUEST_BODY))
+
+    def test_stream_timing(self):
+        client = create_app(
+            config=LogConfig(full_access_log_enabled=True, output_format="json"), stream_timing=True
+        ).test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/slow")
+            self.assertEqual(response.data, b"ab")
+            response.close()
+
+        record = orjson.loads(logs.records[0].getMessage())
+        self.assertGreaterEqual(record["ttlb"] - record["ttfb"], 40)
+        self.assertGreaterEqual(record["duration"], record["ttlb"])
+
+    def test_metrics(self):
+        metrics = PipelineMetrics()
+        client = create_app(metrics=metrics).test_client()
+        with self.assertLogs('justice-common-log', level='INFO'):
+            client.post("/echo", data=TEST_REQUEST_BODY, headers={"Authorization": "Bearer " + TEST_TOKEN})
+            client.get("/download").close()
+
+        stages = metrics.snapshot()["stages"]
+        self.assertEqual(stages["token"]["count"], 1)
+        self.assertEqual(stages["capture"]["count"], 2)
+        self.assertEqual(stages["emit"]["count"], 2)
+
+    def test_errors_only_capture_policy(self):
+        client = create_app(capture_policy=CapturePolicy(errors=True)).test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.post("/echo", data=TEST_REQUEST_BODY, headers={"Content-Type": "application/json"})
+
+        message = logs.records[0].getMessage()
+        self.assertIn('length={:d} '.format(len(TEST_REQUEST_BODY)), message)
+        self.assertIn('request_content_type="application/json" request_body=AB[]AB', message)
+        self.assertIn('response_content_type="application/json" response_body=AB[]AB', message)
+
+    def test_large_streamed_response(self):
+        client = create_app().test_client()
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/download")
+            self.assertEqual(len(response.data), 102400)
+            response.close()
+
+        message = logs.records[0].getMessage()
+        self.assertIn('length=102400 ', message)
+        self.assertIn('response_body=AB[{:s}...(truncated)]AB'.format("x" * 10240), message)
@@ -0,0 +1,136 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.formatter` module."""
+
+import unittest
+from unittest import mock
+
+import orjson
+
+from justice_python_common_log.constant import DEFAULT_LOG_FORMAT, FULL_LOG_FORMAT
+from justice_python_common_log.encoders import JsonText
+from justice_python_common_log.formatter import (
+    DEFAULT_FORMATTER, FULL_FORMATTER, JSON_FULL_FORMATTER, JsonRecordFormatter, RecordFormatter, build_formatters,
+    format_time
+)
+
+FULL_VALUES = (
+    "2024-01-01T00:00:00Z", "GET", "/path", 200, 12, 34, "127.0.0.1", "agent", "referer", "trace",
+    "namespace", "user", "client", "application/json", '{"a":1}', "text/plain", "ok",
+    "flight", "1.0", "2.0", "3.0"
+)
+
+
+class TestRecordFormatter(unittest.TestCase):
+    """Tests for `RecordFormatter`."""
+
+    def test_default_format_matches_constant(self):
+        values = FULL_VALUES[:5]
+        self.assertEqual(DEFAULT_FORMATTER.format(*values), DEFAULT_LOG_FORMAT.format(*values))
+
+    def test_full_format_matches_constant(self):
+        self.assertEqual(FULL_FORMATTER.format(*FULL_VALUES), FULL_LOG_FORMAT.format(*FULL_VALUES))
+
+    def test_keyword_arguments_and_defaults(self):
+        line = FULL_FORMATTER.format(time="t", method="GET", path="/", status=204)
+        self.assertEqual(
+            line, FULL_LOG_FORMAT.format("t", "GET", "/", 204, 0, 0, *[""] * 15)
+        )
+
+    def test_from_fields(self):
+        formatter = RecordFormatter.from_fields(["method", "path", "status", "request_body", "trace_id"])
+
+        self.assertEqual(formatter.fields, ("time", "method", "path", "status", "request_body", "trace_id"))
+        self.assertEqual(
+            formatter.format(time="t", method="GET", path="/a b", status=200, request_body="x", user_id="u"),
+            'time=t log_type=access method=GET path="/a b" status=200 request_body=AB[x]AB trace_id='
+        )
+
+    def test_multi_line_bodies_stay_on_one_line(self):
+        line = FULL_FORMATTER.format(request_body="a\nb]AB\n", response_body=JsonText('{"a":"]AB"}'))
+
+        self.assertNotIn("\n", line)
+        self.assertIn("request_body=AB[a\\nb\\x5dAB\\n]AB", line)
+        self.assertIn('response_body=AB[{"a":"\\x5dAB"}]AB', line)
+        self.assertIn('"request_body":"a\\nb]AB\\n"', JSON_FULL_FORMATTER.format(request_body="a\nb]AB\n").decode())
+
+    def test_from_unknown_fields(self):
+        with self.assertRaises(ValueError):
+            RecordFormatter.from_fields(["method", "color"])
+
+    def test_invalid_template(self):
+        with self.assertRaises(ValueError):
+            RecordFormatter("method={method}")
+        with self.assertRaises(ValueError):
+            RecordFormatter("time={:s} time={:s}")
+
+
+class TestJsonRecordFormatter(unittest.TestCase):
+    """Tests for `JsonRecordFormatter`."""
+
+    def test_fields_and_order_match_text_format(self):
+        record = orjson.loads(JSON_FULL_FORMATTER.format(*FULL_VALUES))
+        text_keys = [pair.split("=", 1)[0] for pair in FULL_LOG_FORMAT.split(" ") if "=" in pair]
+
+        self.assertEqual(list(record), text_keys)
+        self.assertEqual(record["log_type"], "access")
+        self.assertEqual(record["operation"], "")
+        self.assertEqual(record["status"], 200)
+        self.assertEqual(record["request_body"], '{"a":1}')
+
+    def test_json_bodies_are_embedded(self):
+        line = JSON_FULL_FORMATTER.format(time="t", request_body=JsonText('{"a":[1,2]}'), response_body="a]AB")
+        record = orjson.loads(line)
+
+        self.assertIsInstance(line, bytes)
+        self.assertEqual(record["request_body"], {"a": [1, 2]})
+        self.assertEqual(record["response_body"], "a]AB")
+
+    def test_from_fields_with_sample_weight(self):
+        _, full = build_formatters(["path", "status"], sample_weight=True, output_format="json")
+
+        self.assertIsInstance(full, JsonRecordFormatter)
+        self.assertEqual(
+            full.format(time="t", path="/a", status=204, sample_weight=4.0),
+            b'{"time":"t","log_type":"access","path":"/a","status":204,"sample_weight":4.0}'
+        )
+
+    def test_stream_timing_suffix(self):
+        _, full = build_formatters(sample_weight=True, stream_timing=True, precise_duration=True)
+
+        self.assertTrue(full.template.startswith(FULL_LOG_FORMAT.replace("duration={:d}", "duration={:.3f}")))
+        self.assertTrue(full.format(ttfb=1.5, ttlb=2.25, sample_weight=2).endswith(
+            " ttfb=1.500 ttlb=2.250 sample_weight=2"
+        ))
+
+        _, full = build_formatters(["path", "ttlb", "ttfb"], stream_timing=True)
+        self.assertEqual(full.fields, ("time", "path", "ttlb", "ttfb"))
+
+
+class TestFormatTime(unittest.TestCase):
+    """Tests for `format_time`."""
+
+    def test_reuses_string_within_second(self):
+        with mock.patch("justice_python_common_log.formatter.time.time", side_effect=[1700000000.1, 1700000000.9]):
+            first = format_time()
+            second = format_time()
+
+        self.assertEqual(first, "2023-11-14T22:13:20Z")
+        self.assertIs(first, second)
+
+    def test_refreshes_on_next_second(self):
+        with mock.patch("justice_python_common_log.formatter.time.time", side_effect=[1700000000.9, 1700000001.0]):
+            self.assertEqual(format_time(), "2023-11-14T22:13:20Z")
+            self.assertEqual(format_time(), "2023-11-14T22:13:21Z")
@@ -0,0 +1,91 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for the import side effects of `justice_python_common_log`."""
+
+import subprocess
+import sys
+import textwrap
+import unittest
+
+LAZY_MODULES = (
+    "jwt",
+    "distutils",
+    "justice_python_common_log.aggregate",
+    "justice_python_common_log.capture",
+    "justice_python_common_log.claims",
+    "justice_python_common_log.routes",
+    "justice_python_common_log.shedding",
+)
+
+
+def run_python(code):
+    result = subprocess.run([sys.executable, "-c", textwrap.dedent(code)], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise AssertionError(result.stderr)
+    return result.stdout.split()
+
+
+class TestImports(unittest.TestCase):
+    """Tests for a fast, side-effect-free import."""
+
+    def check_integration(self, framework):
+        loaded = run_python("""
+            import logging, sys
+            import {0:s}
+            preloaded = set(sys.modules)
+            import justice_python_common_log.{0:s}
+            print(logging.getLogger().handlers == [])
+            for name in {1!r}:
+                print(name in sys.modules)
+            print("orjson" in sys.modules and "orjson" not in preloaded)
+        """.format(framework, LAZY_MODULES))
+
+        self.assertEqual(loaded, ["True"] + ["False"] * (len(LAZY_MODULES) + 1))
+
+    def test_flask_import(self):
+        self.check_integration("flask")
+
+    def test_fastapi_import(self):
+        self.check_integration("fastapi")
+
+    def test_fastapi_middleware_does_not_import_fastapi(self):
+        loaded = run_python("""
+            import sys
+            import justice_python_common_log.fastapi
+            print("fastapi" in sys.modules)
+        """)
+
+        self.assertEqual(loaded, ["False"])
+
+    def test_token_decoding_loads_claims(self):
+        loaded = run_python("""
+            import sys
+            from justice_python_common_log import utils
+            print("justice_python_common_log.claims" in sys.modules)
+            utils.decode_token("Bearer invalid")
+            print("justice_python_common_log.claims" in sys.modules)
+        """)
+
+        self.assertEqual(loaded, ["False", "True"])
+
+    def test_formatters_compile_on_first_use(self):
+        loaded = run_python("""
+            from justice_python_common_log.formatter import FULL_FORMATTER
+            print("format" in vars(FULL_FORMATTER))
+            FULL_FORMATTER.format()
+            print("format" in vars(FULL_FORMATTER))
+        """)
+
+        self.assertEqual(loaded, ["False", "True"])
@@ -0,0 +1,73 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.matcher` module."""
+
+import re
+import unittest
+
+from justice_python_common_log.matcher import ExclusionMatcher
+
+PATTERNS = ['/analytics/apidocs', '/swaggerui.*', '/health/(live|ready)', r'/(\w+)/\1', re.compile('/ADMIN', re.I)]
+
+
+class TestExclusionMatcher(unittest.TestCase):
+    """Tests for `ExclusionMatcher`."""
+
+    def test_full_match(self):
+        matcher = ExclusionMatcher(PATTERNS)
+
+        for path in ('/analytics/apidocs', '/swaggerui/index.html', '/health/ready', '/x/x', '/admin'):
+            self.assertTrue(matcher(path), path)
+        for path in ('/analytics/apidocs/v2', '/health/dead', '/x/y', '/admin/users'):
+            self.assertFalse(matcher(path), path)
+
+    def test_same_decisions_as_individual_patterns(self):
+        matcher = ExclusionMatcher(PATTERNS)
+        compiled = [re.compile(pattern) if isinstance(pattern, str) else pattern for pattern in PATTERNS]
+
+        for path in ('/analytics/apidocs', '/swaggerui', '/health/live', '/health', '/a/a', '/ADMIN', '/'):
+            self.assertEqual(matcher(path), any(pattern.fullmatch(path) for pattern in compiled), path)
+
+    def test_prefix_match(self):
+        matcher = ExclusionMatcher(['ELB', 'kube-probe/.*'], full_match=False)
+
+        self.assertTrue(matcher('ELB-HealthChecker/2.0'))
+        self.assertTrue(matcher('kube-probe/1.27'))
+        self.assertFalse(matcher('Mozilla/5.0 ELB'))
+
+    def test_literals_and_alternation(self):
+        matcher = ExclusionMatcher(PATTERNS)
+
+        self.assertEqual(matcher.literals, frozenset(['/analytics/apidocs']))
+        self.assertEqual(matcher.regex.pattern, '(?:/swaggerui.*)|(?:/health/(live|ready))')
+        self.assertEqual(len(matcher.others), 2)
+
+    def test_unmergeable_inline_flags(self):
+        matcher = ExclusionMatcher(['/a.*', '(?i)/b'])
+
+        self.assertTrue(matcher('/B'))
+        self.assertTrue(matcher('/abc'))
+
+    def test_decision_cache(self):
+        matcher = ExclusionMatcher(PATTERNS, cache_size=2)
+        matcher('/health/live')
+        matcher('/health/live')
+
+        info = matcher.matches.cache_info()
+        self.assertEqual((info.hits, info.misses, info.maxsize), (1, 1, 2))
+
+    def test_empty(self):
+        self.assertFalse(ExclusionMatcher([]))
+        self.assertFalse(ExclusionMatcher([])('/'))
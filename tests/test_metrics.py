@@ -0,0 +1,63 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.metrics` module."""
+
+import unittest
+from types import SimpleNamespace
+
+from justice_python_common_log.metrics import Histogram, PipelineMetrics
+
+
+class TestHistogram(unittest.TestCase):
+    """Tests for `Histogram`."""
+
+    def test_cumulative_buckets(self):
+        histogram = Histogram([10, 100])
+        for value in (5, 10, 50, 1000):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+        self.assertEqual(snapshot["count"], 4)
+        self.assertEqual(snapshot["sum_ns"], 1065)
+        self.assertEqual(snapshot["buckets"], [(10, 2), (100, 3), (None, 4)])
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    """Tests for `PipelineMetrics`."""
+
+    def test_snapshot(self):
+        metrics = PipelineMetrics()
+        metrics.observe("format", 1500)
+        metrics.increment("logged")
+        metrics.increment("excluded")
+        metrics.track_sink(SimpleNamespace(dropped=3))
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["stages"]["format"]["count"], 1)
+        self.assertEqual(snapshot["stages"]["emit"]["count"], 0)
+        self.assertEqual(snapshot["counters"], {"logged": 1, "excluded": 1, "sampled_out": 0, "dropped": 3})
+
+    def test_prometheus(self):
+        metrics = PipelineMetrics(buckets=[1000, 2000])
+        metrics.observe("token", 1500)
+        metrics.increment("sampled_out")
+
+        text = metrics.prometheus()
+        self.assertIn('justice_common_log_stage_duration_seconds_bucket{stage="token",le="1e-06"} 0\n', text)
+        self.assertIn('justice_common_log_stage_duration_seconds_bucket{stage="token",le="2e-06"} 1\n', text)
+        self.assertIn('justice_common_log_stage_duration_seconds_bucket{stage="token",le="+Inf"} 1\n', text)
+        self.assertIn('justice_common_log_stage_duration_seconds_count{stage="token"} 1\n', text)
+        self.assertIn('justice_common_log_requests_total{outcome="sampled_out"} 1\n', text)
+        self.assertIn("# TYPE justice_common_log_requests_total counter\n", text)
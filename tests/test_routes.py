@@ -0,0 +1,47 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.routes` module."""
+
+import unittest
+
+from justice_python_common_log.routes import RouteNormalizer
+
+
+class TestRouteNormalizer(unittest.TestCase):
+    """Tests for `RouteNormalizer`."""
+
+    def test_default_rules(self):
+        normalizer = RouteNormalizer()
+
+        self.assertEqual(normalizer("/users/42/items"), "/users/{id}/items")
+        self.assertEqual(
+            normalizer("/namespaces/test/users/0f2b6b3a5a9c4e1f8d7c6b5a4f3e2d1c"), "/namespaces/test/users/{id}"
+        )
+        self.assertEqual(normalizer("/orders/123e4567-e89b-12d3-a456-426614174000/"), "/orders/{id}/")
+        self.assertEqual(normalizer("/v1/health"), "/v1/health")
+
+    def test_custom_rules(self):
+        normalizer = RouteNormalizer(rules=[(r"[a-z]+@[a-z.]+", "{email}")])
+
+        self.assertEqual(normalizer("/users/someone@example.com/42"), "/users/{email}/42")
+
+    def test_bounded_cache(self):
+        normalizer = RouteNormalizer(cache_size=2)
+        for index in range(10):
+            normalizer("/items/{:d}".format(index))
+        normalizer("/items/9")
+
+        info = normalizer.normalize.cache_info()
+        self.assertEqual((info.currsize, info.hits), (2, 1))
@@ -0,0 +1,93 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.sampling` module."""
+
+import unittest
+from unittest import mock
+
+from justice_python_common_log.sampling import Sampler, TokenBucket
+
+
+class TestSampler(unittest.TestCase):
+    """Tests for `Sampler`."""
+
+    def test_keeps_everything_by_default(self):
+        sampler = Sampler()
+        self.assertEqual(sampler.sample("/", 200, 1), 1.0)
+
+    def test_rate_and_weight(self):
+        sampler = Sampler(rate=0.25)
+        with mock.patch("justice_python_common_log.sampling.random.random", side_effect=[0.1, 0.3]):
+            self.assertEqual(sampler.sample("/", 200, 1), 4.0)
+            self.assertEqual(sampler.sample("/", 200, 1), 0.0)
+        self.assertEqual((sampler.kept, sampler.sampled_out), (1, 1))
+
+    def test_path_and_status_rates(self):
+        sampler = Sampler(rate=1.0, path_rates={"/ping": 0}, status_rates={"3xx": 0.5, 204: 0})
+
+        self.assertEqual(sampler.rate_for("/ping", 200), 0)
+        self.assertEqual(sampler.rate_for("/other", 302), 0.5)
+        self.assertEqual(sampler.rate_for("/other", 204), 0)
+        self.assertEqual(sampler.rate_for("/other", 200), 1.0)
+        self.assertEqual(sampler.sample("/ping", 200, 1), 0.0)
+
+    def test_always_keep(self):
+        sampler = Sampler(rate=0, slow_threshold_ms=100)
+
+        self.assertEqual(sampler.sample("/", 503, 1), 1.0)
+        self.assertEqual(sampler.sample("/", 404, 1), 1.0)
+        self.assertEqual(sampler.sample("/", 200, 150), 1.0)
+        self.assertEqual(sampler.sample("/", 200, 50), 0.0)
+
+    def test_always_keep_disabled(self):
+        sampler = Sampler(rate=0, keep_server_errors=False, keep_client_errors=False, slow_threshold_ms=100)
+
+        self.assertEqual(sampler.sample("/", 503, 1), 0.0)
+        self.assertEqual(sampler.sample("/", 404, 1), 0.0)
+        self.assertEqual(sampler.sample("/", 503, 150), 1.0)
+        self.assertEqual(sampler.sample("/", 404, 150), 1.0)
+
+    def test_rate_limit(self):
+        sampler = Sampler(max_per_second=2)
+        weights = [sampler.sample("/", 200, 1) for _ in range(5)]
+
+        self.assertEqual(weights.count(1.0), 2)
+        self.assertEqual(sampler.rate_limited, 3)
+        self.assertEqual(sampler.sample("/", 500, 1), 1.0)
+
+    def test_rate_limited_weight_is_carried(self):
+        sampler = Sampler(rate=0.5, max_per_second=0.001, burst=1)
+        with mock.patch("justice_python_common_log.sampling.random.random", return_value=0.1):
+            weights = [sampler.sample("/items", 200, 1) for _ in range(10)]
+            weights.append(sampler.sample("/other", 200, 1))
+            for path in ("/items", "/other"):
+                sampler.bucket.tokens = 1
+                weights.append(sampler.sample(path, 200, 1))
+
+        self.assertEqual(weights[0], 2.0)
+        self.assertEqual(weights[-2:], [20.0, 4.0])
+        self.assertEqual(sum(weights), 13 * 2.0)
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Tests for `TokenBucket`."""
+
+    def test_refill(self):
+        with mock.patch("justice_python_common_log.sampling.time.monotonic", side_effect=[0, 0, 0, 0.5, 0.6]):
+            bucket = TokenBucket(rate=2, capacity=1)
+            self.assertTrue(bucket.take())
+            self.assertFalse(bucket.take())
+            self.assertTrue(bucket.take())
+            self.assertFalse(bucket.take())
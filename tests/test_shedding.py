@@ -0,0 +1,138 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.shedding` module."""
+
+import unittest
+from unittest import mock
+
+from werkzeug.test import Client
+
+from justice_python_common_log.config import LogConfig
+from justice_python_common_log.constant import (
+    SHEDDING_LEVEL_DEFAULT_FORMAT, SHEDDING_LEVEL_NO_BODIES, SHEDDING_LEVEL_NO_TOKEN, SHEDDING_LEVEL_SAMPLED
+)
+from justice_python_common_log.shedding import LoadShedder
+from justice_python_common_log.wsgi import LogMiddleware
+from justice_python_common_log.writer import BackgroundWriter
+from tests.data.dummy import TEST_TOKEN
+
+SECOND = 1000000000
+
+
+class ListSink:
+    """Sink keeping the lines written to it."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+
+def application(environ, start_response):
+    body = environ["wsgi.input"].read(int(environ.get("CONTENT_LENGTH") or 0))
+    start_response("200 OK", [("Content-Type", "application/json")])
+    return [body]
+
+
+class TestLoadShedder(unittest.TestCase):
+    """Tests for the adaptive `LoadShedder`."""
+
+    def test_escalates_one_level_per_interval(self):
+        sink = ListSink()
+        shedder = LoadShedder(max_record_cost_us=100, smoothing=1)
+        shedder.bind(sink.write, None)
+
+        for second in range(6):
+            shedder.observe(500 * 1000, 1, second * SECOND)
+
+        self.assertEqual(shedder.level, SHEDDING_LEVEL_SAMPLED)
+        self.assertEqual((shedder.changes, shedder.escalations), (4, 4))
+        self.assertRegex(
+            sink.lines[0], r"^time=\S+ log_type=access_shedding mode=no_bodies previous=full level=1 pressure=5.00$"
+        )
+
+    def test_recovers_with_hysteresis(self):
+        shedder = LoadShedder(max_record_cost_us=100, recover_ratio=0.5, recover_after=3, smoothing=1)
+        shedder.observe(200 * 1000, 1, 0)
+        shedder.observe(200 * 1000, 1, 1 * SECOND)
+        shedder.observe(200 * 1000, 1, 2 * SECOND)
+        self.assertEqual(shedder.level, SHEDDING_LEVEL_NO_TOKEN)
+
+        # between the recovery and escalation thresholds nothing changes
+        for second in range(3, 10):
+            shedder.observe(70 * 1000, 1, second * SECOND)
+        self.assertEqual(shedder.level, SHEDDING_LEVEL_NO_TOKEN)
+
+        # one step back per quiet period
+        for second in range(10, 14):
+            shedder.observe(10 * 1000, 1, second * SECOND)
+        self.assertEqual(shedder.level, SHEDDING_LEVEL_NO_BODIES)
+        for second in range(14, 17):
+            shedder.observe(10 * 1000, 1, second * SECOND)
+        self.assertEqual(shedder.level, 0)
+        self.assertEqual(shedder.counters()["recoveries"], 2)
+
+    def test_latency_and_queue_pressure(self):
+        shedder = LoadShedder(max_record_cost_us=None, max_latency_ms=100, smoothing=1)
+        shedder.observe(0, 250, 0)
+        self.assertEqual(shedder.measure(), 2.5)
+
+        writer = BackgroundWriter(ListSink(), max_queue_size=10)
+        self.addCleanup(writer.close)
+        shedder = LoadShedder(max_record_cost_us=None, max_queue_fill=0.5)
+        shedder.bind(None, None, writer)
+        with mock.patch.object(BackgroundWriter, "queue_size", 8):
+            self.assertEqual(shedder.measure(), 1.6)
+
+    def test_levels_applied_by_the_engine(self):
+        sink = ListSink()
+        shedder = LoadShedder(sample_rate=0.5)
+        client = Client(LogMiddleware(
+            application, sink=sink, shedder=shedder, config=LogConfig(full_access_log_enabled=True)
+        ))
+
+        def request():
+            client.post(
+                "/echo",
+                data=b'{"a":1}',
+                headers={"Content-Type": "application/json", "Authorization": "Bearer " + TEST_TOKEN},
+            )
+            return sink.lines[-1]
+
+        line = request()
+        self.assertIn('request_body=AB[{"a":1}]AB', line)
+        self.assertIn("client_id=0000000000000", line)
+        self.assertIn("sample_weight=1", line)
+
+        shedder.level = SHEDDING_LEVEL_NO_BODIES
+        line = request()
+        self.assertIn("request_body=AB[]AB", line)
+        self.assertIn("length=7 ", line)
+        self.assertIn("client_id=0000000000000", line)
+
+        shedder.level = SHEDDING_LEVEL_NO_TOKEN
+        self.assertIn("client_id= ", request())
+
+        shedder.level = SHEDDING_LEVEL_DEFAULT_FORMAT
+        self.assertNotIn("client_id", request())
+
+        shedder.level = SHEDDING_LEVEL_SAMPLED
+        count = len(sink.lines)
+        with mock.patch("justice_python_common_log.shedding.random.random", return_value=0.7):
+            request()
+        self.assertEqual((len(sink.lines), shedder.shed), (count, 1))
+        with mock.patch("justice_python_common_log.shedding.random.random", return_value=0.2):
+            self.assertTrue(request().endswith("sample_weight=2"))
@@ -0,0 +1,110 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.sink` module."""
+
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from justice_python_common_log.sink import BufferedSink
+
+
+class TestBufferedSink(unittest.TestCase):
+    """Tests for `BufferedSink`."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "access.log")
+
+    def read(self):
+        with open(self.path, "rb") as log_file:
+            return log_file.read()
+
+    def test_buffers_until_size_threshold(self):
+        sink = BufferedSink(self.path, buffer_size=12, flush_interval=60)
+        self.addCleanup(sink.close)
+        sink.write("first")
+
+        self.assertFalse(os.path.exists(self.path))
+
+        sink.write(b"second")
+
+        self.assertEqual(self.read(), b"first\nsecond\n")
+
+    def test_flushes_after_interval(self):
+        sink = BufferedSink(self.path, flush_interval=0.05)
+        self.addCleanup(sink.close)
+        sink.write("line")
+
+        deadline = time.monotonic() + 2
+        while not os.path.exists(self.path) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.read(), b"line\n")
+
+    def test_close_flushes(self):
+        sink = BufferedSink(self.path)
+        sink.write("line")
+        sink.close()
+        sink.write("ignored")
+
+        self.assertEqual(self.read(), b"line\n")
+
+    def test_file_descriptor(self):
+        read_fd, write_fd = os.pipe()
+        self.addCleanup(os.close, read_fd)
+        self.addCleanup(os.close, write_fd)
+        sink = BufferedSink(write_fd)
+        sink.write("line")
+        sink.close()
+
+        self.assertEqual(os.read(read_fd, 100), b"line\n")
+
+    def test_unix_socket(self):
+        address = os.path.join(self.directory.name, "log.sock")
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(server.close)
+        server.bind(address)
+        server.listen(1)
+
+        sink = BufferedSink("unix:" + address)
+        sink.write(b'{"a":1}')
+        sink.write(b'{"a":2}')
+        sink.close()
+
+        connection, _ = server.accept()
+        with connection:
+            self.assertEqual(connection.recv(100), b'{"a":1}\n{"a":2}\n')
+
+    def test_unreachable_socket_drops_lines(self):
+        sink = BufferedSink("unix:" + os.path.join(self.directory.name, "missing.sock"))
+        sink.write("first")
+        sink.write("second")
+        sink.close()
+
+        self.assertEqual(sink.dropped, 2)
+
+    def test_import_does_not_configure_logging(self):
+        code = (
+            "import logging, justice_python_common_log.flask, justice_python_common_log.fastapi;"
+            "print(len(logging.getLogger().handlers))"
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+
+        self.assertEqual(output.strip(), "0")
@@ -0,0 +1,139 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.spool` module."""
+
+import os
+import signal
+import tempfile
+import time
+import unittest
+
+from justice_python_common_log import spool
+from justice_python_common_log.spool import SPOOL_HEADER_SIZE, SpoolSink
+
+
+class ListSink:
+    """Sink keeping the lines written to it."""
+
+    def __init__(self):
+        self.lines = []
+
+    def write(self, line):
+        self.lines.append(line)
+
+
+class TestSpoolSink(unittest.TestCase):
+    """Tests for the memory-mapped `SpoolSink`."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "access.spool")
+
+    def open_spool(self, **kwargs):
+        sink = SpoolSink(self.path, **kwargs)
+        self.addCleanup(sink.close)
+        return sink
+
+    def test_drain_forwards_in_order_across_the_ring_end(self):
+        sink = self.open_spool(capacity=64)
+        target = ListSink()
+
+        for index in range(10):
+            sink.write("line {:d}".format(index))
+            self.assertEqual(sink.drain(target), 1)
+
+        self.assertEqual(target.lines, ["line {:d}".format(index).encode() for index in range(10)])
+        self.assertEqual(sink.backlog, 0)
+
+    def test_full_ring_drops_newest(self):
+        sink = self.open_spool(capacity=64)
+        target = ListSink()
+
+        for index in range(10):
+            sink.write("line {:d}".format(index))
+
+        self.assertEqual(sink.dropped, 6)
+        self.assertEqual(sink.drain(target), 4)
+        self.assertEqual(target.lines[-1], b"line 3")
+
+    def test_records_survive_reopening(self):
+        writer = SpoolSink(self.path, capacity=1024)
+        writer.write("first")
+        writer.write("second")
+        self.assertEqual(writer.drain(ListSink(), max_records=1), 1)
+        writer.close()
+
+        target = ListSink()
+        reader = self.open_spool(capacity=4096)
+
+        self.assertEqual(reader.capacity, 1024)
+        self.assertEqual(reader.drain(target), 1)
+        self.assertEqual(target.lines, [b"second"])
+
+    def test_corrupted_record_is_skipped(self):
+        sink = self.open_spool(capacity=1024)
+        sink.write("good")
+        sink.write("damaged")
+        sink.write("also good")
+        # flip a payload byte of the second record
+        position = SPOOL_HEADER_SIZE + 8 + len("good") + 8
+        with open(self.path, "r+b") as spool_file:
+            spool_file.seek(position)
+            spool_file.write(b"X")
+
+        target = ListSink()
+
+        self.assertEqual(sink.drain(target), 2)
+        self.assertEqual(target.lines, [b"good", b"also good"])
+        self.assertEqual(sink.corrupted, 1)
+
+    def test_drain_thread_and_forked_writer(self):
+        target = ListSink()
+        sink = self.open_spool(capacity=4096, target=target, drain_interval=0.01)
+
+        pid = os.fork()
+        if pid == 0:
+            # only the parent drains
+            sink.target = None
+            sink.write("from child")
+            os._exit(0)
+        os.waitpid(pid, 0)
+        sink.write("from parent")
+
+        deadline = time.monotonic() + 5
+        while len(target.lines) < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(target.lines, [b"from child", b"from parent"])
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as log_file:
+            log_file.write(b"time=2024-01-01T00:00:00Z log_type=access " * 4)
+
+        with self.assertRaises(ValueError):
+            SpoolSink(self.path)
+
+    def test_main_drains_to_output(self):
+        sink = self.open_spool(capacity=1024)
+        sink.write("spooled")
+        output = os.path.join(self.directory.name, "access.log")
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            self.addCleanup(signal.signal, signum, signal.getsignal(signum))
+
+        self.assertEqual(spool.main([self.path, "--output", output]), 0)
+
+        with open(output, "rb") as log_file:
+            self.assertEqual(log_file.read(), b"spooled\n")
+        self.assertEqual(sink.backlog, 0)
@@ -16,7 +16,7 @@
 
 import unittest
 
-from justice_python_common_log.utils import decodeToken, getRequestBody, getResponseBody, minifyJsonString, isSupportedContentType
+from justice_python_common_log.utils import duration_ms, decode_token, get_request_body, get_response_body, minify_json_string, is_supported_content_type
 from tests.data.dummy import TEST_CONTENT_TYPE, TEST_TOKEN, TEST_LARGE_DATA, TEST_RESPONSE_BODY, TEST_RESPONSE_BODY_RESULT, TEST_REQUEST_BODY, TEST_REQUEST_BODY_RESULT, TEST_INVALID_CONTENT_TYPE
 
 
@@ -24,42 +24,45 @@ class TestUtils(unittest.TestCase):
     """Tests for `justice_common_log` package."""
 
     def test_get_request_body(self):
-        result = getRequestBody(TEST_REQUEST_BODY, TEST_CONTENT_TYPE)
+        result = get_request_body(TEST_REQUEST_BODY, TEST_CONTENT_TYPE)
         self.assertEqual(result, TEST_REQUEST_BODY_RESULT)
 
     def test_get_request_body_too_large(self):
-        result = getRequestBody(TEST_LARGE_DATA, TEST_CONTENT_TYPE)
-        self.assertEqual(result, 'data too large')
+        result = get_request_body(TEST_LARGE_DATA, TEST_CONTENT_TYPE)
+        self.assertEqual(result, TEST_LARGE_DATA[:10240].decode() + '...(truncated)')
 
     def test_get_request_invalid_content_type(self):
-        result = getRequestBody(TEST_REQUEST_BODY, TEST_INVALID_CONTENT_TYPE)
+        result = get_request_body(TEST_REQUEST_BODY, TEST_INVALID_CONTENT_TYPE)
         self.assertEqual(result, '')
 
     def test_get_response_body(self):
-        result = getResponseBody(TEST_RESPONSE_BODY, TEST_CONTENT_TYPE)
+        result = get_response_body(TEST_RESPONSE_BODY, TEST_CONTENT_TYPE)
         self.assertEqual(result, TEST_RESPONSE_BODY_RESULT)
 
     def test_get_response_body_too_large(self):
-        result = getResponseBody(TEST_LARGE_DATA, TEST_CONTENT_TYPE)
-        self.assertEqual(result, 'data too large')
+        result = get_response_body(TEST_LARGE_DATA, TEST_CONTENT_TYPE)
+        self.assertEqual(result, TEST_LARGE_DATA[:10240].decode() + '...(truncated)')
 
     def test_get_response_invalid_content_type(self):
-        result = getResponseBody(TEST_RESPONSE_BODY, TEST_INVALID_CONTENT_TYPE)
+        result = get_response_body(TEST_RESPONSE_BODY, TEST_INVALID_CONTENT_TYPE)
         self.assertEqual(result, '')
 
     def test_minify_json_string(self):
-        result = minifyJsonString(TEST_REQUEST_BODY)
+        result = minify_json_string(TEST_REQUEST_BODY)
         self.assertEqual(result, TEST_REQUEST_BODY_RESULT)
 
     def test_is_support_content_type(self):
-        result = isSupportedContentType(TEST_CONTENT_TYPE)
+        result = is_supported_content_type(TEST_CONTENT_TYPE)
         self.assertEqual(result, True)
 
     def test_is_support_content_type_invalid(self):
-        result = isSupportedContentType(TEST_INVALID_CONTENT_TYPE)
+        result = is_supported_content_type(TEST_INVALID_CONTENT_TYPE)
         self.assertEqual(result, False)
         
     def test_decode_token(self):
-        result = decodeToken(TEST_TOKEN)
+        result = decode_token(TEST_TOKEN)
         assert 'namespace' in result
 
+    def test_duration_ms(self):
+        self.assertEqual(duration_ms(1999999), 1)
+        self.assertEqual(duration_ms(1234567, precise=True), 1.234567)
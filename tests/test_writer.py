@@ -0,0 +1,122 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.writer` module."""
+
+import io
+import threading
+import unittest
+
+from justice_python_common_log.writer import (
+    BackgroundWriter, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST
+)
+
+
+class RecordingStream(io.StringIO):
+    """Text stream that records every write and can be paused."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = []
+        self.resume = threading.Event()
+        self.resume.set()
+        self.entered = threading.Event()
+
+    def write(self, data):
+        self.entered.set()
+        self.resume.wait()
+        self.writes.append(data)
+        return super().write(data)
+
+
+class TestBackgroundWriter(unittest.TestCase):
+    """Tests for `BackgroundWriter`."""
+
+    def test_batches_lines_into_single_write(self):
+        stream = RecordingStream()
+        writer = BackgroundWriter(stream, batch_size=10, flush_interval=5)
+        for i in range(10):
+            writer.write("line {:d}".format(i))
+        writer.flush()
+        writer.close()
+
+        self.assertEqual(len(stream.writes), 1)
+        self.assertEqual(stream.getvalue(), "".join("line {:d}\n".format(i) for i in range(10)))
+
+    def test_accepts_bytes(self):
+        stream = RecordingStream()
+        writer = BackgroundWriter(stream)
+        writer.write(b"bytes line")
+        writer.close()
+
+        self.assertEqual(stream.getvalue(), "bytes line\n")
+
+    def test_close_flushes_pending_lines(self):
+        stream = RecordingStream()
+        writer = BackgroundWriter(stream, flush_interval=60)
+        writer.write("pending")
+        writer.close()
+        writer.write("after close")
+
+        self.assertEqual(stream.getvalue(), "pending\n")
+
+    def _stall(self, writer, stream):
+        stream.resume.clear()
+        writer.write("in flight")
+        stream.entered.wait(1)
+
+    def test_drop_newest(self):
+        stream = RecordingStream()
+        writer = BackgroundWriter(stream, max_queue_size=2, batch_size=1, overflow=OVERFLOW_DROP_NEWEST)
+        self._stall(writer, stream)
+        for line in ("a", "b", "c", "d"):
+            writer.write(line)
+        stream.resume.set()
+        writer.close()
+
+        self.assertEqual(writer.dropped, 2)
+        self.assertEqual(stream.getvalue(), "in flight\na\nb\n")
+
+    def test_drop_oldest(self):
+        stream = RecordingStream()
+        writer = BackgroundWriter(stream, max_queue_size=2, batch_size=1, overflow=OVERFLOW_DROP_OLDEST)
+        self._stall(writer, stream)
+        for line in ("a", "b", "c", "d"):
+            writer.write(line)
+        stream.resume.set()
+        writer.close()
+
+        self.assertEqual(writer.dropped, 2)
+        self.assertEqual(stream.getvalue(), "in flight\nc\nd\n")
+
+    def test_block(self):
+        stream = RecordingStream()
+        writer = BackgroundWriter(stream, max_queue_size=1, batch_size=1)
+        self._stall(writer, stream)
+        writer.write("a")
+        blocked = threading.Thread(target=writer.write, args=("b",))
+        blocked.start()
+        blocked.join(0.1)
+        self.assertTrue(blocked.is_alive())
+
+        stream.resume.set()
+        blocked.join(1)
+        writer.close()
+
+        self.assertEqual(writer.dropped, 0)
+        self.assertEqual(stream.getvalue(), "in flight\na\nb\n")
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            BackgroundWriter(overflow="spill")
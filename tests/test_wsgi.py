@@ -0,0 +1,146 @@
+# Copyright 2024 AccelByte Inc
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for `justice_python_common_log.wsgi` module."""
+
+import re
+import unittest
+
+from werkzeug.test import Client
+
+from justice_python_common_log.config import LogConfig
+from justice_python_common_log.context import get_request_context
+from justice_python_common_log.core import AccessLogEngine
+from justice_python_common_log.wsgi import LogMiddleware, WSGIHeaders, get_path
+from tests.data.dummy import TEST_TOKEN
+
+DEFAULT_LINE = re.compile(
+    r'^time=\S+ log_type=access method=(\w+) path=(\S+) status=(\d+) duration=(\d+)$'
+)
+
+
+def application(environ, start_response):
+    """Bare WSGI app without any framework."""
+    path = environ["PATH_INFO"]
+    if path == "/echo":
+        body = environ["wsgi.input"].read(int(environ.get("CONTENT_LENGTH") or 0))
+        start_response("201 Created", [("Content-Type", "application/json")])
+        return [body]
+    if path == "/stream":
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return (chunk for chunk in (b"a" * 10, b"b" * 10))
+    if path == "/stream-context":
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return (get_request_context().client_id.encode() for _ in range(2))
+    if path == "/context":
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [get_request_context().client_id.encode()]
+    start_response("404 Not Found", [("Content-Type", "text/plain")])
+    return [b"not found"]
+
+
+class TestWSGILogMiddleware(unittest.TestCase):
+    """Tests for the generic WSGI `LogMiddleware`."""
+
+    def test_default_log_format(self):
+        client = Client(LogMiddleware(application))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/missing")
+
+        self.assertEqual(response.status_code, 404)
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertEqual(match.group(1, 2, 3), ("GET", "/missing", "404"))
+
+    def test_streamed_response_logged_on_close(self):
+        client = Client(LogMiddleware(application))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/stream")
+            self.assertEqual(response.get_data(), b"a" * 10 + b"b" * 10)
+            self.assertEqual(logs.records, [])
+            response.close()
+
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertEqual(match.group(2, 3), ("/stream", "200"))
+
+    def test_failing_app_is_logged(self):
+        def app(environ, start_response):
+            start_response("200 OK", [])
+            raise RuntimeError("boom")
+
+        client = Client(LogMiddleware(app))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            with self.assertRaises(RuntimeError):
+                client.get("/fail")
+
+        match = DEFAULT_LINE.match(logs.records[0].getMessage())
+        self.assertEqual(match.group(2, 3), ("/fail", "500"))
+
+    def test_request_context_while_streaming(self):
+        client = Client(LogMiddleware(application))
+        with self.assertLogs('justice-common-log', level='INFO'):
+            response = client.get("/stream-context", headers={"Authorization": "Bearer " + TEST_TOKEN})
+            self.assertEqual(response.get_data(), b"0000000000000" * 2)
+            response.close()
+
+    def test_full_access_log(self):
+        client = Client(LogMiddleware(application, config=LogConfig(full_access_log_enabled=True)))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.post(
+                "/echo",
+                data=b'{"a": 1}',
+                headers={
+                    "Content-Type": "application/json",
+                    "Authorization": "Bearer " + TEST_TOKEN,
+                    "User-Agent": "test-agent",
+                },
+            )
+
+        message = logs.records[0].getMessage()
+        self.assertIn("status=201", message)
+        self.assertIn("length=8", message)
+        self.assertIn('user_agent="test-agent"', message)
+        self.assertIn("client_id=0000000000000", message)
+        self.assertIn('request_body=AB[{"a":1}]AB', message)
+        self.assertIn('response_body=AB[{"a":1}]AB', message)
+        self.assertIn('response_content_type="application/json"', message)
+
+    def test_multi_line_text_body(self):
+        client = Client(LogMiddleware(application, config=LogConfig(full_access_log_enabled=True)))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            client.post("/echo", data=b"a\nb]AB\ntime=t log_type=access", headers={"Content-Type": "text/plain"})
+
+        message = logs.records[0].getMessage()
+        self.assertNotIn("\n", message)
+        self.assertIn("request_body=AB[a\\nb\\x5dAB\\ntime=t log_type=access]AB", message)
+
+    def test_excluded_path_and_shared_engine(self):
+        engine = AccessLogEngine(config=LogConfig(excluded_paths=["/context"]), echo_trace_id=True)
+        client = Client(LogMiddleware(application, engine))
+        with self.assertLogs('justice-common-log', level='INFO') as logs:
+            response = client.get("/context", headers={"Authorization": "Bearer " + TEST_TOKEN})
+            client.get("/missing")
+
+        self.assertEqual(response.get_data(), b"0000000000000")
+        self.assertRegex(response.headers["X-Ab-TraceID"], "^[0-9a-f]{32}$")
+        self.assertEqual(len(logs.records), 1)
+        self.assertIn("path=/missing", logs.records[0].getMessage())
+
+    def test_headers_and_path(self):
+        headers = WSGIHeaders({"HTTP_USER_AGENT": "agent", "CONTENT_TYPE": "text/plain"})
+
+        self.assertEqual(headers.get("user-agent"), "agent")
+        self.assertEqual(headers.get("content-type"), "text/plain")
+        self.assertEqual(headers.get("referer", ""), "")
+        self.assertEqual(get_path({"PATH_INFO": "/cafÃ©"}), "/café")
+        self.assertEqual(get_path({}), "/")